@@ -0,0 +1,255 @@
+"""
+agent_budget.py: This module contains the budget controller of the pandas agent.
+Each question is classified into a type with its own limits on agent steps, wall
+time and tokens. The agent is driven step by step so that a repeated tool call
+stops the run before it executes again, a lookup whose tool output already holds
+the answer returns without another LLM call, and every run reports the
+iterations, tokens and wall time it used.
+"""
+
+import re
+import time
+from dataclasses import asdict, dataclass
+
+from langchain.agents.agent_iterator import AgentExecutorIterator
+from langchain.callbacks.base import BaseCallbackHandler
+
+from context_builder import count_tokens
+
+AGENT_STOPPED_PREFIX = "Agent stopped"
+
+
+@dataclass(frozen=True)
+class Budget:
+    """
+    Limits of one agent run.
+
+    Attributes:
+        max_iterations (int): Maximum number of agent steps (LLM calls).
+        max_execution_time (float): Maximum wall time in seconds.
+        max_tokens (int): Maximum number of prompt and completion tokens.
+    """
+    max_iterations: int
+    max_execution_time: float
+    max_tokens: int
+
+
+BUDGETS = {
+    "lookup": Budget(max_iterations=4, max_execution_time=60, max_tokens=12_000),
+    "aggregate": Budget(max_iterations=6, max_execution_time=120, max_tokens=20_000),
+    "summary": Budget(max_iterations=8, max_execution_time=180, max_tokens=30_000),
+    "analysis": Budget(max_iterations=10, max_execution_time=240, max_tokens=40_000),
+}
+MAX_ITERATIONS = max(budget.max_iterations for budget in BUDGETS.values())
+
+# Checked in this order, so "ortalama satış neden düştü" is an analysis question.
+QUESTION_KEYWORDS = (
+    ("analysis", ("neden", "niçin", "trend", "ilişki", "korelasyon", "analiz", "yorumla", "açıkla",
+                  "etki", "why", "correlat", "explain")),
+    ("aggregate", ("göre", "her bir", "grup", "kırılım", "karşılaştır", "dağılım", "per ", " by ",
+                   "group", "compare")),
+    ("lookup", ("kaç", "toplam", "ortalama", "en yüksek", "en düşük", "maksimum", "minimum", "medyan",
+                "sayısı", "how many", "average", "mean", "max", "min", "count", "sum")),
+)
+DEFAULT_QUESTION_TYPE = "aggregate"
+
+STOP_REASONS = {
+    "loop": "aynı araç çağrısı tekrarlandı",
+    "iterations": "adım sınırına ulaşıldı",
+    "time": "süre sınırına ulaşıldı",
+    "tokens": "token sınırına ulaşıldı",
+}
+EARLY_ANSWER_MAX_LENGTH = 80
+_SCALAR = re.compile(r"^\(?-?\d[\d.,eE+\- ]*\)?%?$")
+_AGGREGATION = re.compile(r"\b(sum|mean|median|count|nunique|max|min|std|var|len|shape|size|idxmax|idxmin)\b")
+_ERROR = re.compile(r"^\w*(Error|Exception)\b")
+
+
+def classify_question(question):
+    """
+    Picks the budget type of a question from its keywords.
+
+    Args:
+        question (str): The question.
+
+    Returns:
+        str: A key of BUDGETS.
+    """
+    lowered = f" {question.lower()} "
+    for question_type, keywords in QUESTION_KEYWORDS:
+        if any(keyword in lowered for keyword in keywords):
+            return question_type
+    return DEFAULT_QUESTION_TYPE
+
+
+@dataclass
+class BudgetReport:
+    """
+    What an agent run used.
+
+    Attributes:
+        question_type (str): The budget type of the run.
+        iterations (int): Agent steps taken.
+        prompt_tokens (int): Prompt tokens, as reported by the model or estimated.
+        completion_tokens (int): Completion tokens, as reported by the model or estimated.
+        wall_time (float): Seconds the run took.
+        stop_reason (str): "finished", "early_answer", "cache" or a key of STOP_REASONS.
+    """
+    question_type: str
+    iterations: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    wall_time: float = 0.0
+    stop_reason: str = "finished"
+
+    @property
+    def tokens(self):
+        return self.prompt_tokens + self.completion_tokens
+
+    def as_dict(self):
+        return {**asdict(self), "tokens": self.tokens}
+
+
+class TokenUsageHandler(BaseCallbackHandler):
+    """
+    Sums the token usage of every LLM call it observes. Models that do not report
+    usage (e.g. while streaming) are counted with context_builder.count_tokens.
+    Subclasses can override on_usage to see each call's counts.
+    """
+
+    def __init__(self):
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self._prompt_estimates = {}
+
+    def on_llm_start(self, serialized, prompts, *, run_id=None, **kwargs):
+        self._prompt_estimates[run_id] = sum(count_tokens(prompt) for prompt in prompts)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id=None, **kwargs):
+        self._prompt_estimates[run_id] = sum(
+            count_tokens(str(message.content)) for batch in messages for message in batch
+        )
+
+    def on_llm_end(self, response, *, run_id=None, **kwargs):
+        estimate = self._prompt_estimates.pop(run_id, 0)
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        if usage.get("total_tokens"):
+            prompt_tokens = usage.get("prompt_tokens", 0)
+            completion_tokens = usage.get("completion_tokens", 0)
+        else:
+            prompt_tokens = estimate
+            completion_tokens = sum(
+                count_tokens(generation.text) for generations in response.generations for generation in generations
+            )
+        self.prompt_tokens += prompt_tokens
+        self.completion_tokens += completion_tokens
+        self.on_usage(run_id, prompt_tokens, completion_tokens)
+
+    def on_usage(self, run_id, prompt_tokens, completion_tokens):
+        pass
+
+
+def _call_signature(action):
+    # Whitespace and formatting differences do not make a retried call new.
+    return action.tool, re.sub(r"\s+", "", str(action.tool_input))
+
+
+def _is_error(observation):
+    return bool(_ERROR.match(observation.strip()))
+
+
+def _early_answer(action, observation):
+    """
+    Returns the observation when it is a single number computed by an aggregation,
+    i.e. already the answer of a lookup question, and None otherwise.
+    """
+    text = observation.strip()
+    if len(text) > EARLY_ANSWER_MAX_LENGTH or not _SCALAR.match(text):
+        return None
+    if not _AGGREGATION.search(str(action.tool_input)):
+        return None
+    return text
+
+
+def _stopped_answer(reason, last_observation):
+    answer = f"{AGENT_STOPPED_PREFIX}: {STOP_REASONS[reason]}."
+    if last_observation:
+        answer += f" Son ara sonuç: {last_observation[:500]}"
+    return answer
+
+
+def run_with_budget(executor, prompt, question_type=DEFAULT_QUESTION_TYPE, budget=None, callbacks=None,
+                    early_answer=True):
+    """
+    Runs the agent on a prompt within a budget.
+
+    The agent is driven with an AgentExecutorIterator, so each tool call is seen
+    before it runs. The run stops when a tool call repeats an earlier one, when
+    a limit of the budget is reached, or, for lookup questions, as soon as a tool
+    returns a single aggregated number.
+
+    Args:
+        executor (AgentExecutor): The pandas agent.
+        prompt (str): The agent's input.
+        question_type (str): A key of BUDGETS.
+        budget (Budget): Overrides the budget of question_type.
+        callbacks (list): Extra callback handlers of the run, e.g. for streaming.
+        early_answer (bool): Whether lookup questions may return a tool output directly.
+
+    Returns:
+        tuple: The answer (str) and the BudgetReport of the run.
+    """
+    budget = budget if budget is not None else BUDGETS[question_type]
+    report = BudgetReport(question_type)
+    usage = TokenUsageHandler()
+    handlers = [usage, *(callbacks or [])]
+    started = time.perf_counter()
+    seen = set()
+    last_observation = None
+    answer = None
+
+    # AgentExecutor.iter() does not expose yield_actions, which reports each
+    # tool call before it runs.
+    steps = iter(AgentExecutorIterator(executor, {"input": prompt}, callbacks=handlers, yield_actions=True))
+    try:
+        for chunk in steps:
+            if "output" in chunk:
+                report.iterations += 1
+                answer = chunk["output"]
+                break
+            for action in chunk.get("actions", []):
+                report.iterations += 1
+                signature = _call_signature(action)
+                if signature in seen:
+                    report.stop_reason = "loop"
+                    break
+                seen.add(signature)
+            for step in chunk.get("steps", []):
+                observation = str(step.observation)
+                if _is_error(observation):
+                    continue
+                last_observation = observation
+                if early_answer and question_type == "lookup":
+                    answer = _early_answer(step.action, observation)
+                    if answer is not None:
+                        report.stop_reason = "early_answer"
+                        break
+            if report.stop_reason != "finished":
+                break
+            report.prompt_tokens, report.completion_tokens = usage.prompt_tokens, usage.completion_tokens
+            if report.iterations >= budget.max_iterations:
+                report.stop_reason = "iterations"
+            elif time.perf_counter() - started >= budget.max_execution_time:
+                report.stop_reason = "time"
+            elif report.tokens >= budget.max_tokens:
+                report.stop_reason = "tokens"
+            if report.stop_reason != "finished":
+                break
+    finally:
+        steps.close()
+        report.prompt_tokens, report.completion_tokens = usage.prompt_tokens, usage.completion_tokens
+        report.wall_time = time.perf_counter() - started
+
+    if report.stop_reason in STOP_REASONS:
+        answer = _stopped_answer(report.stop_reason, last_observation)
+    return answer, report
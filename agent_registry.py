@@ -0,0 +1,122 @@
+"""
+agent_registry.py: This module contains a registry that keeps one pandas agent per
+dataset and language model configuration, so that repeated questions against the
+same upload reuse the agent instead of rebuilding its prompt and tool stack.
+"""
+
+import hashlib
+import os
+import threading
+import time
+
+DEFAULT_IDLE_TTL = float(os.environ.get("INFAI_AGENT_IDLE_TTL", "1800"))
+
+
+def dataset_identity(df, dataset_key=None):
+    """
+    Returns a key identifying the dataset an agent is bound to.
+
+    Args:
+        df (pd.DataFrame): The DataFrame the agent works on.
+        dataset_key (str): Content hash of the dataset, when known.
+
+    Returns:
+        str: The dataset identity.
+    """
+    if dataset_key is not None:
+        return dataset_key
+    # The registry holds a reference to df, so its id cannot be reused while cached.
+    return f"id:{id(df)}:{df.shape[0]}x{df.shape[1]}"
+
+
+def llm_identity(llm):
+    """
+    Returns a key describing the configuration of a language model.
+
+    Args:
+        llm: The language model.
+
+    Returns:
+        str: A short digest of the model type and its identifying parameters.
+    """
+    try:
+        params = sorted(dict(llm._identifying_params).items())
+    except Exception:
+        params = [("id", id(llm))]
+    description = f"{type(llm).__module__}.{type(llm).__name__}:{params!r}"
+    return hashlib.sha256(description.encode()).hexdigest()[:16]
+
+
+class AgentRegistry:
+    """
+    A thread-safe registry of agents with idle-time eviction.
+    """
+
+    def __init__(self, idle_ttl=DEFAULT_IDLE_TTL):
+        self.idle_ttl = idle_ttl
+        self._agents = {}
+        self._lock = threading.Lock()
+
+    def get_or_create(self, df, llm, factory, dataset_key=None):
+        """
+        Returns the agent for the given dataset and model, building it on first use.
+
+        Args:
+            df (pd.DataFrame): The DataFrame the agent works on.
+            llm: The language model used by the agent.
+            factory (callable): Builds a new agent as factory(df, llm).
+            dataset_key (str): Content hash of the dataset, when known.
+
+        Returns:
+            The cached or newly built agent.
+        """
+        key = (dataset_identity(df, dataset_key), llm_identity(llm))
+        now = time.time()
+        with self._lock:
+            self._evict_idle(now)
+            record = self._agents.get(key)
+            if record is not None:
+                record["last_used"] = now
+                return record["agent"]
+
+        agent = factory(df, llm)
+        with self._lock:
+            record = self._agents.setdefault(key, {"agent": agent, "df": df, "last_used": now})
+            return record["agent"]
+
+    def _evict_idle(self, now):
+        expired = [key for key, record in self._agents.items() if now - record["last_used"] > self.idle_ttl]
+        for key in expired:
+            del self._agents[key]
+
+    def evict_dataset(self, dataset_key):
+        """
+        Drops every agent bound to the given dataset.
+
+        Args:
+            dataset_key (str): The dataset identity.
+        """
+        with self._lock:
+            for key in [key for key in self._agents if key[0] == dataset_key]:
+                del self._agents[key]
+
+    def clear(self):
+        with self._lock:
+            self._agents.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._agents)
+
+
+_default_registry = AgentRegistry()
+
+
+def get_default_registry():
+    """
+    Returns the process-wide agent registry.
+
+    Returns:
+        AgentRegistry: The shared registry instance.
+    """
+    return _default_registry
@@ -0,0 +1,250 @@
+"""
+answer_cache.py: This module contains a persistent, SQLite-backed cache of answers to
+natural language questions, keyed by dataset fingerprint, answering model and
+normalized question text, with TTL and size-bounded eviction. Token-set fuzzy matching is opt-in and
+only matches questions that differ in filler words, never in numbers or column names.
+"""
+
+import os
+import re
+import sqlite3
+import threading
+import time
+from contextlib import closing
+
+from llm_metrics import model_name
+
+DEFAULT_PATH = os.environ.get("INFAI_ANSWER_CACHE", os.path.join("data", "answer_cache.sqlite3"))
+DEFAULT_TTL = 7 * 24 * 3600
+DEFAULT_MAX_ENTRIES = 5000
+# Off unless configured: near-identical questions about different stores or
+# "en yüksek" versus "en düşük" must not share an answer.
+DEFAULT_FUZZY_THRESHOLD = (
+    float(os.environ["INFAI_ANSWER_CACHE_FUZZY"]) if os.environ.get("INFAI_ANSWER_CACHE_FUZZY") else None
+)
+# Words that may differ between two questions with the same answer.
+FILLER_TOKENS = frozenset((
+    "acaba", "bana", "bu", "bir", "de", "da", "lütfen", "mi", "mı", "mu", "mü", "nedir", "ne", "peki", "şu",
+    "söyle", "söyler", "misin", "musun", "verir", "the", "a", "an", "is", "are", "what", "please", "tell", "me",
+))
+
+_TURKISH_LOWER = str.maketrans({"I": "ı", "İ": "i"})
+_NON_WORD = re.compile(r"[^\w\s]+")
+
+
+def model_key(llm):
+    """
+    Returns the identity of a language model in cache keys: its name and, when it
+    has one, its temperature, since both change the answers.
+
+    Args:
+        llm: The language model.
+
+    Returns:
+        str: The model identity.
+    """
+    name = model_name(llm) or ""
+    temperature = getattr(llm, "temperature", None)
+    return name if temperature is None else f"{name}@{temperature}"
+
+
+def normalize_question(question):
+    """
+    Normalizes a question so that case, punctuation and spacing differences match.
+
+    Args:
+        question (str): The question as typed by the user.
+
+    Returns:
+        str: The normalized question.
+    """
+    text = question.translate(_TURKISH_LOWER).lower()
+    return " ".join(_NON_WORD.sub(" ", text).split())
+
+
+def token_set_similarity(first, second):
+    """
+    Computes the Jaccard similarity of the word sets of two normalized questions.
+
+    Args:
+        first (str): A normalized question.
+        second (str): Another normalized question.
+
+    Returns:
+        float: Similarity between 0 and 1.
+    """
+    first_tokens, second_tokens = set(first.split()), set(second.split())
+    if not first_tokens and not second_tokens:
+        return 1.0
+    return len(first_tokens & second_tokens) / len(first_tokens | second_tokens)
+
+
+def differ_only_in_filler(first, second, columns=()):
+    """
+    Checks that two normalized questions differ only in FILLER_TOKENS. Numbers
+    and words of column names never count as filler.
+
+    Args:
+        first (str): A normalized question.
+        second (str): Another normalized question.
+        columns (list): Column names of the dataset.
+
+    Returns:
+        bool: Whether the questions ask the same thing.
+    """
+    column_tokens = {token for column in columns for token in normalize_question(str(column)).split()}
+    for token in set(first.split()) ^ set(second.split()):
+        if token not in FILLER_TOKENS or token in column_tokens or any(char.isdigit() for char in token):
+            return False
+    return True
+
+
+class AnswerCache:
+    """
+    An on-disk answer cache shared by every session of the process.
+
+    Attributes:
+        hits (int): Number of exact cache hits.
+        fuzzy_hits (int): Number of hits found through fuzzy matching.
+        misses (int): Number of lookups without a usable answer.
+    """
+
+    def __init__(self, path=DEFAULT_PATH, ttl=DEFAULT_TTL, max_entries=DEFAULT_MAX_ENTRIES,
+                 fuzzy_threshold=DEFAULT_FUZZY_THRESHOLD):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.fuzzy_threshold = fuzzy_threshold
+        self.hits = 0
+        self.fuzzy_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with closing(self._connect()) as connection, connection:
+            columns = [row[1] for row in connection.execute("PRAGMA table_info(answers)")]
+            if columns and "model" not in columns:
+                # Answers cached before the model was part of the key cannot be attributed.
+                connection.execute("DROP TABLE answers")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS answers ("
+                "dataset TEXT NOT NULL, model TEXT NOT NULL, question TEXT NOT NULL, answer TEXT NOT NULL, "
+                "created REAL NOT NULL, last_access REAL NOT NULL, "
+                "PRIMARY KEY (dataset, model, question))"
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def get(self, dataset_key, question, columns=(), model=""):
+        """
+        Looks up a cached answer. Only an exact match of the normalized question
+        hits, unless fuzzy_threshold is set: then the most similar cached
+        question that differs only in filler words hits too.
+
+        Args:
+            dataset_key (str): Fingerprint of the dataset the question is about.
+            question (str): The question as typed by the user.
+            columns (list): Column names of the dataset, which fuzzy matches must not differ in.
+            model (str): Identity of the model asked, see model_key; other models' answers miss.
+
+        Returns:
+            str: The cached answer, or None on a miss.
+        """
+        normalized = normalize_question(question)
+        oldest = time.time() - self.ttl
+        with closing(self._connect()) as connection, connection:
+            row = connection.execute(
+                "SELECT question, answer FROM answers "
+                "WHERE dataset = ? AND model = ? AND question = ? AND created >= ?",
+                (dataset_key, model, normalized, oldest)
+            ).fetchone()
+            fuzzy = False
+            if row is None and self.fuzzy_threshold is not None:
+                row = self._closest(connection, dataset_key, model, normalized, oldest, columns)
+                fuzzy = row is not None
+            if row is not None:
+                connection.execute(
+                    "UPDATE answers SET last_access = ? WHERE dataset = ? AND model = ? AND question = ?",
+                    (time.time(), dataset_key, model, row[0])
+                )
+
+        with self._lock:
+            if row is None:
+                self.misses += 1
+            elif fuzzy:
+                self.fuzzy_hits += 1
+            else:
+                self.hits += 1
+        return row[1] if row is not None else None
+
+    def _closest(self, connection, dataset_key, model, normalized, oldest, columns):
+        best, best_score = None, self.fuzzy_threshold
+        candidates = connection.execute(
+            "SELECT question, answer FROM answers WHERE dataset = ? AND model = ? AND created >= ?",
+            (dataset_key, model, oldest)
+        )
+        for candidate in candidates:
+            score = token_set_similarity(normalized, candidate[0])
+            if score >= best_score and differ_only_in_filler(normalized, candidate[0], columns):
+                best, best_score = candidate, score
+        return best
+
+    def put(self, dataset_key, question, answer, model=""):
+        """
+        Stores an answer and evicts expired and least recently used entries.
+
+        Args:
+            dataset_key (str): Fingerprint of the dataset the question is about.
+            question (str): The question as typed by the user.
+            answer (str): The answer to be cached.
+            model (str): Identity of the model that answered, see model_key.
+        """
+        now = time.time()
+        with closing(self._connect()) as connection, connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO answers (dataset, model, question, answer, created, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (dataset_key, model, normalize_question(question), answer, now, now)
+            )
+            connection.execute("DELETE FROM answers WHERE created < ?", (now - self.ttl,))
+            connection.execute(
+                "DELETE FROM answers WHERE rowid IN ("
+                "SELECT rowid FROM answers ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+
+    def stats(self):
+        """
+        Returns the hit and miss counters together with the number of stored answers.
+
+        Returns:
+            dict: Counter values.
+        """
+        with closing(self._connect()) as connection, connection:
+            size = connection.execute("SELECT COUNT(*) FROM answers").fetchone()[0]
+        with self._lock:
+            return {"hits": self.hits, "fuzzy_hits": self.fuzzy_hits, "misses": self.misses, "entries": size}
+
+    def clear(self):
+        with closing(self._connect()) as connection, connection:
+            connection.execute("DELETE FROM answers")
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_answer_cache():
+    """
+    Returns the process-wide answer cache, creating its database on first use.
+
+    Returns:
+        AnswerCache: The shared cache instance.
+    """
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = AnswerCache()
+        return _default_cache
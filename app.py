@@ -3,16 +3,19 @@ DataAnalyzerApp: A Python application for data analysis, correlation analysis,
 and conversational interaction using Streamlit and the LangChain library.
 """
 
-import os
+import threading
 import pandas as pd
 import streamlit as st
-import matplotlib.pyplot as plt
-import seaborn as sns
-import numpy as np
-import base64
 import time
-from matplotlib.colors import LinearSegmentedColormap
 import streamlit.components.v1 as components
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+from dataset_cache import load_uploaded_csv, open_stored_dataset
+from dataset_store import list_datasets
+from exporter import FORMATS as EXPORT_FORMATS, export_dataset, export_file_name, get_default_export_cache
+from figure_cache import get_default_figure_cache
+from memory_governor import get_default_governor
+from sketches import build_sketch
+from correlation import cluster_order, correlation_matrix, high_correlation_pairs, strong_pairs
 
 st.set_page_config(page_title="InfAI", layout="wide", initial_sidebar_state="collapsed")
 
@@ -20,8 +23,6 @@ if "openai_api_key" not in st.session_state:
     st.session_state.openai_api_key = ""
 if "show_api_input" not in st.session_state:
     st.session_state.show_api_input = False
-if "page_loaded" not in st.session_state:
-    st.session_state.page_loaded = False
 if "theme" not in st.session_state:
     st.session_state.theme = "light"
 if "active_tab" not in st.session_state:
@@ -29,8 +30,10 @@ if "active_tab" not in st.session_state:
 if "welcome_shown" not in st.session_state:
     st.session_state.welcome_shown = False
 
-def add_bg_gradient():
-    if st.session_state.theme == "dark":
+# Stiller her tema için bir kez oluşturulur ve sonraki çalıştırmalarda yeniden kullanılır
+@st.cache_resource(show_spinner=False)
+def add_bg_gradient(theme):
+    if theme == "dark":
         bg_style = """
         <style>
         .stApp {
@@ -49,11 +52,12 @@ def add_bg_gradient():
         """
     return bg_style
 
-def load_css():
-    theme_color = "#4527A0" if st.session_state.theme == "light" else "#7C4DFF"
-    bg_color = "white" if st.session_state.theme == "light" else "#1E1E2E"
-    text_color = "#333" if st.session_state.theme == "light" else "#f0f0f0"
-    secondary_color = "#673AB7" if st.session_state.theme == "light" else "#BB86FC"
+@st.cache_resource(show_spinner=False)
+def load_css(theme):
+    theme_color = "#4527A0" if theme == "light" else "#7C4DFF"
+    bg_color = "white" if theme == "light" else "#1E1E2E"
+    text_color = "#333" if theme == "light" else "#f0f0f0"
+    secondary_color = "#673AB7" if theme == "light" else "#BB86FC"
     
     return f"""
     <style>
@@ -644,21 +648,126 @@ def show_theme_switch():
         st.session_state.theme = "dark" if st.session_state.theme == "light" else "light"
         st.rerun()
 
-st.markdown(add_bg_gradient(), unsafe_allow_html=True)
-st.markdown(load_css(), unsafe_allow_html=True)
+def _import_plots():
+    import plots  # noqa: F401 -- matplotlib ve seaborn ile birlikte yüklenir
+
+@st.cache_resource(show_spinner=False)
+def start_warmup():
+    """
+    Grafik modüllerini sayfa çizildikten sonra arka planda yükler.
+    """
+    thread = threading.Thread(target=_import_plots, daemon=True)
+    thread.start()
+    return thread
+
+def get_plots():
+    """
+    Grafik modülünü döndürür; arka plan yüklemesi bitmediyse onu bekler.
+    """
+    warmup = start_warmup()
+    if warmup.is_alive():
+        with st.spinner("Grafik modülleri hazırlanıyor..."):
+            warmup.join()
+    import plots
+    return plots
+
+@st.cache_resource(show_spinner=False)
+def get_llm(api_key):
+    # data_utils yalnızca yapay zeka özellikleri kullanıldığında yüklenir
+    from data_utils import build_llm
+    return build_llm(api_key)
+
+def format_stat(value):
+    # Tamamen boş sayısal sütunlarda istatistikler None, tek değerde std NaN olur
+    return "-" if value is None or pd.isna(value) else f"{value:.2f}"
+
+def render_stream(events):
+    """
+    Ajan adımlarını ve yanıt parçalarını geldikçe gösterir, son olayı döndürür.
+    """
+    started = time.perf_counter()
+    status = st.status("Yanıt hazırlanıyor...", expanded=False)
+    answer = st.empty()
+    text = ""
+    final = None
+    first_token = None
+    for event in events:
+        if event.kind == "step":
+            status.update(label=f"Çalışıyor: {event.tool}")
+            status.code(event.content, language="python" if event.tool == "python_repl_ast" else None)
+        elif event.kind == "observation":
+            status.text(event.content[:1000])
+        elif event.kind == "token":
+            if first_token is None:
+                first_token = time.perf_counter() - started
+            text += event.content
+            answer.markdown(text + "▌")
+        elif event.kind == "final":
+            final = event
+            answer.markdown(event.content)
+        elif event.kind == "error":
+            status.update(label="Hata oluştu", state="error")
+            st.error(event.content)
+            return None
+    label = f"Tamamlandı ({time.perf_counter() - started:.1f} sn"
+    label += f", ilk parça {first_token:.1f} sn" if first_token is not None else ""
+    if final is not None and final.data and "iterations" in final.data:
+        # Ajan bütçe raporu: kullanılan adım ve token sayısı
+        label += f", {final.data['iterations']} adım, {final.data['tokens']:,} token"
+    label += ")"
+    status.update(label=label, state="complete")
+    return final
+
+def current_session_id():
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx is not None else "local"
+
+def render_memory_diagnostics(governor):
+    """
+    Sunucunun bellek bütçesini, önbellek kullanımını ve oturum başına belleği gösterir.
+    """
+    report = governor.report()
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Toplam / Bütçe", f"{report['total_bytes'] / 1024 ** 2:,.0f} / {report['budget_bytes'] / 1024 ** 2:,.0f} MB")
+    col2.metric("Aktif Oturum", report["sessions"])
+    col3.metric("Açık Veri Seti", report["open_datasets"])
+    st.dataframe(
+        pd.DataFrame({"Önbellek": list(report["pools_mb"]), "MB": list(report["pools_mb"].values())}).round(2),
+        use_container_width=True, hide_index=True
+    )
+    st.caption("Oturumlar (paylaşılan veri seti, oturumlar arasında eşit bölünür)")
+    st.dataframe(governor.session_usage().round(2), use_container_width=True, hide_index=True)
+    if report["evictions"]:
+        st.caption("Son boşaltmalar: " + ", ".join(
+            f"{time.strftime('%H:%M:%S', time.localtime(at))} {pool} {nbytes / 1024 ** 2:.1f} MB"
+            for at, pool, nbytes in report["evictions"][-5:]
+        ))
+
+def render_llm_diagnostics():
+    """
+    Kaydedilen LLM çağrılarının gecikme, token ve adım özetlerini (p50/p95) gösterir.
+    """
+    from llm_metrics import get_default_recorder, summarize_metrics
+    records = get_default_recorder().read()
+    if not records:
+        st.caption("Henüz kaydedilmiş bir LLM çağrısı yok.")
+        return
+    summary = summarize_metrics(records)
+    st.dataframe(summary.style.format("{:.2f}", subset=[c for c in summary.columns if c.startswith("latency")]),
+                 use_container_width=True)
+    recent = pd.DataFrame(records[-20:][::-1])
+    columns = ["timestamp", "entry_point", "model", "latency", "iterations", "tool_calls",
+               "prompt_tokens", "completion_tokens", "stop_reason", "error"]
+    st.caption("Son çağrılar")
+    st.dataframe(recent.reindex(columns=columns), use_container_width=True, hide_index=True)
+
+st.markdown(add_bg_gradient(st.session_state.theme), unsafe_allow_html=True)
+st.markdown(load_css(st.session_state.theme), unsafe_allow_html=True)
 
 show_welcome_animation()
 
 show_theme_switch()
 
-if not st.session_state.page_loaded:
-    progress_bar = st.progress(0)
-    for i in range(101):
-        progress_bar.progress(i)
-        time.sleep(0.01)
-    st.session_state.page_loaded = True
-    st.rerun()
-
 st.markdown(
     """
     <div class="settings-icon" onclick="document.getElementById('settings-button').click()">
@@ -705,24 +814,56 @@ with st.container():
     with col2:
         st.markdown(get_file_uploader_html(), unsafe_allow_html=True)
         uploaded_file = st.file_uploader("CSV Dosyası Seçin", type="csv", label_visibility="collapsed")
+        compact_data = st.checkbox(
+            "Bellek optimizasyonu",
+            value=True,
+            help="Sayısal sütunları küçültür, az sayıda farklı değere sahip metin sütunlarını kategoriye çevirir ve tarih sütunlarını ayrıştırır."
+        )
+        
+        stored_datasets = {record["key"]: record for record in list_datasets("data")}
+        stored_key = None
+        if stored_datasets and uploaded_file is None:
+            stored_key = st.selectbox(
+                "Önceki veri setleri:",
+                options=[None] + list(stored_datasets),
+                format_func=lambda key: "Yeniden açmak için seçin..." if key is None else
+                    f"{stored_datasets[key]['name']} ({stored_datasets[key]['rows']:,} satır, {stored_datasets[key]['created'].replace('T', ' ')})"
+            )
 st.markdown("</div>", unsafe_allow_html=True)
 
-if uploaded_file is not None:
+# Sayfa çizildi; grafik modülleri kullanıcı veri seçerken arka planda yüklenir
+start_warmup()
+
+if uploaded_file is not None or stored_key is not None:
     try:
-        df = pd.read_csv(uploaded_file)
-        st.markdown(f"<div class='success-msg'>✅ '{uploaded_file.name}' başarıyla yüklendi!</div>", unsafe_allow_html=True)
-        
-        save_path = "data"
-        os.makedirs(save_path, exist_ok=True)
-        file_name = uploaded_file.name
-        save_file = os.path.join(save_path, file_name)
-        df.to_csv(save_file, index=False)
+        if uploaded_file is not None:
+            progress_bar = st.empty()
+            
+            def show_progress(fraction, partial_profile):
+                progress_bar.progress(
+                    fraction,
+                    text=f"Veri yükleniyor... {partial_profile.n_rows:,} satır okundu, "
+                         f"{partial_profile.total_nulls:,} eksik değer"
+                )
+            
+            dataset = load_uploaded_csv(uploaded_file, store_dir="data", on_progress=show_progress, compact=compact_data)
+            progress_bar.empty()
+        else:
+            dataset = open_stored_dataset(stored_key, store_dir="data")
+        df = dataset.df
+        profile = dataset.profile
+        # Aynı yükleme tüm oturumlarda tek kopya olarak paylaşılır; bütçe aşılırsa önce türetilmiş veriler boşaltılır
+        governor = get_default_governor()
+        governor.track(current_session_id(), dataset)
+        st.markdown(f"<div class='success-msg'>✅ '{dataset.name}' başarıyla yüklendi!</div>", unsafe_allow_html=True)
+        
+        file_name = dataset.name
         
         st.markdown("<br>", unsafe_allow_html=True)
         
-        total_rows = df.shape[0]
-        total_cols = df.shape[1]
-        memory_usage = df.memory_usage(deep=True).sum()
+        total_rows = profile.n_rows
+        total_cols = profile.n_cols
+        memory_usage = profile.memory
         
         def format_bytes(size):
             for unit in ['B', 'KB', 'MB', 'GB']:
@@ -734,7 +875,18 @@ if uploaded_file is not None:
         col1, col2, col3 = st.columns(3)
         col1.metric("Satır Sayısı", f"{total_rows:,}")
         col2.metric("Sütun Sayısı", total_cols)
-        col3.metric("Bellek Kullanımı", format_bytes(memory_usage))
+        if dataset.compaction is not None and dataset.compaction.bytes_saved > 0:
+            col3.metric(
+                "Bellek Kullanımı",
+                format_bytes(memory_usage),
+                delta=f"-{format_bytes(dataset.compaction.bytes_saved)} (önce {format_bytes(dataset.compaction.bytes_before)})",
+                delta_color="inverse"
+            )
+        else:
+            col3.metric("Bellek Kullanımı", format_bytes(memory_usage))
+        
+        with st.expander("🧠 Bellek tanılama"):
+            render_memory_diagnostics(governor)
         
         st.markdown("<br>", unsafe_allow_html=True)
         col1, col2 = st.columns(2)
@@ -745,16 +897,16 @@ if uploaded_file is not None:
             
             st.markdown("<h3>Veri Tipleri</h3>", unsafe_allow_html=True)
             dtypes_df = pd.DataFrame({
-                "Sütun": df.dtypes.index,
-                "Veri Tipi": [str(dtype) for dtype in df.dtypes.values]
+                "Sütun": [column.name for column in profile.columns],
+                "Veri Tipi": [column.dtype for column in profile.columns]
             })
             st.dataframe(dtypes_df, use_container_width=True, height=min(250, 35 + 35 * len(dtypes_df)))
             
             st.markdown("<h3>Eksik Değerler</h3>", unsafe_allow_html=True)
             missing_data = pd.DataFrame({
-                "Sütun": df.columns,
-                "Eksik Değer": df.isnull().sum().values,
-                "Yüzde": (df.isnull().sum().values / len(df) * 100).round(2)
+                "Sütun": [column.name for column in profile.columns],
+                "Eksik Değer": [column.null_count for column in profile.columns],
+                "Yüzde": [round(column.null_pct, 2) for column in profile.columns]
             })
             missing_data["Yüzde"] = missing_data["Yüzde"].apply(lambda x: f"{x}%")
             st.dataframe(missing_data, use_container_width=True, height=min(250, 35 + 35 * len(missing_data)))
@@ -764,11 +916,11 @@ if uploaded_file is not None:
         with col2:
             st.markdown("<div class='card'>", unsafe_allow_html=True)
             st.markdown("<h2 class='subheader'>👁️ Veri Önizleme</h2>", unsafe_allow_html=True)
-            st.dataframe(df.head(), use_container_width=True)
+            st.dataframe(profile.head, use_container_width=True)
             
             # İstatistikler
             st.markdown("<h3>İstatistiksel Özet</h3>", unsafe_allow_html=True)
-            st.dataframe(df.describe().round(2), use_container_width=True)
+            st.dataframe(profile.describe().round(2), use_container_width=True)
             st.markdown("</div>", unsafe_allow_html=True)
         
         # Görselleştirme bölümü
@@ -776,8 +928,9 @@ if uploaded_file is not None:
         st.markdown("<div class='card'>", unsafe_allow_html=True)
         st.markdown("<h2 class='subheader'>📈 Veri Görselleştirme</h2>", unsafe_allow_html=True)
         
-        numeric_columns = df.select_dtypes(include=['float64', 'int64']).columns.tolist()
-        categorical_columns = df.select_dtypes(include=['object', 'category']).columns.tolist()
+        figure_cache = get_default_figure_cache()
+        numeric_columns = profile.numeric_columns
+        categorical_columns = profile.categorical_columns
         
         tabs = st.tabs(["📊 Dağılım", "🔄 Korelasyon", "📋 Kategorik Analiz"])
         
@@ -791,34 +944,27 @@ if uploaded_file is not None:
                     plot_type = st.radio("Grafik türü:", ["Histogram", "Box Plot", "Violin Plot"])
                 
                 with col1:
-                    fig, ax = plt.subplots(figsize=(10, 6))
-                    
-                    if plot_type == "Histogram":
-                        sns.histplot(df[selected_column], kde=True, ax=ax, color=color)
-                        ax.set_title(f"{selected_column} Dağılımı", fontsize=16)
-                        ax.set_ylabel("Frekans", fontsize=12)
-                    elif plot_type == "Box Plot":
-                        sns.boxplot(x=df[selected_column], ax=ax, color=color)
-                        ax.set_title(f"{selected_column} Box Plot", fontsize=16)
-                    else:  
-                        sns.violinplot(x=df[selected_column], ax=ax, color=color)
-                        ax.set_title(f"{selected_column} Violin Plot", fontsize=16)
-                    
-                    ax.set_xlabel(selected_column, fontsize=12)
-                    plt.tight_layout()
-                    st.pyplot(fig)
+                    image = figure_cache.render(
+                        (dataset.key, "distribution", selected_column, plot_type, color),
+                        lambda: get_plots().distribution_figure(
+                            df[selected_column], selected_column, plot_type, color,
+                            column_profile=profile.column(selected_column), dataset_key=dataset.key
+                        )
+                    )
+                    st.image(image, use_container_width=True)
                     
                     # İstatistik özeti
                     st.markdown(f"<h3>{selected_column} İstatistikleri</h3>", unsafe_allow_html=True)
+                    column_profile = profile.column(selected_column)
                     col_stats = pd.DataFrame({
                         "Metrik": ["Ortalama", "Medyan", "Standart Sapma", "Min", "Max", "Count"],
                         "Değer": [
-                            round(df[selected_column].mean(), 2),
-                            round(df[selected_column].median(), 2),
-                            round(df[selected_column].std(), 2),
-                            round(df[selected_column].min(), 2),
-                            round(df[selected_column].max(), 2),
-                            df[selected_column].count()
+                            format_stat(column_profile.mean),
+                            format_stat(column_profile.median),
+                            format_stat(column_profile.std),
+                            format_stat(column_profile.min),
+                            format_stat(column_profile.max),
+                            str(column_profile.count)
                         ]
                     })
                     st.dataframe(col_stats, use_container_width=True, hide_index=True)
@@ -830,12 +976,27 @@ if uploaded_file is not None:
                 col1, col2 = st.columns([3, 1])
                 
                 with col2:
-                    corr_columns = st.multiselect(
-                        "Sütunları seçin (maks. 10):",
-                        options=numeric_columns,
-                        default=numeric_columns[:min(5, len(numeric_columns))]
+                    corr_mode = st.radio(
+                        "Analiz modu:",
+                        ["Seçili sütunlar", "Tüm sütunlarda keşif"],
+                        key="corr_mode"
                     )
                     
+                    if corr_mode == "Seçili sütunlar":
+                        corr_columns = st.multiselect(
+                            "Sütunları seçin (maks. 10):",
+                            options=numeric_columns,
+                            default=numeric_columns[:min(5, len(numeric_columns))]
+                        )
+                    else:
+                        corr_threshold = st.slider(
+                            "Eşik (|r|):",
+                            min_value=0.3,
+                            max_value=0.99,
+                            value=0.8,
+                            step=0.01
+                        )
+                    
                     corr_method = st.selectbox(
                         "Korelasyon metodu:",
                         options=["pearson", "spearman", "kendall"],
@@ -847,54 +1008,64 @@ if uploaded_file is not None:
                         options=["coolwarm", "viridis", "plasma", "inferno", "magma", "cividis"],
                         index=0
                     )
+                    
+                    cluster_columns = st.checkbox(
+                        "Sütunları kümele",
+                        value=corr_mode != "Seçili sütunlar",
+                        help="Isı haritasında birbiriyle güçlü ilişkili sütunları yan yana sıralar."
+                    )
                 
                 with col1:
-                    if corr_columns and len(corr_columns) > 1:
-                        if len(corr_columns) > 10:
-                            st.warning("En iyi görselleştirme için maksimum 10 sütun seçin.")
-                            corr_columns = corr_columns[:10]
+                    if corr_mode == "Seçili sütunlar":
+                        if corr_columns and len(corr_columns) > 1:
+                            if len(corr_columns) > 10:
+                                st.warning("En iyi görselleştirme için maksimum 10 sütun seçin.")
+                                corr_columns = corr_columns[:10]
                             
-                        corr_matrix = df[corr_columns].corr(method=corr_method)
+                            corr_matrix = correlation_matrix(df, corr_columns, corr_method, dataset.key)
+                            high_corr = strong_pairs(corr_matrix, 0.5)
+                            high_corr_title = "Dikkat Çeken Korelasyonlar (|r| ≥ 0.5)"
+                        else:
+                            corr_matrix = None
+                            st.info("Korelasyon analizi için en az 2 sütun seçilmelidir.")
+                    else:
+                        with st.spinner(f"{len(numeric_columns)} sütunun tüm çiftleri taranıyor..."):
+                            high_corr = high_correlation_pairs(
+                                df, numeric_columns, corr_method, corr_threshold, dataset.key
+                            )
+                        high_corr_title = f"Eşiği Aşan Korelasyonlar (|r| ≥ {corr_threshold:.2f}): {len(high_corr):,} çift"
                         
-                        fig, ax = plt.subplots(figsize=(10, 8))
-                        mask = np.triu(np.ones_like(corr_matrix, dtype=bool))
-                        cmap = sns.color_palette(cmap_option, as_cmap=True)
+                        # Isı haritası için çiftlerde en çok öne çıkan sütunlar
+                        corr_columns = list(dict.fromkeys(
+                            high_corr[["column_1", "column_2"]].to_numpy().ravel().tolist()
+                        ))[:20]
+                        if len(corr_columns) > 1:
+                            corr_matrix = correlation_matrix(df, corr_columns, corr_method, dataset.key)
+                        else:
+                            corr_matrix = None
+                            st.info("Bu eşiği aşan sütun çifti bulunamadı.")
+                    
+                    if corr_matrix is not None:
+                        if cluster_columns:
+                            order = cluster_order(corr_matrix)
+                            corr_matrix = corr_matrix.loc[order, order]
                         
-                        sns.heatmap(
-                            corr_matrix, 
-                            mask=mask, 
-                            cmap=cmap, 
-                            annot=True, 
-                            center=0, 
-                            square=True, 
-                            linewidths=.5, 
-                            fmt=".2f"
+                        image = figure_cache.render(
+                            (dataset.key, "correlation", tuple(corr_matrix.columns), corr_method, cmap_option),
+                            lambda: get_plots().correlation_figure(corr_matrix, corr_method, cmap_option)
                         )
-                        
-                        plt.title(f"Korelasyon Matrisi ({corr_method.capitalize()})", fontsize=16)
-                        plt.tight_layout()
-                        st.pyplot(fig)
-                        
-                        # Yüksek korelasyonu olan sütunlar
-                        high_corr = corr_matrix.unstack().sort_values(ascending=False)
-                        high_corr = high_corr[(high_corr < 1.0) & (abs(high_corr) >= 0.5)]
+                        st.image(image, use_container_width=True)
                         
                         if not high_corr.empty:
-                            st.markdown("<h3>Dikkat Çeken Korelasyonlar (|r| ≥ 0.5)</h3>", unsafe_allow_html=True)
-                            
-                            high_corr_data = []
-                            for (col1, col2), value in high_corr.items():
-                                high_corr_data.append({
-                                    "Sütun 1": col1,
-                                    "Sütun 2": col2,
-                                    "Korelasyon": round(value, 3),
-                                    "İlişki": "Pozitif" if value > 0 else "Negatif"
-                                })
+                            st.markdown(f"<h3>{high_corr_title}</h3>", unsafe_allow_html=True)
                             
-                            high_corr_df = pd.DataFrame(high_corr_data)
+                            high_corr_df = pd.DataFrame({
+                                "Sütun 1": high_corr["column_1"],
+                                "Sütun 2": high_corr["column_2"],
+                                "Korelasyon": high_corr["correlation"].round(3),
+                                "İlişki": high_corr["correlation"].gt(0).map({True: "Pozitif", False: "Negatif"})
+                            }).head(1000)
                             st.dataframe(high_corr_df, use_container_width=True, hide_index=True)
-                    else:
-                        st.info("Korelasyon analizi için en az 2 sütun seçilmelidir.")
             else:
                 st.warning("Korelasyon analizi için yeterli sayısal sütun bulunamadı.")
         
@@ -909,12 +1080,22 @@ if uploaded_file is not None:
                         key="cat_column"
                     )
                     
-                    count_limit = st.slider(
-                        "Gösterilecek kategori sayısı:", 
-                        min_value=3, 
-                        max_value=min(20, df[selected_cat_column].nunique()),
-                        value=min(10, df[selected_cat_column].nunique())
-                    )
+                    column_profile = profile.column(selected_cat_column)
+                    if column_profile.sketch is None:
+                        # Profiller eskiyse taslak bir kez oluşturulur ve profilde saklanır
+                        column_profile.sketch = build_sketch(df[selected_cat_column])
+                    sketch = column_profile.sketch
+                    max_categories = min(20, sketch.distinct)
+                    
+                    if max_categories > 3:
+                        count_limit = st.slider(
+                            "Gösterilecek kategori sayısı:", 
+                            min_value=3, 
+                            max_value=max_categories,
+                            value=min(10, max_categories)
+                        )
+                    else:
+                        count_limit = max_categories
                     
                     plot_type = st.radio(
                         "Grafik türü:", 
@@ -923,35 +1104,21 @@ if uploaded_file is not None:
                     )
                 
                 with col1:
-                    value_counts = df[selected_cat_column].value_counts().nlargest(count_limit)
+                    value_counts = sketch.top(count_limit)
                     
-                    if plot_type == "Bar":
-                        fig, ax = plt.subplots(figsize=(10, 6))
-                        sns.barplot(x=value_counts.values, y=value_counts.index, palette="viridis", ax=ax)
-                        ax.set_title(f"{selected_cat_column} Değer Dağılımı (Top {count_limit})", fontsize=16)
-                        ax.set_xlabel("Frekans", fontsize=12)
-                        ax.set_ylabel(selected_cat_column, fontsize=12)
-                    else:  # Pie
-                        colors = plt.cm.viridis(np.linspace(0, 1, len(value_counts)))
-                        fig, ax = plt.subplots(figsize=(10, 8))
-                        wedges, texts, autotexts = ax.pie(
-                            value_counts.values, 
-                            labels=value_counts.index, 
-                            autopct='%1.1f%%',
-                            startangle=90,
-                            colors=colors,
-                            wedgeprops={'edgecolor': 'white', 'linewidth': 1}
+                    if value_counts.empty:
+                        st.info("Bu sütunda boş olmayan değer bulunmuyor.")
+                    else:
+                        image = figure_cache.render(
+                            (dataset.key, "categorical", selected_cat_column, plot_type, count_limit),
+                            lambda: get_plots().categorical_figure(value_counts, selected_cat_column, plot_type, count_limit)
+                        )
+                        st.image(image, use_container_width=True)
+                    if not sketch.exact:
+                        st.caption(
+                            f"Yaklaşık değerler: ~{sketch.distinct:,} farklı değer (HyperLogLog); frekanslar en fazla "
+                            f"{sketch.heavy.floor:,} fazla tahmin edilmiş olabilir (Space-Saving)."
                         )
-                        # Yazıları özelleştirme
-                        for autotext in autotexts:
-                            autotext.set_color('white')
-                            autotext.set_fontsize(10)
-                            autotext.set_fontweight('bold')
-                        ax.set_title(f"{selected_cat_column} Dağılımı (Top {count_limit})", fontsize=16)
-                        ax.axis('equal')
-                    
-                    plt.tight_layout()
-                    st.pyplot(fig)
                     
                     # Kategori istatistikleri
                     st.markdown(f"<h3>{selected_cat_column} İstatistikleri</h3>", unsafe_allow_html=True)
@@ -969,42 +1136,82 @@ if uploaded_file is not None:
         
         st.markdown("<br>", unsafe_allow_html=True)
         st.markdown("<div class='card'>", unsafe_allow_html=True)
-        st.markdown("<h2 class='subheader'>📥 Veri İndirme</h2>", unsafe_allow_html=True)
+        st.markdown("<h2 class='subheader'>🤖 Yapay Zeka Asistanı</h2>", unsafe_allow_html=True)
         
-        # İşlenmiş veriyi indirme
-        col1, col2, col3 = st.columns(3)
+        if not st.session_state.openai_api_key:
+            st.info("Yapay zeka destekli özet ve soru-cevap için Ayarlar bölümünden OpenAI API anahtarınızı girin.")
+        else:
+            if "ai_history" not in st.session_state:
+                st.session_state.ai_history = []
+            
+            for title, content in st.session_state.ai_history:
+                with st.expander(title):
+                    st.markdown(content)
+            
+            question = st.text_input("Veri setiniz hakkında bir soru sorun:", key="ai_question")
+            col1, col2 = st.columns(2)
+            ask_clicked = col1.button("Sor", use_container_width=True, disabled=not question)
+            summary_clicked = col2.button("Veri setini özetle", use_container_width=True)
+            
+            if ask_clicked or summary_clicked:
+                try:
+                    llm = get_llm(st.session_state.openai_api_key)
+                    from data_utils import stream_question, stream_summary
+                    if ask_clicked:
+                        final = render_stream(stream_question(df, llm, question, dataset.key, profile=profile))
+                        if final is not None:
+                            st.session_state.ai_history.append((f"❓ {question}", final.content))
+                    else:
+                        final = render_stream(stream_summary(df, llm, profile))
+                        if final is not None:
+                            summary = final.data
+                            content = "\n\n".join([
+                                summary["column_descriptions"],
+                                summary["missing_values"],
+                                summary["duplicate_values"],
+                                summary["anomaly_values"],
+                            ])
+                            st.session_state.ai_history.append((f"📝 {file_name} özeti", content))
+                except ImportError as e:
+                    st.error(str(e))
+            
+            with st.expander("📊 LLM tanılama"):
+                render_llm_diagnostics()
         
-        with col1:
-            # CSV olarak indirme
-            csv = df.to_csv(index=False)
-            b64_csv = base64.b64encode(csv.encode()).decode()
-            href_csv = f'<a href="data:file/csv;base64,{b64_csv}" download="{os.path.splitext(file_name)[0]}_processed.csv" class="download-button">CSV İndir</a>'
-            st.markdown(f"<div style='text-align: center; margin: 1rem 0;'>{href_csv}</div>", unsafe_allow_html=True)
+        st.markdown("</div>", unsafe_allow_html=True)
         
-        with col2:
-            # Excel olarak indirme
+        st.markdown("<br>", unsafe_allow_html=True)
+        st.markdown("<div class='card'>", unsafe_allow_html=True)
+        st.markdown("<h2 class='subheader'>📥 Veri İndirme</h2>", unsafe_allow_html=True)
+        
+        # İşlenmiş veriyi indirme: dosya yalnızca istendiğinde oluşturulur ve önbelleğe alınır
+        export_cache = get_default_export_cache()
+        export_format = st.selectbox(
+            "Dosya formatı:",
+            list(EXPORT_FORMATS),
+            format_func=lambda key: EXPORT_FORMATS[key]["label"]
+        )
+        export_key = (dataset.key, export_format)
+        export_data = export_cache.get(export_key)
+
+        if export_data is None and st.button("Dosyayı hazırla", use_container_width=True):
             try:
-                # Excel dosyası oluştur
-                excel_buffer = pd.ExcelWriter(f"{os.path.splitext(file_name)[0]}_processed.xlsx", engine='xlsxwriter')
-                df.to_excel(excel_buffer, index=False, sheet_name='Data')
-                excel_buffer.save()
-                
-                with open(f"{os.path.splitext(file_name)[0]}_processed.xlsx", "rb") as f:
-                    excel_data = f.read()
-                
-                b64_excel = base64.b64encode(excel_data).decode()
-                href_excel = f'<a href="data:application/vnd.openxmlformats-officedocument.spreadsheetml.sheet;base64,{b64_excel}" download="{os.path.splitext(file_name)[0]}_processed.xlsx" class="download-button">Excel İndir</a>'
-                st.markdown(f"<div style='text-align: center; margin: 1rem 0;'>{href_excel}</div>", unsafe_allow_html=True)
-                
-                os.remove(f"{os.path.splitext(file_name)[0]}_processed.xlsx")
-            except:
-                st.warning("Excel indirme özelliği için xlsxwriter kütüphanesi gereklidir.")
-        
-        with col3:
-            json_str = df.to_json(orient='records')
-            b64_json = base64.b64encode(json_str.encode()).decode()
-            href_json = f'<a href="data:file/json;base64,{b64_json}" download="{os.path.splitext(file_name)[0]}_processed.json" class="download-button">JSON İndir</a>'
-            st.markdown(f"<div style='text-align: center; margin: 1rem 0;'>{href_json}</div>", unsafe_allow_html=True)
+                with st.spinner("Dosya hazırlanıyor..."):
+                    export_data = export_dataset(df, dataset.key, export_format, cache=export_cache)
+            except ImportError:
+                requirement = "xlsxwriter" if export_format == "xlsx" else "pyarrow"
+                st.warning(f"{EXPORT_FORMATS[export_format]['label']} indirme özelliği için {requirement} kütüphanesi gereklidir.")
+            except ValueError as e:
+                st.warning(str(e))
+
+        if export_data is not None:
+            st.download_button(
+                f"{EXPORT_FORMATS[export_format]['label']} İndir ({len(export_data) / 1024 ** 2:.2f} MB)",
+                data=export_data,
+                file_name=export_file_name(file_name, export_format),
+                mime=EXPORT_FORMATS[export_format]["mime"],
+                use_container_width=True
+            )
         
         st.markdown("</div>", unsafe_allow_html=True)
         
@@ -0,0 +1,344 @@
+"""
+batch_cli.py: This module contains a headless command-line entry point that runs
+the InfAI pipeline (loading, profiling, summary facts, correlations and optionally
+the LLM summary) over a directory of CSV files and writes a JSON and an HTML report
+per dataset. Files are processed in parallel in a process pool.
+
+Datasets are parsed into a temporary columnar store that is removed afterwards;
+--persist saves them into the app's store instead.
+
+Usage:
+    python batch_cli.py drops/ --output reports --workers 4
+    python batch_cli.py drops/*.csv --no-llm --format json
+    python batch_cli.py drops/ --persist --store-dir data
+"""
+
+import argparse
+import glob
+import hashlib
+import html
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from correlation import METHODS, correlation_matrix, high_correlation_pairs, strong_pairs
+from dataset_cache import DatasetCache, load_uploaded_csv
+from summary_facts import compute_summary_facts, format_anomalies, format_duplicates, format_missing
+
+DEFAULT_MODEL = os.environ.get("INFAI_MODEL", "gpt-4o-mini")  # same default as data_utils
+REPORT_FORMATS = ("json", "html")
+# Wider datasets get only their strong pairs, found blockwise, instead of the full matrix.
+MATRIX_COLUMN_LIMIT = 50
+
+_llm = None
+
+
+def _init_worker(model):
+    global _llm
+    if model:
+        # data_utils pulls in langchain, so --no-llm runs never import it.
+        from data_utils import build_llm
+
+        _llm = build_llm(model=model, streaming=False)
+
+
+def collect_inputs(paths, pattern="*.csv"):
+    """
+    Expands directories and glob patterns into a sorted list of CSV files.
+
+    Args:
+        paths (list): Files, directories or glob patterns.
+        pattern (str): File pattern matched inside directories.
+
+    Returns:
+        list: Unique file paths.
+    """
+    files = set()
+    for path in paths:
+        if os.path.isdir(path):
+            files.update(glob.glob(os.path.join(path, pattern)))
+        elif os.path.isfile(path):
+            files.add(path)
+        else:
+            files.update(match for match in glob.glob(path) if os.path.isfile(match))
+    return sorted(files)
+
+
+def _jsonable(value):
+    if isinstance(value, pd.DataFrame):
+        return json.loads(value.to_json(orient="split", date_format="iso", default_handler=str))
+    if isinstance(value, pd.Series):
+        return {str(key): _jsonable(item) for key, item in value.items()}
+    if isinstance(value, dict):
+        return {str(key): _jsonable(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(item) for item in value]
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, float) and not np.isfinite(value):
+        return None
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return str(value)
+
+
+def analyze_file(path, store_dir="data", method="pearson", compact=True, target=None, use_llm=False):
+    """
+    Runs the pipeline on one CSV file.
+
+    Args:
+        path (str): Path of the CSV file.
+        store_dir (str): Directory of the columnar dataset store shared with the app.
+        method (str): Correlation method, one of correlation.METHODS.
+        compact (bool): Whether to compact the dataset after loading.
+        target (str): Column whose trend is analyzed by the LLM, if present.
+        use_llm (bool): Whether to add the LLM summary and trend analysis.
+
+    Returns:
+        dict: The report, with pandas objects kept as is.
+    """
+    started = time.perf_counter()
+    with open(path, "rb") as csv_file:
+        entry = load_uploaded_csv(csv_file, store_dir, cache=DatasetCache(), compact=compact)
+    df, profile = entry.df, entry.profile
+
+    facts = compute_summary_facts(df, profile)
+    numeric = profile.numeric_columns
+    matrix = pairs = None
+    if 1 < len(numeric) <= MATRIX_COLUMN_LIMIT:
+        matrix = correlation_matrix(df, numeric, method, dataset_key=entry.key)
+        pairs = strong_pairs(matrix)
+    elif len(numeric) > MATRIX_COLUMN_LIMIT:
+        pairs = high_correlation_pairs(df, numeric, method, dataset_key=entry.key)
+    report = {
+        "file": path,
+        "dataset_key": entry.key,
+        "generated": datetime.now().isoformat(timespec="seconds"),
+        "shape": [profile.n_rows, profile.n_cols],
+        "memory": profile.memory,
+        "compaction": None if entry.compaction is None else {
+            "bytes_before": entry.compaction.bytes_before,
+            "bytes_after": entry.compaction.bytes_after,
+            "converted": entry.compaction.converted,
+        },
+        "columns": profile.to_frame(),
+        "describe": profile.describe(),
+        "facts": facts,
+        "summary": {
+            "missing_values": format_missing(facts),
+            "duplicate_values": format_duplicates(facts),
+            "anomaly_values": format_anomalies(facts),
+        },
+        "correlation_method": method,
+        "correlation": matrix,
+        "correlation_pairs": pairs,
+    }
+
+    if use_llm:
+        from data_utils import analyze_trend, summarize_csv_with_model
+
+        llm_summary = summarize_csv_with_model(df, _llm, dataset_key=entry.key, profile=profile)
+        report["summary"] = {
+            name: llm_summary[name]
+            for name in ("column_descriptions", "missing_values", "duplicate_values", "anomaly_values")
+        }
+        if target is not None and target in profile.numeric_columns:
+            report["trend"] = {
+                "variable": target,
+                "analysis": analyze_trend(df, _llm, target, dataset_key=entry.key, method=method, profile=profile),
+            }
+
+    report["elapsed_seconds"] = round(time.perf_counter() - started, 3)
+    return report
+
+
+def render_html(report):
+    """
+    Renders a report as a standalone HTML page.
+
+    Args:
+        report (dict): A report returned by analyze_file.
+
+    Returns:
+        str: The HTML document.
+    """
+    def table(frame, **kwargs):
+        return frame.to_html(classes="table", border=0, na_rep="", **kwargs)
+
+    def text(value):
+        return f"<pre>{html.escape(str(value))}</pre>"
+
+    name = os.path.basename(report["file"])
+    sections = [
+        f"<h1>InfAI Raporu: {html.escape(name)}</h1>",
+        f"<p>{report['shape'][0]:,} satır, {report['shape'][1]} sütun, "
+        f"{report['memory'] / 1024 ** 2:.2f} MB bellek &middot; {report['generated']}</p>",
+        "<h2>Sütunlar</h2>", table(report["columns"], index=False, float_format="{:.4g}".format),
+        "<h2>Temel İstatistikler</h2>", table(report["describe"], float_format="{:.4g}".format),
+    ]
+    if "column_descriptions" in report["summary"]:
+        sections += ["<h2>Sütun Açıklamaları</h2>", text(report["summary"]["column_descriptions"])]
+    sections += [
+        "<h2>Eksik Değerler</h2>", text(report["summary"]["missing_values"]),
+        "<h2>Yinelenen Değerler</h2>", text(report["summary"]["duplicate_values"]),
+        "<h2>Anormal Değerler</h2>", text(report["summary"]["anomaly_values"]),
+    ]
+    if report["correlation"] is not None:
+        sections += [
+            f"<h2>Korelasyon ({html.escape(report['correlation_method'])})</h2>",
+            table(report["correlation"], float_format="{:.3f}".format),
+        ]
+    if report["correlation_pairs"] is not None and not report["correlation_pairs"].empty:
+        sections += [
+            f"<h2>Güçlü Korelasyonlar ({html.escape(report['correlation_method'])})</h2>",
+            table(report["correlation_pairs"], index=False, float_format="{:.3f}".format),
+        ]
+    if "trend" in report:
+        sections += [
+            f"<h2>Trend Analizi: {html.escape(report['trend']['variable'])}</h2>",
+            text(report["trend"]["analysis"]),
+        ]
+    style = (
+        "body{font-family:sans-serif;margin:2rem;color:#222}"
+        ".table{border-collapse:collapse;font-size:0.85rem;margin-bottom:1rem}"
+        ".table td,.table th{padding:4px 8px;border-bottom:1px solid #ddd;text-align:right}"
+        "pre{white-space:pre-wrap;background:#f6f6f6;padding:0.75rem;border-radius:4px}"
+    )
+    return (
+        f"<!DOCTYPE html><html><head><meta charset='utf-8'><title>{html.escape(name)}</title>"
+        f"<style>{style}</style></head><body>{''.join(sections)}</body></html>"
+    )
+
+
+def report_stem(path):
+    """
+    Returns the report file name of an input file: its name followed by a short
+    hash of its directory, so a/sales.csv and b/sales.csv get separate reports.
+
+    Args:
+        path (str): Path of the CSV file.
+
+    Returns:
+        str: The file name without extension.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    digest = hashlib.sha1(directory.encode("utf-8")).hexdigest()[:8]
+    return f"{os.path.splitext(os.path.basename(path))[0]}-{digest}"
+
+
+def write_reports(report, output_dir, formats=REPORT_FORMATS):
+    """
+    Writes the report of one dataset as <stem>.json and/or <stem>.html, where
+    <stem> is given by report_stem.
+
+    Args:
+        report (dict): A report returned by analyze_file.
+        output_dir (str): The output directory.
+        formats (tuple): Report formats to write.
+
+    Returns:
+        list: Paths of the written files.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    stem = os.path.join(output_dir, report_stem(report["file"]))
+    written = []
+    if "json" in formats:
+        with open(f"{stem}.json", "w", encoding="utf-8") as json_file:
+            json.dump(_jsonable(report), json_file, ensure_ascii=False, indent=2)
+        written.append(f"{stem}.json")
+    if "html" in formats:
+        with open(f"{stem}.html", "w", encoding="utf-8") as html_file:
+            html_file.write(render_html(report))
+        written.append(f"{stem}.html")
+    return written
+
+
+def process_file(path, output_dir, formats=REPORT_FORMATS, **options):
+    """
+    Analyzes one file and writes its reports. Runs inside a pool worker.
+
+    Returns:
+        tuple: The input path, the written report paths and the elapsed seconds.
+    """
+    report = analyze_file(path, **options)
+    return path, write_reports(report, output_dir, formats), report["elapsed_seconds"]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="InfAI analiz hattını bir dizindeki CSV dosyaları üzerinde arayüz olmadan çalıştırır."
+    )
+    parser.add_argument("inputs", nargs="+", help="CSV dosyaları, dizinler veya glob desenleri")
+    parser.add_argument("-o", "--output", default="reports", help="Raporların yazılacağı dizin (varsayılan: reports)")
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count() or 1,
+                        help="Paralel işçi süreç sayısı (varsayılan: CPU sayısı)")
+    parser.add_argument("--pattern", default="*.csv", help="Dizinlerde aranacak dosya deseni (varsayılan: *.csv)")
+    parser.add_argument("--format", choices=("json", "html", "both"), default="both", help="Rapor formatı")
+    parser.add_argument("--method", choices=METHODS, default="pearson", help="Korelasyon metodu")
+    parser.add_argument("--target", help="LLM trend analizi yapılacak sayısal sütun")
+    parser.add_argument("--persist", action="store_true",
+                        help="Veri setlerini uygulamanın sütunlu veri deposuna kaydeder")
+    parser.add_argument("--store-dir", default="data",
+                        help="--persist ile kullanılan sütunlu veri deposu dizini (varsayılan: data)")
+    parser.add_argument("--no-compact", action="store_true", help="Bellek optimizasyonunu kapatır")
+    parser.add_argument("--no-llm", action="store_true", help="Yalnızca deterministik bölümleri üretir")
+    parser.add_argument("--model", default=DEFAULT_MODEL, help=f"OpenAI modeli (varsayılan: {DEFAULT_MODEL})")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    files = collect_inputs(args.inputs, args.pattern)
+    if not files:
+        print("İşlenecek CSV dosyası bulunamadı.", file=sys.stderr)
+        return 2
+
+    use_llm = not args.no_llm
+    if use_llm and not os.environ.get("OPENAI_API_KEY") and not os.environ.get("INFAI_FAKE_LLM"):
+        print("OPENAI_API_KEY tanımlı değil; LLM bölümleri için anahtarı ayarlayın ya da --no-llm kullanın.",
+              file=sys.stderr)
+        return 2
+
+    formats = REPORT_FORMATS if args.format == "both" else (args.format,)
+    # Without --persist, a batch run leaves no datasets behind in the app's store.
+    store_dir = args.store_dir if args.persist else tempfile.mkdtemp(prefix="infai-batch-")
+    options = {
+        "store_dir": store_dir,
+        "method": args.method,
+        "compact": not args.no_compact,
+        "target": args.target,
+        "use_llm": use_llm,
+    }
+    workers = max(1, min(args.workers, len(files)))
+    failures = 0
+    started = time.perf_counter()
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(args.model if use_llm else None,)) as pool:
+            futures = {pool.submit(process_file, path, args.output, formats, **options): path for path in files}
+            for done, future in enumerate(as_completed(futures), start=1):
+                path = futures[future]
+                try:
+                    _, written, elapsed = future.result()
+                    print(f"[{done}/{len(files)}] {path} -> {', '.join(written)} ({elapsed:.1f}s)")
+                except Exception as error:
+                    failures += 1
+                    print(f"[{done}/{len(files)}] {path} HATA: {error}", file=sys.stderr)
+    finally:
+        if not args.persist:
+            shutil.rmtree(store_dir, ignore_errors=True)
+
+    print(f"{len(files) - failures}/{len(files)} dosya {time.perf_counter() - started:.1f} saniyede işlendi.")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,368 @@
+"""
+bench_suite.py: This module contains the performance benchmark suite of InfAI. It
+generates synthetic sales-like CSV files (Store, Dept, Date, Weekly_Sales with
+nulls, a high-cardinality Customer column and more) and times the same calls
+app.py makes: ingestion, summary statistics, correlation, value counts, figure
+rendering and CSV/JSON/Excel export. Every step reports its wall time and the
+peak memory it added to the process. Results can be saved as a baseline and later runs compared
+against it.
+
+Usage:
+    python benchmarks/bench_suite.py --sizes 10k 1m --save-baseline baseline.json
+    python benchmarks/bench_suite.py --sizes 10k 1m --compare baseline.json
+    python benchmarks/bench_suite.py --sizes 10m --steps ingest correlation
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+os.environ.setdefault("MPLBACKEND", "Agg")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from correlation import correlation_matrix  # noqa: E402
+from dataset_cache import DatasetCache, load_uploaded_csv  # noqa: E402
+from exporter import EXCEL_MAX_ROWS, ExportCache, export_dataset  # noqa: E402
+from figure_cache import FigureCache  # noqa: E402
+from profiler import profile_dataframe  # noqa: E402
+from sketches import build_sketch  # noqa: E402
+from summary_facts import compute_summary_facts  # noqa: E402
+
+SIZES = {"10k": 10_000, "1m": 1_000_000, "10m": 10_000_000}
+DEFAULT_SIZES = ("10k", "1m")
+DEFAULT_DATA_DIR = os.path.join(tempfile.gettempdir(), "infai-bench")
+DEFAULT_TOLERANCE = 0.25
+MIN_REGRESSION_SECONDS = 0.05
+MIN_REGRESSION_MB = 5.0
+TOP_CATEGORIES = 20
+
+
+def generate_dataset(rows, seed=0):
+    """
+    Builds a synthetic weekly sales dataset.
+
+    Args:
+        rows (int): Number of rows.
+        seed (int): Random seed, so that every run benchmarks the same data.
+
+    Returns:
+        pd.DataFrame: Store, Dept, Date, Weekly_Sales (2% null), IsHoliday, Type,
+        Customer (about rows / 2 distinct strings), Temperature (1% null) and
+        MarkDown (60% null).
+    """
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range("2010-02-05", periods=143, freq="W-FRI").strftime("%Y-%m-%d").to_numpy()
+    store = rng.integers(1, 46, rows)
+    sales = np.round(rng.gamma(2.0, 8000.0, rows) * (1 + store / 45), 2)
+    temperature = np.round(rng.normal(60, 18, rows), 1)
+    markdown = np.round(rng.exponential(5000.0, rows), 2)
+    sales[rng.random(rows) < 0.02] = np.nan
+    temperature[rng.random(rows) < 0.01] = np.nan
+    markdown[rng.random(rows) < 0.6] = np.nan
+    customers = pd.Series(rng.integers(0, max(rows // 2, 1), rows)).map("C{:08d}".format)
+    return pd.DataFrame({
+        "Store": store,
+        "Dept": rng.integers(1, 99, rows),
+        "Date": dates[rng.integers(0, len(dates), rows)],
+        "Weekly_Sales": sales,
+        "IsHoliday": rng.random(rows) < 0.07,
+        "Type": rng.choice(np.array(["A", "B", "C"]), rows, p=[0.5, 0.4, 0.1]),
+        "Customer": customers,
+        "Temperature": temperature,
+        "MarkDown": markdown,
+    })
+
+
+def dataset_path(size, data_dir=DEFAULT_DATA_DIR):
+    """
+    Returns the CSV file of a dataset size, generating it on first use.
+
+    Args:
+        size (str): A key of SIZES.
+        data_dir (str): Directory of the generated files.
+
+    Returns:
+        str: Path of the CSV file.
+    """
+    os.makedirs(data_dir, exist_ok=True)
+    path = os.path.join(data_dir, f"sales_{size}.csv")
+    if not os.path.exists(path):
+        partial = path + ".partial"
+        generate_dataset(SIZES[size]).to_csv(partial, index=False)
+        os.replace(partial, path)
+    return path
+
+
+def _status_bytes(field):
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith(field + ":"):
+                return int(line.split()[1]) * 1024
+    raise OSError(f"{field} is not reported")
+
+
+def _reset_peak_rss():
+    """
+    Resets the kernel's resident-set high-water mark (Linux 4.0+).
+
+    Returns:
+        bool: Whether the peak RSS of the next step can be read from VmHWM.
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as clear_refs:
+            clear_refs.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def measure(step, measure_memory=True):
+    """
+    Runs a step once, measuring its wall time and the peak memory it added.
+
+    On Linux the peak is the kernel's resident-set high-water mark, which covers
+    native allocations (NumPy, Arrow, xlsxwriter) at no cost to the step. Other
+    platforms fall back to tracemalloc, which only sees allocations made through
+    Python's allocators and slows allocation-heavy steps down.
+
+    Args:
+        step (callable): The step.
+        measure_memory (bool): Whether to measure peak memory.
+
+    Returns:
+        tuple: The step's return value, the seconds it took and the peak bytes
+        above the memory in use when it started (None when not measured).
+    """
+    use_rss = measure_memory and _reset_peak_rss()
+    use_tracemalloc = measure_memory and not use_rss
+    if use_rss:
+        baseline = _status_bytes("VmRSS")
+    if use_tracemalloc:
+        tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        result = step()
+        seconds = time.perf_counter() - started
+        peak = None
+        if use_rss:
+            peak = _status_bytes("VmHWM") - baseline
+        elif use_tracemalloc:
+            peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        if use_tracemalloc:
+            tracemalloc.stop()
+    return result, seconds, peak
+
+
+def _ingest(path, store_dir):
+    def step():
+        # A fresh store and cache make every repeat parse, profile and store the file.
+        shutil.rmtree(store_dir, ignore_errors=True)
+        with open(path, "rb") as csv_file:
+            return load_uploaded_csv(csv_file, store_dir, cache=DatasetCache())
+    return step
+
+
+def _summary_stats(df):
+    def step():
+        profile = profile_dataframe(df)
+        profile.describe()
+        compute_summary_facts(df, profile)
+    return step
+
+
+def _correlation(df, profile):
+    # No dataset key, so the correlation cache never answers.
+    return lambda: correlation_matrix(df, profile.numeric_columns, "pearson")
+
+
+def _value_counts(df, profile):
+    def step():
+        for column in profile.categorical_columns:
+            build_sketch(df[column]).top(TOP_CATEGORIES)
+    return step
+
+
+def _figures(df, profile):
+    import plots
+
+    def step():
+        cache = FigureCache()
+        for plot_type in ("Histogram", "Box Plot", "Violin Plot"):
+            cache.render(
+                ("distribution", plot_type),
+                lambda: plots.distribution_figure(
+                    df["Weekly_Sales"], "Weekly_Sales", plot_type, "#4527A0",
+                    column_profile=profile.column("Weekly_Sales")
+                )
+            )
+        matrix = correlation_matrix(df, profile.numeric_columns, "pearson")
+        cache.render(("correlation",), lambda: plots.correlation_figure(matrix, "pearson", "coolwarm"))
+        counts = build_sketch(df["Type"]).top(TOP_CATEGORIES)
+        cache.render(("categorical",), lambda: plots.categorical_figure(counts, "Type", "Bar", TOP_CATEGORIES))
+    return step
+
+
+def _export(df, file_format):
+    return lambda: export_dataset(df, None, file_format, cache=ExportCache())
+
+
+STEPS = ("ingest", "summary_stats", "correlation", "value_counts", "figures",
+         "export_csv", "export_json", "export_xlsx")
+
+
+def run_size(size, steps=STEPS, repeat=1, measure_memory=True, data_dir=DEFAULT_DATA_DIR):
+    """
+    Benchmarks every step on one dataset size.
+
+    Args:
+        size (str): A key of SIZES.
+        steps (tuple): Names of the steps to run, a subset of STEPS.
+        repeat (int): Runs per step; the median time and the largest peak are kept.
+        measure_memory (bool): Whether to measure peak memory.
+        data_dir (str): Directory of the generated files.
+
+    Returns:
+        dict: Per step, the seconds and peak megabytes, or the reason it was skipped.
+    """
+    path = dataset_path(size, data_dir)
+    store_dir = tempfile.mkdtemp(prefix="infai-bench-store-")
+    try:
+        entry, _, _ = measure(_ingest(path, store_dir), measure_memory=False)
+        df, profile = entry.df, entry.profile
+        factories = {
+            "ingest": lambda: _ingest(path, store_dir),
+            "summary_stats": lambda: _summary_stats(df),
+            "correlation": lambda: _correlation(df, profile),
+            "value_counts": lambda: _value_counts(df, profile),
+            "figures": lambda: _figures(df, profile),
+            "export_csv": lambda: _export(df, "csv"),
+            "export_json": lambda: _export(df, "json"),
+            "export_xlsx": lambda: _export(df, "xlsx"),
+        }
+        results = {}
+        for name in steps:
+            if name == "export_xlsx" and len(df) > EXCEL_MAX_ROWS:
+                results[name] = {"skipped": f"Excel holds at most {EXCEL_MAX_ROWS:,} rows"}
+                continue
+            step = factories[name]()
+            runs = [measure(step, measure_memory)[1:] for _ in range(repeat)]
+            peaks = [peak for _, peak in runs if peak is not None]
+            results[name] = {
+                "seconds": statistics.median(seconds for seconds, _ in runs),
+                "peak_mb": max(peaks) / 1024 ** 2 if peaks else None,
+            }
+            print(f"  {size:>4} {name:<14} {_format(results[name])}", flush=True)
+        return results
+    finally:
+        shutil.rmtree(store_dir, ignore_errors=True)
+
+
+def _format(result):
+    if "skipped" in result:
+        return f"atlandı ({result['skipped']})"
+    text = f"{result['seconds']:8.3f} s"
+    if result.get("peak_mb") is not None:
+        text += f"  tepe {result['peak_mb']:9.1f} MB"
+    return text
+
+
+def environment():
+    return {
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def compare(current, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    Finds the steps that got slower or use more memory than in a baseline.
+
+    Args:
+        current (dict): The results of this run, keyed by size and step.
+        baseline (dict): The saved baseline results in the same layout.
+        tolerance (float): Allowed relative increase, e.g. 0.25 for 25%.
+
+    Returns:
+        list: (size, step, metric, baseline value, current value) tuples.
+    """
+    regressions = []
+    for size, steps in current.items():
+        for name, result in steps.items():
+            previous = baseline.get(size, {}).get(name)
+            if previous is None or "skipped" in result or "skipped" in previous:
+                continue
+            seconds, base_seconds = result["seconds"], previous["seconds"]
+            # Small steps are dominated by noise, so an increase must also be large in absolute terms.
+            if seconds > base_seconds * (1 + tolerance) and seconds - base_seconds > MIN_REGRESSION_SECONDS:
+                regressions.append((size, name, "seconds", base_seconds, seconds))
+            peak, base_peak = result.get("peak_mb"), previous.get("peak_mb")
+            if (peak is not None and base_peak is not None and peak > base_peak * (1 + tolerance)
+                    and peak - base_peak > MIN_REGRESSION_MB):
+                regressions.append((size, name, "peak_mb", base_peak, peak))
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="InfAI profil, grafik ve dışa aktarma yollarının performans ölçümü.")
+    parser.add_argument("--sizes", nargs="+", choices=SIZES, default=list(DEFAULT_SIZES),
+                        help="Veri seti boyutları (varsayılan: 10k 1m)")
+    parser.add_argument("--steps", nargs="+", choices=STEPS, default=list(STEPS), help="Çalıştırılacak adımlar")
+    parser.add_argument("--repeat", type=int, default=3, help="Adım başına tekrar sayısı (varsayılan: 3)")
+    parser.add_argument("--no-memory", action="store_true", help="Bellek ölçümünü kapatır (yalnızca süre)")
+    parser.add_argument("--data-dir", default=DEFAULT_DATA_DIR, help="Üretilen CSV dosyalarının dizini")
+    parser.add_argument("--save-baseline", metavar="PATH", help="Sonuçları temel ölçüm olarak kaydeder")
+    parser.add_argument("--compare", metavar="PATH", help="Sonuçları kayıtlı temel ölçümle karşılaştırır")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="İzin verilen göreli artış (varsayılan: 0.25)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    results = {}
+    for size in args.sizes:
+        print(f"{size} ({SIZES[size]:,} satır)", flush=True)
+        results[size] = run_size(size, tuple(args.steps), args.repeat, not args.no_memory, args.data_dir)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as baseline_file:
+            json.dump({
+                "created": datetime.now().isoformat(timespec="seconds"),
+                "environment": environment(),
+                "results": results,
+            }, baseline_file, indent=2)
+        print(f"Temel ölçüm kaydedildi: {args.save_baseline}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as baseline_file:
+            baseline = json.load(baseline_file)
+        if baseline.get("environment") != environment():
+            print("Uyarı: temel ölçüm farklı bir ortamda alınmış.", file=sys.stderr)
+        regressions = compare(results, baseline["results"], args.tolerance)
+        for size, name, metric, before, after in regressions:
+            print(f"GERİLEME {size} {name} {metric}: {before:.3f} -> {after:.3f} "
+                  f"(+{(after / before - 1) * 100:.0f}%)", file=sys.stderr)
+        if regressions:
+            return 1
+        print(f"Gerileme yok (tolerans %{args.tolerance * 100:.0f}).")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,208 @@
+"""
+load_test.py: This module contains the load driver of the agent paths. It runs N
+concurrent simulated analyst sessions against the offline model of fake_llm, each
+asking questions (ask_question and stream_question), analyzing a trend and
+summarizing the dataset, and reports the throughput, the p50/p95 latency, tokens
+and agent iterations per entry point and the peak memory the run added. Tool
+calls run in the sandbox pool as in the app, so its queueing is part of the
+measurement.
+
+Usage:
+    python benchmarks/load_test.py --sessions 16 --per-session 10
+    python benchmarks/load_test.py --sessions 32 --latency lognormal:1.5,0.4 --tokens uniform:50,300
+    python benchmarks/load_test.py --trajectories data/trajectories.jsonl --json load.json
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+os.environ.setdefault("MPLBACKEND", "Agg")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_suite import DEFAULT_DATA_DIR, SIZES, dataset_path, environment, measure  # noqa: E402
+from dataset_cache import DatasetCache, load_uploaded_csv  # noqa: E402
+from fake_llm import (  # noqa: E402
+    DEFAULT_SCRIPTS,
+    FAKE_LATENCY,
+    FAKE_TOKENS,
+    SCRIPTS,
+    Distribution,
+    FakeChatModel,
+    load_trajectories,
+)
+
+OPERATIONS = ("ask", "stream", "trend", "summary")
+# Questions about the columns of bench_suite.generate_dataset, covering every budget type.
+QUESTIONS = (
+    "Toplam kaç satır var?",
+    "Weekly_Sales ortalaması nedir?",
+    "Mağazalara göre toplam satışlar nedir?",
+    "Type sütununun dağılımı nedir?",
+    "Tatil haftalarında satışlar neden farklı?",
+    "Sıcaklık ile satış arasındaki ilişkiyi açıkla.",
+)
+TREND_VARIABLE = "Weekly_Sales"
+
+
+def run_operation(data_utils, operation, question, df, profile, dataset_key, llm, use_cache, summary_mode):
+    """
+    Runs one operation of a session the way app.py and batch_cli.py call it.
+
+    Raises:
+        RuntimeError: When a streamed operation ends with an error event.
+    """
+    if operation == "ask":
+        data_utils.ask_question(df, llm, question, dataset_key, use_cache=use_cache, profile=profile)
+    elif operation == "stream":
+        events = data_utils.stream_question(df, llm, question, dataset_key, use_cache=use_cache, profile=profile)
+        for event in events:
+            if event.kind == "error":
+                raise RuntimeError(event.content)
+    elif operation == "trend":
+        data_utils.analyze_trend(df, llm, TREND_VARIABLE, dataset_key, profile=profile)
+    else:
+        data_utils.summarize_csv_with_model(df, llm, dataset_key, mode=summary_mode, profile=profile)
+
+
+def run_session(index, per_session, operations, **context):
+    """
+    Runs the operations of one simulated session in turn. Sessions start at
+    different points of operations and QUESTIONS, so concurrent sessions mix.
+
+    Returns:
+        list: One dict per operation with its name, seconds and error.
+    """
+    results = []
+    for step in range(per_session):
+        operation = operations[(index + step) % len(operations)]
+        question = QUESTIONS[(index * 7 + step) % len(QUESTIONS)]
+        started = time.perf_counter()
+        error = None
+        try:
+            run_operation(operation=operation, question=question, **context)
+        except Exception as exception:
+            error = f"{type(exception).__name__}: {exception}"
+        results.append({"session": index, "operation": operation, "seconds": time.perf_counter() - started,
+                        "error": error})
+    return results
+
+
+def run_load(sessions, per_session, operations, **context):
+    with ThreadPoolExecutor(max_workers=sessions) as pool:
+        futures = [pool.submit(run_session, index, per_session, operations, **context) for index in range(sessions)]
+        return [result for future in futures for result in future.result()]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="InfAI ajan yollarını çevrimdışı sahte LLM ile eşzamanlı oturumlar altında yük testine tabi tutar."
+    )
+    parser.add_argument("--sessions", type=int, default=8, help="Eşzamanlı oturum sayısı (varsayılan: 8)")
+    parser.add_argument("--per-session", type=int, default=8, help="Oturum başına işlem sayısı (varsayılan: 8)")
+    parser.add_argument("--operations", nargs="+", choices=OPERATIONS, default=list(OPERATIONS),
+                        help="Oturumların sırayla çalıştırdığı işlemler")
+    parser.add_argument("--size", choices=SIZES, default="10k", help="Veri seti boyutu (varsayılan: 10k)")
+    parser.add_argument("--data-dir", default=DEFAULT_DATA_DIR, help="Üretilen CSV dosyalarının dizini")
+    parser.add_argument("--latency", default=FAKE_LATENCY,
+                        help=f"LLM çağrısı gecikme dağılımı, saniye (varsayılan: {FAKE_LATENCY})")
+    parser.add_argument("--tokens", default=FAKE_TOKENS,
+                        help=f"Yanıt token sayısı dağılımı (varsayılan: {FAKE_TOKENS})")
+    parser.add_argument("--scripts", nargs="+", choices=SCRIPTS, default=list(DEFAULT_SCRIPTS),
+                        help="Kullanılacak betikli araç çağrısı kalıpları")
+    parser.add_argument("--trajectories", help="Tekrar oynatılacak kayıtlı ajan izleri (JSONL)")
+    parser.add_argument("--summary-mode", choices=("agent", "hybrid"), default="agent", help="Özet modu")
+    parser.add_argument("--use-cache", action="store_true", help="Kalıcı yanıt önbelleğini kullanır")
+    parser.add_argument("--seed", type=int, default=0, help="Gecikme ve yanıt uzunluğu tohumu")
+    parser.add_argument("--json", metavar="PATH", help="Sonuçları JSON olarak kaydeder")
+    return parser.parse_args(argv)
+
+
+def summarize(results, records, seconds, peak):
+    """
+    Totals a run: operations, errors, throughput and peak memory.
+
+    Args:
+        results (list): The operation results of run_load.
+        records (list): The llm_metrics records written during the run.
+        seconds (float): Wall time of the run.
+        peak (int): Peak bytes the run added, or None when not measured.
+
+    Returns:
+        dict: The totals.
+    """
+    return {
+        "operations": len(results),
+        "errors": sum(1 for result in results if result["error"]),
+        "seconds": seconds,
+        "operations_per_second": len(results) / seconds,
+        "llm_calls_per_second": sum(record["llm_calls"] for record in records) / seconds,
+        "peak_mb": peak / 1024 ** 2 if peak is not None else None,
+    }
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    work_dir = tempfile.mkdtemp(prefix="infai-load-")
+    # llm_metrics reads these on import, so they are set before data_utils is loaded.
+    os.environ["INFAI_METRICS"] = "1"
+    os.environ["INFAI_METRICS_PATH"] = os.path.join(work_dir, "llm_metrics.jsonl")
+    import data_utils
+    from llm_metrics import get_default_recorder, summarize_metrics
+
+    llm = FakeChatModel(
+        trajectories=load_trajectories(args.trajectories) if args.trajectories else [],
+        scripts=tuple(args.scripts),
+        latency=Distribution.parse(args.latency),
+        completion_tokens=Distribution.parse(args.tokens),
+        seed=args.seed,
+    )
+    try:
+        with open(dataset_path(args.size, args.data_dir), "rb") as csv_file:
+            entry = load_uploaded_csv(csv_file, store_dir=os.path.join(work_dir, "store"), cache=DatasetCache())
+        print(f"{args.sessions} oturum x {args.per_session} işlem, {args.size} ({SIZES[args.size]:,} satır)",
+              flush=True)
+        results, seconds, peak = measure(lambda: run_load(
+            args.sessions, args.per_session, tuple(args.operations),
+            data_utils=data_utils, df=entry.df, profile=entry.profile, dataset_key=entry.key, llm=llm,
+            use_cache=args.use_cache, summary_mode=args.summary_mode,
+        ))
+        records = get_default_recorder().read(limit=sys.maxsize)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    summary = summarize_metrics(records)
+    totals = summarize(results, records, seconds, peak)
+    if not summary.empty:
+        columns = ["calls", "errors", "latency_p50", "latency_p95", "tokens_p50", "tokens_p95", "iterations_p50",
+                   "tool_calls_p50"]
+        print(summary[columns].to_string(float_format="{:.2f}".format))
+    print(f"{totals['operations']} işlem {seconds:.1f} saniyede: {totals['operations_per_second']:.2f} işlem/sn, "
+          f"{totals['llm_calls_per_second']:.2f} LLM çağrısı/sn, {totals['errors']} hata")
+    if totals["peak_mb"] is not None:
+        print(f"Tepe bellek artışı {totals['peak_mb']:.1f} MB ({totals['peak_mb'] / args.sessions:.1f} MB/oturum)")
+    for result in [result for result in results if result["error"]][:5]:
+        print(f"HATA oturum {result['session']} {result['operation']}: {result['error']}", file=sys.stderr)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as json_file:
+            json.dump({
+                "created": datetime.now().isoformat(timespec="seconds"),
+                "environment": environment(),
+                "arguments": vars(args),
+                "totals": totals,
+                "entry_points": json.loads(summary.to_json(orient="index")) if not summary.empty else {},
+            }, json_file, indent=2)
+        print(f"Sonuçlar kaydedildi: {args.json}")
+    return 1 if totals["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,111 @@
+"""
+startup.py: This module contains a time-to-first-paint benchmark of app.py. Every
+sample starts a fresh interpreter, so imports are cold, and runs the app script
+once with Streamlit's AppTest in an empty working directory. The first run ends
+when the initial page (header, settings and uploader) is complete, which is what
+a user waits for before anything is painted; a second run measures a warm rerun.
+
+Usage:
+    python benchmarks/startup.py --runs 5
+    python benchmarks/startup.py --runs 5 --json startup.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+
+# Runs in the child interpreter; prints the timings as one JSON line.
+CHILD_SCRIPT = """
+import json, time
+started = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+imported = time.perf_counter()
+app = AppTest.from_file({app!r}, default_timeout=300)
+app.run()
+first = time.perf_counter()
+app.run()
+rerun = time.perf_counter()
+print(json.dumps({{
+    "streamlit_import": imported - started,
+    "first_run": first - imported,
+    "rerun": rerun - first,
+    "elements": len(app.main.children),
+    "exceptions": [str(exception.value) for exception in app.exception],
+}}))
+"""
+
+
+def measure_once(app_path=APP_PATH):
+    """
+    Measures one cold start of the app in a new interpreter.
+
+    Args:
+        app_path (str): Path of the Streamlit script.
+
+    Returns:
+        dict: Seconds to import Streamlit, to complete the first run and to
+        rerun, the time to first paint from process start, and the page's
+        element count.
+    """
+    with tempfile.TemporaryDirectory() as work_dir:
+        started = time.perf_counter()
+        completed = subprocess.run(
+            [sys.executable, "-c", CHILD_SCRIPT.format(app=app_path)],
+            cwd=work_dir, capture_output=True, text=True, check=True,
+            env={**os.environ, "PYTHONPATH": os.path.dirname(app_path)},
+        )
+        total = time.perf_counter() - started
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    # Process start to the end of the first run, minus the rerun that follows it.
+    result["time_to_first_paint"] = total - result["rerun"]
+    return result
+
+
+def summarize(samples):
+    keys = ("time_to_first_paint", "streamlit_import", "first_run", "rerun")
+    return {
+        key: {
+            "median": statistics.median(sample[key] for sample in samples),
+            "min": min(sample[key] for sample in samples),
+            "max": max(sample[key] for sample in samples),
+        }
+        for key in keys
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="app.py için ilk çizime kadar geçen süreyi ölçer.")
+    parser.add_argument("--runs", type=int, default=5, help="Soğuk başlatma sayısı (varsayılan: 5)")
+    parser.add_argument("--app", default=APP_PATH, help="Ölçülecek Streamlit betiği")
+    parser.add_argument("--json", help="Sonuçların yazılacağı JSON dosyası")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    samples = [measure_once(args.app) for _ in range(args.runs)]
+    failures = [sample["exceptions"] for sample in samples if sample["exceptions"]]
+    if failures:
+        print(f"Uygulama hata verdi: {failures[0]}", file=sys.stderr)
+        return 1
+
+    summary = summarize(samples)
+    print(f"{args.runs} soğuk başlatma, {samples[0]['elements']} öğe")
+    for key, stats in summary.items():
+        print(f"{key:<20} medyan {stats['median']:.3f} s  (min {stats['min']:.3f}, maks {stats['max']:.3f})")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as json_file:
+            json.dump({"app": args.app, "runs": args.runs, "summary": summary, "samples": samples},
+                      json_file, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,103 @@
+"""
+byte_cache.py: This module contains the thread-safe LRU cache of byte strings shared
+by the figure and export caches. Entries are keyed by tuples whose first element is
+the dataset key, and the cache is bounded by the total size of the cached bytes, so
+the memory governor can measure, shrink and invalidate it per dataset.
+"""
+
+import threading
+from collections import OrderedDict
+
+
+class ByteCache:
+    """
+    A thread-safe LRU cache of byte strings bounded by a total byte budget.
+
+    Attributes:
+        max_bytes (int): The byte budget. The most recently stored entry is kept
+            even when it alone exceeds the budget.
+        hits (int): Number of lookups answered from the cache.
+        misses (int): Number of lookups that found nothing.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            data = self._entries.get(key)
+            if data is None:
+                self.misses += 1
+            else:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            return data
+
+    def put(self, key, data):
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._total_bytes -= len(previous)
+            self._entries[key] = data
+            self._total_bytes += len(data)
+            self._evict(self.max_bytes, keep=1)
+
+    def _evict(self, max_bytes, keep=0):
+        freed = 0
+        while len(self._entries) > keep and self._total_bytes > max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._total_bytes -= len(evicted)
+            freed += len(evicted)
+        return freed
+
+    def shrink(self, max_bytes):
+        """
+        Evicts least recently used entries until the cache holds at most max_bytes.
+
+        Args:
+            max_bytes (int): The number of bytes to keep.
+
+        Returns:
+            int: The number of bytes freed.
+        """
+        with self._lock:
+            return self._evict(max_bytes)
+
+    def usage(self):
+        """
+        Returns the bytes held per dataset key.
+
+        Returns:
+            dict: Bytes keyed by dataset key.
+        """
+        usage = {}
+        with self._lock:
+            for key, value in self._entries.items():
+                usage[key[0]] = usage.get(key[0], 0) + len(value)
+        return usage
+
+    def evict_dataset(self, dataset_key):
+        """
+        Drops every entry of the given dataset.
+
+        Args:
+            dataset_key (str): The dataset key, the first element of entry keys.
+        """
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == dataset_key]:
+                self._total_bytes -= len(self._entries.pop(key))
+
+    @property
+    def total_bytes(self):
+        with self._lock:
+            return self._total_bytes
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
@@ -0,0 +1,208 @@
+"""
+compaction.py: This module contains the optional compaction stage applied after a
+dataset is loaded: numeric columns are downcast, low-cardinality text columns are
+converted to pandas categoricals and date/tarih columns are parsed once, with the
+memory footprint reported before and after.
+"""
+
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from profiler import is_categorical_column, refresh_columns
+
+CATEGORY_RATIO = 0.5
+DATE_NAME_HINTS = ("date", "tarih")
+
+
+@dataclass
+class CompactionReport:
+    """
+    Memory footprint of a dataset before and after compaction.
+
+    Attributes:
+        bytes_before (int): Deep memory usage as parsed with default dtypes.
+        bytes_after (int): Deep memory usage after compaction.
+        converted (dict): Old and new dtype names keyed by converted column.
+    """
+    bytes_before: int
+    bytes_after: int
+    converted: dict = field(default_factory=dict)
+
+    @property
+    def bytes_saved(self):
+        return self.bytes_before - self.bytes_after
+
+    @property
+    def ratio(self):
+        return self.bytes_after / self.bytes_before if self.bytes_before else 1.0
+
+
+def is_date_column_name(name):
+    """
+    Checks whether a column name marks a date column ('date' or 'tarih').
+    """
+    return any(hint in str(name).lower() for hint in DATE_NAME_HINTS)
+
+
+def downcast_numeric(series):
+    """
+    Downcasts an integer column to the smallest integer type that holds its values,
+    and a float column to float32 when that loses no precision.
+
+    Args:
+        series (pd.Series): The column to be downcast.
+
+    Returns:
+        pd.Series: The downcast column, or the original one when it cannot shrink.
+    """
+    if pd.api.types.is_integer_dtype(series.dtype) and not pd.api.types.is_bool_dtype(series.dtype):
+        return pd.to_numeric(series, downcast="integer")
+    if pd.api.types.is_float_dtype(series.dtype) and series.dtype != np.float32:
+        values = series.to_numpy()
+        narrow = values.astype(np.float32)
+        if np.array_equal(narrow.astype(values.dtype), values, equal_nan=True):
+            return series.astype(np.float32)
+    return series
+
+
+def downcast_frame(df):
+    """
+    Applies downcast_numeric to every column of a DataFrame.
+
+    Args:
+        df (pd.DataFrame): The DataFrame or chunk to be downcast.
+
+    Returns:
+        tuple: The downcast pd.DataFrame and the number of bytes saved.
+    """
+    saved = 0
+    columns = {}
+    for name in df.columns:
+        series = df[name]
+        narrowed = downcast_numeric(series)
+        if narrowed is not series:
+            saved += series.memory_usage(index=False) - narrowed.memory_usage(index=False)
+            columns[name] = narrowed
+    if columns:
+        df = df.copy(deep=False)
+        for name, series in columns.items():
+            df[name] = series
+    return df, int(saved)
+
+
+def parse_date_columns(df, columns=None):
+    """
+    Parses date/tarih columns in place, skipping columns that are already datetimes.
+
+    Args:
+        df (pd.DataFrame): The DataFrame whose date columns are parsed.
+        columns (list): Columns to parse. Defaults to every column named date/tarih.
+
+    Returns:
+        list: Names of the columns that were converted.
+    """
+    columns = columns if columns is not None else [name for name in df.columns if is_date_column_name(name)]
+    converted = []
+    for name in columns:
+        if pd.api.types.is_datetime64_any_dtype(df[name].dtype):
+            continue
+        df[name] = pd.to_datetime(df[name], errors="coerce", cache=True)
+        converted.append(name)
+    return converted
+
+
+def with_parsed_dates(df, profile=None):
+    """
+    Returns df with its date/tarih columns parsed without modifying it: when a
+    column needs parsing, a shallow copy is parsed instead, so a DataFrame shared
+    through the dataset cache is never changed under other sessions.
+
+    Args:
+        df (pd.DataFrame): The DataFrame whose date columns are parsed.
+        profile (DatasetProfile): Profile of df. Parsed columns are profiled again,
+            since values that are not dates become missing.
+
+    Returns:
+        tuple: df itself when every date column is already a datetime, otherwise a
+        parsed shallow copy, and the matching profile (None when none was given).
+    """
+    columns = [
+        name for name in df.columns
+        if is_date_column_name(name) and not pd.api.types.is_datetime64_any_dtype(df[name].dtype)
+    ]
+    if not columns:
+        return df, profile
+    parsed = df.copy(deep=False)
+    converted = parse_date_columns(parsed, columns)
+    if profile is not None:
+        profile = refresh_columns(profile, parsed, converted, reprofile=converted)
+    return parsed, profile
+
+
+def categorize(df, profile=None, max_ratio=CATEGORY_RATIO):
+    """
+    Converts low-cardinality text columns to the category dtype in place.
+
+    Args:
+        df (pd.DataFrame): The DataFrame to be converted.
+        profile (DatasetProfile): Profile of df, used for the distinct counts.
+        max_ratio (float): Maximum share of distinct values among non-null values.
+
+    Returns:
+        list: Names of the columns that were converted.
+    """
+    converted = []
+    for name in df.columns:
+        series = df[name]
+        if isinstance(series.dtype, pd.CategoricalDtype) or not is_categorical_column(series.dtype):
+            continue
+        if profile is not None:
+            column = profile.column(name)
+            unique, count = column.unique, column.count
+        else:
+            unique, count = series.nunique(), series.count()
+        if count and unique / count <= max_ratio:
+            df[name] = series.astype("category")
+            converted.append(name)
+    return converted
+
+
+def compact_dataframe(df, profile=None, max_category_ratio=CATEGORY_RATIO, parse_dates=True,
+                      bytes_before=None):
+    """
+    Compacts a DataFrame: downcasts numerics, categorizes text and parses dates.
+
+    Args:
+        df (pd.DataFrame): The DataFrame to be compacted. It is not modified.
+        profile (DatasetProfile): Profile of df, reused for distinct counts and memory.
+        max_category_ratio (float): Maximum distinct share for categorical conversion.
+        parse_dates (bool): Whether to parse date/tarih columns.
+        bytes_before (int): Memory usage to report as the starting point. Defaults
+            to the deep memory usage of df.
+
+    Returns:
+        tuple: The compacted pd.DataFrame, its CompactionReport and the profile
+        updated for the converted columns (None when no profile was given).
+    """
+    if bytes_before is None:
+        bytes_before = profile.memory if profile is not None else int(df.memory_usage(deep=True, index=False).sum())
+    dtypes_before = df.dtypes
+
+    compact, _ = downcast_frame(df)
+    if compact is df:
+        compact = df.copy(deep=False)
+    dates = parse_date_columns(compact) if parse_dates else []
+    categorize(compact, profile, max_category_ratio)
+
+    converted = {
+        name: (str(dtypes_before[name]), str(dtype))
+        for name, dtype in compact.dtypes.items() if dtype != dtypes_before[name]
+    }
+    if profile is not None:
+        profile = refresh_columns(profile, compact, list(converted), reprofile=dates)
+        bytes_after = profile.memory
+    else:
+        bytes_after = int(compact.memory_usage(deep=True, index=False).sum())
+    return compact, CompactionReport(bytes_before, bytes_after, converted), profile
@@ -0,0 +1,179 @@
+"""
+context_builder.py: This module contains the dataset context builder used in LLM
+prompts. Instead of pasting raw rows, it renders a schema-plus-statistics digest of
+the dataset profile (column types, null rates, ranges and sample values) and fits
+it into a token budget by dropping detail from the least important columns first.
+"""
+
+import math
+import os
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+DEFAULT_TOKEN_BUDGET = int(os.environ.get("INFAI_CONTEXT_TOKENS", "1500"))
+CHARS_PER_TOKEN = 4
+SAMPLE_VALUES = 3
+MAX_VALUE_LENGTH = 24
+NAME_SHARE = 0.6
+
+_encoding = None
+
+
+def count_tokens(text):
+    """
+    Counts the tokens of a text with tiktoken when it is installed, and estimates
+    them from the character count otherwise.
+
+    Args:
+        text (str): The text.
+
+    Returns:
+        int: The (estimated) number of tokens.
+    """
+    global _encoding
+    if tiktoken is not None:
+        if _encoding is None:
+            _encoding = tiktoken.get_encoding("cl100k_base")
+        return len(_encoding.encode(text))
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def _short(value):
+    text = str(value)
+    return text if len(text) <= MAX_VALUE_LENGTH else text[:MAX_VALUE_LENGTH - 1] + "…"
+
+
+def _sample_values(column, profile):
+    if column.sketch is not None:
+        values = column.sketch.top(SAMPLE_VALUES).index.tolist()
+    elif profile.head is not None and column.name in profile.head:
+        values = profile.head[column.name].dropna().unique()[:SAMPLE_VALUES].tolist()
+    else:
+        values = []
+    return ", ".join(_short(value) for value in values)
+
+
+def column_importance(column, n_rows, focus=()):
+    """
+    Scores how useful a column's details are to a language model.
+
+    Columns named in focus come first; otherwise populated numeric columns and
+    low-cardinality labels rank above sparse, constant or identifier-like columns.
+
+    Args:
+        column (ColumnProfile): The column's profile.
+        n_rows (int): Number of rows of the dataset.
+        focus (tuple): Names of columns the prompt is about.
+
+    Returns:
+        float: The score, higher is more important.
+    """
+    score = 1.0 - column.null_pct / 100
+    if column.name in focus:
+        score += 10.0
+    if column.unique <= 1:
+        score -= 1.0
+    elif column.is_numeric:
+        score += 0.5
+    elif column.is_categorical:
+        if column.unique <= 50:
+            score += 0.5
+        elif n_rows and column.unique >= 0.9 * column.count:
+            score -= 0.5
+    return score
+
+
+def describe_column(column, profile, detailed=True):
+    """
+    Renders one column as a single digest line.
+
+    Args:
+        column (ColumnProfile): The column's profile.
+        profile (DatasetProfile): The dataset profile, for sample values.
+        detailed (bool): Whether to add statistics and sample values to the name and type.
+
+    Returns:
+        str: The digest line.
+    """
+    line = f"- {column.name} ({column.dtype})"
+    if not detailed:
+        return line
+    line += f": eksik %{column.null_pct:.1f}, benzersiz {column.unique:,}"
+    if column.is_numeric and column.count:
+        line += f", aralık [{column.min:.4g}, {column.max:.4g}], ort {column.mean:.4g}"
+    samples = "" if column.is_numeric else _sample_values(column, profile)
+    if samples:
+        line += f", örnek: {samples}"
+    return line
+
+
+def build_context(profile, token_budget=DEFAULT_TOKEN_BUDGET, focus=()):
+    """
+    Builds a digest of the dataset that fits the token budget.
+
+    Columns are ordered by importance. As many columns as fit in NAME_SHARE of
+    the budget are listed by name and type, the rest are summarized as a count
+    of omitted columns, and the remaining budget adds statistics and sample
+    values to the most important listed columns.
+
+    Args:
+        profile (DatasetProfile): The dataset profile.
+        token_budget (int): Maximum number of tokens of the digest.
+        focus (tuple): Names of columns the prompt is about, always listed first.
+
+    Returns:
+        str: The digest.
+    """
+    header = f"Veri seti: {profile.n_rows:,} satır, {profile.n_cols} sütun. Sütunlar (önem sırasına göre):"
+    ranked = sorted(
+        profile.columns,
+        key=lambda column: column_importance(column, profile.n_rows, focus),
+        reverse=True,
+    )
+    # Reserve room for the trailing "omitted columns" note.
+    available = token_budget - count_tokens(header) - 12
+
+    # Columns are listed by name and type first, most important first, within a
+    # share of the budget so that wide tables still leave room for details...
+    name_budget = available * NAME_SHARE
+    lines, listed, omitted = [], [], 0
+    for column in ranked:
+        line = describe_column(column, profile, detailed=False)
+        cost = count_tokens(line) + 1
+        if cost <= name_budget:
+            name_budget -= cost
+            lines.append(line)
+            listed.append(column)
+            available -= cost
+        else:
+            omitted += 1
+
+    # ...then the remaining budget upgrades lines to full detail in the same order.
+    for index, column in enumerate(listed):
+        line = describe_column(column, profile)
+        extra = count_tokens(line) - count_tokens(lines[index])
+        if extra <= available:
+            lines[index] = line
+            available -= extra
+
+    if omitted:
+        lines.append(f"- ... ve {omitted} sütun daha")
+    return "\n".join([header] + lines)
+
+
+def find_focus_columns(text, columns):
+    """
+    Returns the columns whose names appear in a question or instruction.
+
+    Args:
+        text (str): The question.
+        columns (list): Column names of the dataset.
+
+    Returns:
+        tuple: The mentioned column names.
+    """
+    lowered = text.lower()
+    return tuple(name for name in columns if str(name).lower() in lowered)
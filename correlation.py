@@ -0,0 +1,463 @@
+"""
+correlation.py: This module contains a vectorized correlation engine shared by the
+correlation tab and the trend analysis. Pearson and rank-based Spearman matrices
+are computed with a few NumPy matrix products, Kendall's tau-b exactly on small
+data and on a random sample for large n, and results are cached per dataset.
+For wide tables, high_correlation_pairs walks the matrix in column blocks with
+bounded memory and keeps only the strong pairs.
+"""
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from profiler import is_numeric_column
+
+METHODS = ("pearson", "spearman", "kendall")
+ROW_BLOCK_SIZE = 1_000_000
+BLOCK_CELLS = 8_000_000
+COLUMN_BLOCK_SIZE = 256
+KENDALL_SAMPLE_SIZE = 1500
+HIGH_CORRELATION_THRESHOLD = 0.5
+CACHE_SIZE = 64
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def numeric_columns(df):
+    """
+    Returns the names of the numeric (non-boolean) columns of a DataFrame.
+    """
+    return [name for name, dtype in df.dtypes.items() if is_numeric_column(dtype)]
+
+
+def _as_float_matrix(df, columns):
+    return np.column_stack([df[name].to_numpy(dtype="float64", na_value=np.nan) for name in columns])
+
+
+def _column_moments(values):
+    """
+    Mean and variance of every column over its present values; NaN for columns
+    without values. Unlike np.nanmean and np.nanvar, this does not warn about
+    all-NaN columns.
+    """
+    present = ~np.isnan(values)
+    counts = present.sum(axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        means = np.where(present, values, 0.0).sum(axis=0) / counts
+        deviations = np.where(present, values - means, 0.0)
+        variances = (deviations * deviations).sum(axis=0) / counts
+    return means, variances
+
+
+def _pearson_complete(left, right):
+    """
+    Pearson correlation for columns without missing values: a single product of
+    the centered columns scaled by their norms.
+    """
+    x = left - left.mean(axis=0)
+    y = x if right is left else right - right.mean(axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        result = (x.T @ y) / np.outer(np.sqrt((x * x).sum(axis=0)), np.sqrt((y * y).sum(axis=0)))
+    result[:, ~np.isfinite(result).any(axis=0)] = np.nan
+    if left.shape[0] < 2:
+        result[:] = np.nan
+    return np.clip(result, -1.0, 1.0)
+
+
+def _pearson_cross(left, right):
+    """
+    Pearson correlation of every (left column, right column) pair over the rows
+    where both are present, accumulated over row blocks so that memory stays
+    bounded for long columns.
+    """
+    if left.size and right.size and not (np.isnan(left).any() or np.isnan(right).any()):
+        return _pearson_complete(left, right)
+    left_means = _column_moments(left)[0]
+    right_means = left_means if right is left else _column_moments(right)[0]
+    shape = (left.shape[1], right.shape[1])
+    n, sx, sy, sxx, syy, sxy = (np.zeros(shape) for _ in range(6))
+    rows = min(ROW_BLOCK_SIZE, max(1, BLOCK_CELLS // max(1, sum(shape))))
+    for start in range(0, left.shape[0], rows):
+        left_block, right_block = left[start:start + rows], right[start:start + rows]
+        left_mask, right_mask = ~np.isnan(left_block), ~np.isnan(right_block)
+        left_present, right_present = left_mask.astype("float64"), right_mask.astype("float64")
+        x = np.where(left_mask, left_block - left_means, 0.0)
+        y = np.where(right_mask, right_block - right_means, 0.0)
+        n += left_present.T @ right_present
+        sx += x.T @ right_present
+        sy += left_present.T @ y
+        sxx += (x * x).T @ right_present
+        syy += left_present.T @ (y * y)
+        sxy += x.T @ y
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        covariance = sxy - sx * sy / n
+        result = covariance / np.sqrt((sxx - sx * sx / n) * (syy - sy * sy / n))
+    result[n < 2] = np.nan
+    return np.clip(result, -1.0, 1.0)
+
+
+def _pearson_from_matrix(values):
+    """
+    Pearson correlation of every column pair over the rows where both are present.
+    """
+    result = _pearson_cross(values, values)
+    variance = _column_moments(values)[1]
+    np.fill_diagonal(result, np.where(variance > 0, 1.0, np.nan))
+    return result
+
+
+def _sample_rows(n_rows, sample_size, seed=0):
+    if n_rows <= sample_size:
+        return None
+    return np.sort(np.random.default_rng(seed).choice(n_rows, sample_size, replace=False))
+
+
+def _pair_chunks(n_rows, max_pairs):
+    """
+    Yields the row indices (first, second) of every row pair with first < second,
+    a run of whole rows at a time holding about max_pairs pairs, so the pairs are
+    never all materialized at once.
+    """
+    counts = np.arange(n_rows - 1, 0, -1)  # pairs whose first row is 0, 1, ...
+    ends = np.cumsum(counts)
+    start = 0
+    while start < n_rows - 1:
+        done = ends[start - 1] if start else 0
+        stop = max(start + 1, int(np.searchsorted(ends, done + max_pairs, side="right")))
+        first = np.repeat(np.arange(start, stop), counts[start:stop])
+        offsets = np.arange(first.size) - np.repeat(ends[start:stop] - counts[start:stop] - done, counts[start:stop])
+        yield first, first + 1 + offsets
+        start = stop
+
+
+def _kendall_signs(values, first, second):
+    """
+    Signs of the given pairwise row differences of every column, and whether both
+    rows of each pair are present.
+    """
+    earlier, later = values[first], values[second]
+    # Comparisons with NaN are False, so pairs with a missing value get sign 0.
+    signs = (earlier > later).astype("float32")
+    signs -= earlier < later
+    pair_valid = (~np.isnan(earlier) & ~np.isnan(later)).astype("float32")
+    return signs, pair_valid
+
+
+def _kendall_cross(left, right):
+    """
+    Kendall's tau-b of every (left column, right column) pair on all rows given,
+    accumulated over chunks of row pairs so that memory stays bounded.
+    """
+    shape = (left.shape[1], right.shape[1])
+    concordance, left_untied, right_untied = (np.zeros(shape) for _ in range(3))
+    max_pairs = max(left.shape[0], BLOCK_CELLS // max(1, sum(shape)))
+    for first, second in _pair_chunks(left.shape[0], max_pairs):
+        left_signs, left_valid = _kendall_signs(left, first, second)
+        if right is left:
+            right_signs, right_valid = left_signs, left_valid
+        else:
+            right_signs, right_valid = _kendall_signs(right, first, second)
+        concordance += left_signs.T @ right_signs
+        left_untied += np.abs(left_signs).T @ right_valid
+        right_untied += left_valid.T @ np.abs(right_signs)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        result = concordance / np.sqrt(left_untied * right_untied)
+    return np.clip(result, -1.0, 1.0)
+
+
+def _kendall_from_matrix(values, sample_size=KENDALL_SAMPLE_SIZE, seed=0):
+    """
+    Kendall's tau-b of every column pair, computed on at most sample_size rows.
+    """
+    rows = _sample_rows(values.shape[0], sample_size, seed)
+    if rows is not None:
+        values = values[rows]
+    return _kendall_cross(values, values)
+
+
+def compute_correlation(df, columns, method="pearson"):
+    """
+    Computes a correlation matrix without consulting the cache.
+
+    Spearman ranks each column once over all of its values, so with missing
+    values it may differ slightly from pandas, which re-ranks every column pair.
+
+    Args:
+        df (pd.DataFrame): The input DataFrame.
+        columns (list): Numeric columns to correlate.
+        method (str): One of "pearson", "spearman" or "kendall".
+
+    Returns:
+        pd.DataFrame: The symmetric correlation matrix.
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unsupported correlation method '{method}'. Must be one of {METHODS}.")
+    columns = list(columns)
+    if method == "spearman":
+        values = _as_float_matrix(df[columns].rank(method="average"), columns)
+    else:
+        values = _as_float_matrix(df, columns)
+
+    if method == "kendall":
+        matrix = _kendall_from_matrix(values)
+    else:
+        matrix = _pearson_from_matrix(values)
+    return pd.DataFrame(matrix, index=columns, columns=columns)
+
+
+def correlation_matrix(df, columns=None, method="pearson", dataset_key=None):
+    """
+    Returns the correlation matrix of the given columns, cached per dataset.
+
+    Results are only cached when dataset_key is given, since an in-memory
+    DataFrame without a content hash may change between calls.
+
+    Args:
+        df (pd.DataFrame): The input DataFrame.
+        columns (list): Numeric columns to correlate. Defaults to all numeric columns.
+        method (str): One of "pearson", "spearman" or "kendall".
+        dataset_key (str): Content hash of the dataset.
+
+    Returns:
+        pd.DataFrame: The symmetric correlation matrix.
+    """
+    columns = tuple(columns) if columns is not None else tuple(numeric_columns(df))
+    if dataset_key is None:
+        return compute_correlation(df, columns, method)
+
+    key = (dataset_key, columns, method)
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+
+    matrix = compute_correlation(df, columns, method)
+    with _cache_lock:
+        _cache[key] = matrix
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return matrix
+
+
+def correlations_with(df, target, method="pearson", dataset_key=None, top_k=None):
+    """
+    Correlates one numeric column with every other numeric column. Only the row
+    of the target is computed, unless the full matrix is already cached.
+
+    Args:
+        df (pd.DataFrame): The input DataFrame.
+        target (str): The variable of interest.
+        method (str): One of "pearson", "spearman" or "kendall".
+        dataset_key (str): Content hash of the dataset.
+        top_k (int): Number of strongest correlations to keep. Keeps all when None.
+
+    Returns:
+        pd.Series: Correlation coefficients indexed by column, sorted by absolute value.
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unsupported correlation method '{method}'. Must be one of {METHODS}.")
+    columns = tuple(numeric_columns(df))
+    others = [name for name in columns if name != target]
+    key = (dataset_key, "with", target, columns, method)
+    cached = None
+    if dataset_key is not None:
+        with _cache_lock:
+            for candidate in (key, (dataset_key, columns, method)):
+                if candidate in _cache:
+                    _cache.move_to_end(candidate)
+                    cached = _cache[candidate]
+                    break
+    if isinstance(cached, pd.DataFrame):
+        correlations = cached[target].drop(target)
+    elif cached is not None:
+        correlations = cached
+    else:
+        # Kendall uses the same row sample as the full matrix, so both agree.
+        rows = _sample_rows(len(df), KENDALL_SAMPLE_SIZE) if method == "kendall" else None
+        cross = _kendall_cross if method == "kendall" else _pearson_cross
+        row = cross(_column_block(df, [target], method, rows), _column_block(df, others, method, rows))
+        correlations = pd.Series(row[0], index=others, name=target)
+        if dataset_key is not None:
+            with _cache_lock:
+                _cache[key] = correlations
+                while len(_cache) > CACHE_SIZE:
+                    _cache.popitem(last=False)
+
+    correlations = correlations.dropna()
+    correlations = correlations.reindex(correlations.abs().sort_values(ascending=False).index)
+    return correlations.head(top_k) if top_k is not None else correlations
+
+
+def _column_block(df, columns, method, rows=None):
+    block = df[list(columns)]
+    if rows is not None:
+        block = block.iloc[rows]
+    if method == "spearman":
+        block = block.rank(method="average")
+    return block.to_numpy(dtype="float64", na_value=np.nan)
+
+
+def _block_size(n_rows, method, block_size):
+    # Keep one column block near BLOCK_CELLS values; Kendall bounds its row
+    # pairs itself, so only its row sample counts.
+    if method == "kendall":
+        n_rows = min(n_rows, KENDALL_SAMPLE_SIZE)
+    return int(np.clip(BLOCK_CELLS // max(1, n_rows), 8, block_size))
+
+
+def high_correlation_pairs(df, columns=None, method="pearson", threshold=HIGH_CORRELATION_THRESHOLD,
+                           dataset_key=None, block_size=COLUMN_BLOCK_SIZE):
+    """
+    Finds every unique column pair whose correlation reaches the threshold.
+
+    Every column block is converted (and ranked, for Spearman) once; the matrix
+    is then computed one pair of blocks at a time and only the upper triangle is
+    visited, so besides one float copy of the scanned columns memory depends on
+    the block size rather than on the number of columns, and each pair is
+    reported once.
+
+    Args:
+        df (pd.DataFrame): The input DataFrame.
+        columns (list): Numeric columns to scan. Defaults to all numeric columns.
+        method (str): One of "pearson", "spearman" or "kendall".
+        threshold (float): Minimum absolute correlation of reported pairs.
+        dataset_key (str): Content hash of the dataset, used for caching.
+        block_size (int): Maximum number of columns per block.
+
+    Returns:
+        pd.DataFrame: Columns "column_1", "column_2" and "correlation", sorted by
+        absolute correlation, strongest first.
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unsupported correlation method '{method}'. Must be one of {METHODS}.")
+    columns = tuple(columns) if columns is not None else tuple(numeric_columns(df))
+    key = (dataset_key, "pairs", columns, method, threshold)
+    if dataset_key is not None:
+        with _cache_lock:
+            if key in _cache:
+                _cache.move_to_end(key)
+                return _cache[key]
+
+    rows = _sample_rows(len(df), KENDALL_SAMPLE_SIZE) if method == "kendall" else None
+    cross = _kendall_cross if method == "kendall" else _pearson_cross
+    size = _block_size(len(df), method, block_size)
+    names = [columns[start:start + size] for start in range(0, len(columns), size)]
+    blocks = [_column_block(df, block_columns, method, rows) for block_columns in names]
+
+    found = []
+    for i, (left_columns, left) in enumerate(zip(names, blocks)):
+        for j in range(i, len(blocks)):
+            right_columns, right = names[j], blocks[j]
+            block = cross(left, right)
+            with np.errstate(invalid="ignore"):
+                strong = np.abs(block) >= threshold
+            if j == i:
+                strong = np.triu(strong, k=1)
+            first, second = np.nonzero(strong)
+            found.extend(zip(
+                (left_columns[index] for index in first),
+                (right_columns[index] for index in second),
+                block[first, second].tolist(),
+            ))
+
+    pairs = pd.DataFrame(found, columns=["column_1", "column_2", "correlation"])
+    pairs = pairs.reindex(pairs["correlation"].abs().sort_values(ascending=False, kind="stable").index)
+    pairs = pairs.reset_index(drop=True)
+    if dataset_key is not None:
+        with _cache_lock:
+            _cache[key] = pairs
+            while len(_cache) > CACHE_SIZE:
+                _cache.popitem(last=False)
+    return pairs
+
+
+def strong_pairs(matrix, threshold=HIGH_CORRELATION_THRESHOLD):
+    """
+    Lists the unique off-diagonal pairs of a correlation matrix reaching the threshold.
+
+    Args:
+        matrix (pd.DataFrame): A symmetric correlation matrix.
+        threshold (float): Minimum absolute correlation.
+
+    Returns:
+        pd.DataFrame: Same layout as high_correlation_pairs.
+    """
+    values = matrix.to_numpy()
+    with np.errstate(invalid="ignore"):
+        first, second = np.nonzero(np.triu(np.abs(values) >= threshold, k=1))
+    pairs = pd.DataFrame({
+        "column_1": matrix.index[first],
+        "column_2": matrix.columns[second],
+        "correlation": values[first, second],
+    })
+    pairs = pairs.reindex(pairs["correlation"].abs().sort_values(ascending=False, kind="stable").index)
+    return pairs.reset_index(drop=True)
+
+
+def cluster_order(matrix):
+    """
+    Orders columns so that strongly correlated columns sit next to each other,
+    by spectral seriation: sorting on the Fiedler vector of the graph whose edge
+    weights are the absolute correlations.
+
+    Args:
+        matrix (pd.DataFrame): A symmetric correlation matrix.
+
+    Returns:
+        list: The column names in clustered order.
+    """
+    if len(matrix) < 3:
+        return list(matrix.columns)
+    weights = np.nan_to_num(np.abs(matrix.to_numpy()))
+    np.fill_diagonal(weights, 0.0)
+    laplacian = np.diag(weights.sum(axis=1)) - weights
+    _, vectors = np.linalg.eigh(laplacian)
+    order = np.argsort(vectors[:, 1], kind="stable")
+    return [matrix.columns[index] for index in order]
+
+
+def _nbytes(result):
+    usage = result.memory_usage(deep=True)
+    return int(usage.sum()) if isinstance(usage, pd.Series) else int(usage)
+
+
+def cache_usage():
+    """
+    Returns the bytes held by cached results per dataset key.
+
+    Returns:
+        dict: Bytes keyed by dataset key.
+    """
+    usage = {}
+    with _cache_lock:
+        for key, result in _cache.items():
+            usage[key[0]] = usage.get(key[0], 0) + _nbytes(result)
+    return usage
+
+
+def shrink_cache(max_bytes):
+    """
+    Evicts least recently used results until the cache holds at most max_bytes.
+
+    Args:
+        max_bytes (int): The number of bytes to keep.
+
+    Returns:
+        int: The number of bytes freed.
+    """
+    with _cache_lock:
+        total = sum(_nbytes(result) for result in _cache.values())
+        freed = 0
+        while _cache and total - freed > max_bytes:
+            freed += _nbytes(_cache.popitem(last=False)[1])
+    return freed
+
+
+def clear_cache():
+    with _cache_lock:
+        _cache.clear()
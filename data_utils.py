@@ -3,10 +3,44 @@ data_utils.py: This module contains utility functions for analyzing data,
 performing trend analysis, and interacting with data using a language model.
 """
 
+import asyncio
+import os
+import queue
+import threading
+import time
 import warnings
-import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, replace
+from functools import partial
 from langchain_experimental.agents.agent_toolkits.pandas.base import create_pandas_dataframe_agent
-from langchain.schema import SystemMessage
+from langchain.callbacks.base import BaseCallbackHandler
+from langchain.schema import HumanMessage, SystemMessage
+
+from agent_budget import (
+    AGENT_STOPPED_PREFIX,
+    BUDGETS,
+    MAX_ITERATIONS,
+    BudgetReport,
+    classify_question,
+    run_with_budget,
+)
+from agent_registry import dataset_identity, get_default_registry
+from answer_cache import get_default_answer_cache, model_key
+from compaction import with_parsed_dates
+from context_builder import build_context, describe_column, find_focus_columns
+from correlation import correlations_with, numeric_columns
+from dataset_cache import frame_fingerprint
+import fake_llm
+from llm_metrics import get_default_recorder
+from profiler import profile_dataframe
+from sandbox import sandbox_agent_tools
+from summary_facts import (
+    compute_summary_facts,
+    format_anomalies,
+    format_duplicates,
+    format_facts_context,
+    format_missing,
+)
 
 warnings.filterwarnings("ignore", category=UserWarning)
 
@@ -18,55 +52,309 @@ system_message = SystemMessage(
     )
 )
 
+SUMMARY_PROMPTS = {
+    "column_descriptions": (
+        "Veri setindeki her sütunun adını ve kısa bir açıklamasını listeleyin. "
+        "Türkçe cevaplamanı istiyorum."
+    ),
+    "missing_values": (
+        "Veri setindeki eksik değerlerin toplam sayısını hesaplayın ve "
+        "'Bu veri setinde X eksik değer var.' şeklinde yanıt verin. "
+        "Türkçe cevaplamanı istiyorum."
+    ),
+    "duplicate_values": (
+        "Bu veri setinde toplam kaç yinelenen satır var? 'Bu veri setinde X "
+        "yinelenen satır var.' şeklinde yanıt ver. Türkçe cevaplamanı istiyorum."
+    ),
+    "anomaly_values": (
+        "Bu veri setinde anormal değerler var mı? Varsa, hangi sütunlarda ve nasıl "
+        "tespit edilebilir? Türkçe cevaplamanı istiyorum."
+    ),
+}
+
+DEFAULT_MODEL = os.environ.get("INFAI_MODEL", "gpt-4o-mini")
+
+SUMMARY_MAX_CONCURRENCY = 4
+SUMMARY_CALL_TIMEOUT = 300
+TIMEOUT_MESSAGE = "Yanıt {timeout} saniye içinde alınamadı (zaman aşımı)."
+ERROR_MESSAGE = "Yanıt oluşturulamadı: {error}"
+FINAL_ANSWER_MARKER = "Final Answer:"
+QUESTION_SUFFIX = " Cevabınızı net ve doğrudan verin. Türkçe cevaplamanı istiyorum."
+
+COLUMNS_HEADER = "## Sütun Açıklamaları"
+ANOMALY_HEADER = "## Anormal Değerler"
+NARRATIVE_PROMPT = (
+    "Aşağıda bir veri setinin pandas ile kesin olarak hesaplanmış özeti var:\n\n"
+    "{context}\n\n"
+    "Bu bilgilere dayanarak iki bölüm yaz. İlk bölüm '" + COLUMNS_HEADER + "' başlığıyla "
+    "her sütunun adını ve kısa bir açıklamasını listelesin. İkinci bölüm "
+    "'" + ANOMALY_HEADER + "' başlığıyla anomali taramasını yorumlasın: hangi sütunlarda "
+    "anormal değer olduğunu ve bunların nasıl tespit edildiğini açıklasın. Sayıları "
+    "değiştirme, yeni hesaplama yapma. Türkçe cevaplamanı istiyorum."
+)
+
+AGENT_CONTEXT_TOKENS = 1500
+AGENT_PREFIX = (
+    "{system}\n\n"
+    "Python'da adı `df` olan bir pandas DataFrame ile çalışıyorsun. Veri setinin özeti:\n"
+    "{context}\n\n"
+    "Soruyu yanıtlamak için aşağıdaki araçları kullan:"
+)
+FOCUS_HEADER = "İlgili sütunlar:"
+
+TREND_TOP_K = 5
+TREND_CONTEXT_TOKENS = 400
+TREND_PROMPT = (
+    "{context}\n\n"
+    "'{variable}' değişkeni ile diğer sayısal değişkenler arasındaki {method} korelasyonları "
+    "pandas ile hesaplandı. Mutlak değerce en güçlü {top_k} sonuç:\n{results}\n\n"
+    "Bu korelasyonların yönünü ve gücünü yorumla, dikkat çeken ilişkileri açıkla. "
+    "Sayıları değiştirme, yeni hesaplama yapma. Türkçe cevaplamanı istiyorum."
+)
+
 
-def summarize_csv_with_model(df, llm):
+def complete(llm, prompt, callbacks=None):
     """
-    Generates a summary of the given DataFrame using the provided language model.
+    Sends a single prompt, prefixed with the system message, to the language model.
 
     Args:
-        df (pd.DataFrame): The input DataFrame to be summarized.
-        llm: The language model for generating natural language responses.
+        llm: A chat model or a plain text-completion model.
+        prompt (str): The user prompt.
+        callbacks (list): Callback handlers of the call, e.g. for metrics.
 
     Returns:
-        dict: A dictionary containing various summary information about the DataFrame.
+        str: The text of the model's answer.
+    """
+    result = llm.invoke([system_message, HumanMessage(content=prompt)], config={"callbacks": callbacks or []})
+    return getattr(result, "content", result)
+
+
+def build_llm(api_key=None, model=DEFAULT_MODEL, streaming=True):
+    """
+    Builds the OpenAI chat model used by the app and the batch CLI.
+
+    When INFAI_FAKE_LLM is set, the offline model of fake_llm is returned
+    instead; when INFAI_RECORD_TRAJECTORIES is set, the agent steps of the model
+    are recorded for it to replay.
+
+    Args:
+        api_key (str): The OpenAI API key. Defaults to the OPENAI_API_KEY variable.
+        model (str): The model name.
+        streaming (bool): Whether the model streams tokens to callbacks, which
+            the streaming API needs to forward final-answer tokens.
+
+    Returns:
+        ChatOpenAI: The chat model.
+    """
+    if fake_llm.FAKE_LLM:
+        return fake_llm.build_fake_llm()
+    try:
+        from langchain_openai import ChatOpenAI
+    except ImportError as error:
+        raise ImportError(
+            "The OpenAI chat model requires langchain-openai. Install it with `pip install langchain-openai`."
+        ) from error
+    kwargs = {"api_key": api_key} if api_key else {}
+    if fake_llm.RECORD_TRAJECTORIES:
+        kwargs["callbacks"] = [fake_llm.TrajectoryRecorder(fake_llm.RECORD_TRAJECTORIES)]
+    return ChatOpenAI(model=model, temperature=0, streaming=streaming, **kwargs)
+
+
+def _escape_braces(text):
+    return text.replace("{", "{{").replace("}", "}}")
+
+
+def create_agent(df, llm, profile=None, dataset_key=None):
     """
-    # Convert date columns to datetime format
-    date_columns = [col for col in df.columns if 'date' in col.lower() or 'tarih' in col.lower()]
-    for col in date_columns:
-        df[col] = pd.to_datetime(df[col], errors='coerce')
+    Builds a new pandas agent bound to the given DataFrame.
 
+    Rather than pasting df.head() into the prompt, the agent's prefix carries a
+    token-budgeted digest of the dataset profile. The code it writes runs in the
+    sandbox pool rather than in this process (see sandbox.py).
+
+    Args:
+        df (pd.DataFrame): The DataFrame the agent works on.
+        llm: The language model for generating natural language responses.
+        profile (DatasetProfile): The profile of df. Computed when not given.
+        dataset_key (str): Content hash of the dataset, the key of its shared copy.
+
+    Returns:
+        AgentExecutor: The pandas agent.
+    """
+    profile = profile if profile is not None else profile_dataframe(df)
+    prefix = AGENT_PREFIX.format(
+        system=system_message.content,
+        context=build_context(profile, AGENT_CONTEXT_TOKENS)
+    )
     pandas_agent = create_pandas_dataframe_agent(
         llm,
         df,
         verbose=False,
         allow_dangerous_code=True,
-        agent_kwargs={
-            'system_message': system_message,
-            'handle_parsing_errors': True,
-            'max_iterations': 150,
-            'max_execution_time': 300
-        }
+        include_df_in_prompt=False,
+        prefix=_escape_braces(prefix),
+        # Hard limits of the executor; run_with_budget applies tighter ones per question type.
+        max_iterations=MAX_ITERATIONS,
+        max_execution_time=SUMMARY_CALL_TIMEOUT,
+        agent_executor_kwargs={'handle_parsing_errors': True}
+    )
+    return sandbox_agent_tools(pandas_agent, df, dataset_identity(df, dataset_key))
+
+
+def get_agent(df, llm, dataset_key=None, profile=None):
+    """
+    Returns the registered pandas agent for the DataFrame and language model,
+    creating it only when no agent is cached for this pair.
+
+    Args:
+        df (pd.DataFrame): The DataFrame the agent works on.
+        llm: The language model for generating natural language responses.
+        dataset_key (str): Content hash of the dataset, when known.
+        profile (DatasetProfile): The profile of df, used for the agent's context.
+
+    Returns:
+        AgentExecutor: The pandas agent.
+    """
+    return get_default_registry().get_or_create(
+        df, llm, lambda df, llm: create_agent(df, llm, profile, dataset_key), dataset_key
     )
 
+
+async def _arun_prompts(agent, prompts, max_concurrency, timeout, callbacks):
+    semaphore = asyncio.Semaphore(max_concurrency)
+    loop = asyncio.get_running_loop()
+    budget = BUDGETS["summary"]
+    if timeout is not None:
+        # A thread cannot be cancelled, so a run that timed out stops itself at its next step.
+        budget = replace(budget, max_execution_time=min(budget.max_execution_time, timeout))
+    # One thread per prompt: a timed-out run may still hold its thread until its
+    # next step, and must not delay the prompts behind it.
+    executor = ThreadPoolExecutor(max_workers=max(1, len(prompts)))
+
+    async def run_one(prompt):
+        async with semaphore:
+            call = partial(run_with_budget, agent, prompt, "summary", budget=budget, callbacks=callbacks)
+            try:
+                answer, _ = await asyncio.wait_for(loop.run_in_executor(executor, call), timeout)
+            except asyncio.TimeoutError:
+                return TIMEOUT_MESSAGE.format(timeout=timeout)
+            except Exception as error:
+                return ERROR_MESSAGE.format(error=error)
+            return answer
+
+    try:
+        outputs = await asyncio.gather(*(run_one(prompt) for prompt in prompts.values()))
+    finally:
+        # Unlike the default executor, asyncio.run does not wait for this one's threads.
+        executor.shutdown(wait=False, cancel_futures=True)
+    return dict(zip(prompts, outputs))
+
+
+def run_prompts(agent, prompts, max_concurrency=SUMMARY_MAX_CONCURRENCY, timeout=SUMMARY_CALL_TIMEOUT,
+                callbacks=None):
+    """
+    Runs independent prompts against an agent concurrently.
+
+    At most max_concurrency agent runs are in flight at once. A run that
+    exceeds timeout seconds is answered with a timeout message right away and
+    stops itself at its next agent step; a run that fails is answered with an
+    error message, without affecting the other prompts.
+
+    Args:
+        agent (AgentExecutor): The agent answering the prompts.
+        prompts (dict): Prompts keyed by the name of their answer.
+        max_concurrency (int): Maximum number of simultaneous agent runs.
+        timeout (float): Per-call timeout in seconds, or None for no limit.
+        callbacks (list): Callback handlers of every run, e.g. for metrics.
+
+    Returns:
+        dict: Answers keyed like prompts.
+    """
+    coroutine = _arun_prompts(agent, prompts, max(1, max_concurrency), timeout, callbacks)
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coroutine)
+    # An event loop is already running in this thread (e.g. a notebook), so run
+    # the prompts on a private loop in a helper thread.
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coroutine).result()
+
+
+def _narrative_request(df, profile=None):
+    profile = profile if profile is not None else profile_dataframe(df)
+    facts = compute_summary_facts(df, profile)
+    return facts, NARRATIVE_PROMPT.format(context=format_facts_context(facts, profile))
+
+
+def _hybrid_answers(facts, narrative):
+    column_descriptions, _, anomaly_text = narrative.partition(ANOMALY_HEADER)
+    return {
+        "column_descriptions": column_descriptions.replace(COLUMNS_HEADER, "", 1).strip(),
+        "missing_values": format_missing(facts),
+        "duplicate_values": format_duplicates(facts),
+        "anomaly_values": anomaly_text.strip() or format_anomalies(facts),
+        "summary_facts": facts,
+    }
+
+
+def summarize_hybrid(df, llm, profile=None, callbacks=None):
+    """
+    Computes the summary facts locally and asks the language model, in a single
+    call, only for the wording of the column descriptions and the anomaly review.
+
+    Args:
+        df (pd.DataFrame): The input DataFrame to be summarized.
+        llm: The language model for generating natural language responses.
+        profile (DatasetProfile): The profile of df. Computed when not given.
+        callbacks (list): Callback handlers of the LLM call, e.g. for metrics.
+
+    Returns:
+        dict: The narrative summary fields and the underlying facts.
+    """
+    facts, prompt = _narrative_request(df, profile)
+    return _hybrid_answers(facts, complete(llm, prompt, callbacks))
+
+
+def summarize_csv_with_model(df, llm, dataset_key=None, mode="hybrid", concurrent=True,
+                             max_concurrency=SUMMARY_MAX_CONCURRENCY, timeout=SUMMARY_CALL_TIMEOUT,
+                             profile=None):
+    """
+    Generates a summary of the given DataFrame using the provided language model.
+
+    Args:
+        df (pd.DataFrame): The input DataFrame to be summarized.
+        llm: The language model for generating natural language responses.
+        dataset_key (str): Content hash of the dataset, used to reuse its agent.
+        mode (str): "hybrid" computes the facts locally and makes one narrative LLM
+            call; "agent" answers every summary prompt with the pandas agent.
+        concurrent (bool): Whether to run the agent prompts concurrently.
+        max_concurrency (int): Maximum number of simultaneous agent runs.
+        timeout (float): Per-call timeout in seconds for concurrent runs.
+        profile (DatasetProfile): The profile of df, reused by the hybrid mode.
+
+    Returns:
+        dict: A dictionary containing various summary information about the DataFrame.
+    """
+    # Convert date columns to datetime format, unless compaction already did
+    df, profile = with_parsed_dates(df, profile)
+
+    with get_default_recorder().track("summarize_csv_with_model", llm, dataset_key) as metrics:
+        if mode == "hybrid":
+            answers = summarize_hybrid(df, llm, profile, callbacks=[metrics])
+        elif concurrent:
+            pandas_agent = get_agent(df, llm, dataset_key, profile)
+            answers = run_prompts(pandas_agent, SUMMARY_PROMPTS, max_concurrency, timeout, callbacks=[metrics])
+        else:
+            pandas_agent = get_agent(df, llm, dataset_key, profile)
+            answers = {
+                name: run_with_budget(pandas_agent, prompt, "summary", callbacks=[metrics])[0]
+                for name, prompt in SUMMARY_PROMPTS.items()
+            }
+
     data_summary = {
         "initial_data_sample": df.head(),
-        "column_descriptions": pandas_agent.run(
-            "Veri setindeki her sütunun adını ve kısa bir açıklamasını listeleyin. "
-            "Türkçe cevaplamanı istiyorum."
-        ),
-        "missing_values": pandas_agent.run(
-            "Veri setindeki eksik değerlerin toplam sayısını hesaplayın ve "
-            "'Bu veri setinde X eksik değer var.' şeklinde yanıt verin. "
-            "Türkçe cevaplamanı istiyorum."
-        ),
-        "duplicate_values": pandas_agent.run(
-            "Bu veri setinde toplam kaç yinelenen satır var? 'Bu veri setinde X "
-            "yinelenen satır var.' şeklinde yanıt ver. Türkçe cevaplamanı istiyorum."
-        ),
-        "anomaly_values": pandas_agent.run(
-            "Bu veri setinde anormal değerler var mı? Varsa, hangi sütunlarda ve nasıl "
-            "tespit edilebilir? Türkçe cevaplamanı istiyorum."
-        ),
+        **answers,
         "essential_metrics": df.describe(),
         "data_types": df.dtypes,
         "data_shape": df.shape
@@ -75,67 +363,311 @@ def summarize_csv_with_model(df, llm):
     return data_summary
 
 
-def analyze_trend(df, llm, variable_of_interest):
+def analyze_trend(df, llm, variable_of_interest, dataset_key=None, method="pearson", top_k=TREND_TOP_K,
+                  profile=None):
     """
     Analyzes the correlation between the specified variable and other numeric
     variables in the DataFrame.
 
+    The coefficients are computed locally by the correlation engine; the language
+    model is only asked to interpret the top_k strongest ones.
+
     Args:
         df (pd.DataFrame): The input DataFrame for analysis.
         llm: The language model for generating responses.
         variable_of_interest (str): The variable for correlation analysis.
+        dataset_key (str): Content hash of the dataset, used to reuse cached results.
+        method (str): One of "pearson", "spearman" or "kendall".
+        top_k (int): Number of strongest correlations passed to the language model.
+        profile (DatasetProfile): The profile of df, used for the dataset digest.
 
     Returns:
         str: A summary of the correlation analysis in Turkish.
     """
-    pandas_agent = create_pandas_dataframe_agent(
-        llm,
-        df,
-        verbose=False,
-        allow_dangerous_code=True,
-        agent_kwargs={
-            'system_message': system_message,
-            'handle_parsing_errors': True,
-            'max_iterations': 150,
-            'max_execution_time': 300
-        }
-    )
+    if variable_of_interest not in numeric_columns(df):
+        return f"'{variable_of_interest}' sayısal bir sütun olmadığı için korelasyon analizi yapılamadı."
 
-    trend_response = pandas_agent.run(
-        f"Lütfen '{variable_of_interest}' değişkeni ile diğer sayısal değişkenler arasındaki "
-        "korelasyonu analiz edin ve sonuçları Türkçe cevaplamanı istiyorum."
-    )
+    correlations = correlations_with(df, variable_of_interest, method, dataset_key, top_k)
+    if correlations.empty:
+        return f"'{variable_of_interest}' ile karşılaştırılabilecek başka sayısal sütun bulunamadı."
+
+    results = "\n".join(f"- {name}: r = {value:.3f}" for name, value in correlations.items())
+    profile = profile if profile is not None else profile_dataframe(df)
+    focus = (variable_of_interest, *correlations.index)
+    with get_default_recorder().track("analyze_trend", llm, dataset_key) as metrics:
+        trend_response = complete(llm, TREND_PROMPT.format(
+            context=build_context(profile, TREND_CONTEXT_TOKENS, focus),
+            variable=variable_of_interest,
+            method=method,
+            top_k=len(correlations),
+            results=results
+        ), callbacks=[metrics])
 
     return trend_response
 
 
-def ask_question(df, llm, question):
+def _question_prompt(question, df, profile):
+    # Columns named in the question are described in full, even if the agent's
+    # digest had to shorten them.
+    focus = find_focus_columns(question, df.columns)
+    details = "".join("\n" + describe_column(profile.column(name), profile) for name in focus)
+    return question + QUESTION_SUFFIX + (f"\n{FOCUS_HEADER}{details}" if details else "")
+
+
+def _report_fields(report):
+    # The agent's own count of steps; the metrics handler only sees LLM calls.
+    return {
+        "iterations": report.iterations,
+        "stop_reason": report.stop_reason,
+        "question_type": report.question_type,
+    }
+
+
+def ask_question(df, llm, question, dataset_key=None, use_cache=True, profile=None, return_report=False):
     """
     Answers the given question based on the content of the DataFrame.
 
+    Answers are cached on disk per dataset fingerprint and normalized question, so
+    a repeated or nearly identical question is answered without an LLM call.
+
     Args:
         df (pd.DataFrame): The input DataFrame for answering questions.
         llm: The language model for generating responses.
         question (str): The question to be answered.
+        dataset_key (str): Content hash of the dataset, used to reuse its agent.
+        use_cache (bool): Whether to read and write the persistent answer cache.
+        profile (DatasetProfile): The profile of df, used for the agent's context.
+        return_report (bool): Whether to also return the BudgetReport of the run.
 
     Returns:
-        str: The answer generated by the language model in Turkish.
+        str: The answer generated by the language model in Turkish, or a tuple of
+        the answer and its BudgetReport when return_report is set.
     """
-    pandas_agent = create_pandas_dataframe_agent(
-        llm,
-        df,
-        verbose=False,
-        allow_dangerous_code=True,
-        agent_kwargs={
-            'system_message': system_message,
-            'handle_parsing_errors': True,
-            'max_iterations': 150,
-            'max_execution_time': 300
-        }
-    )
+    question_type = classify_question(question)
+    if use_cache:
+        answer_cache = get_default_answer_cache()
+        fingerprint = dataset_key or frame_fingerprint(df)
+        cached_answer = answer_cache.get(fingerprint, question, columns=df.columns, model=model_key(llm))
+        if cached_answer is not None:
+            report = BudgetReport(question_type, stop_reason="cache")
+            return (cached_answer, report) if return_report else cached_answer
 
-    ai_response = pandas_agent.run(
-        f"{question} Cevabınızı net ve doğrudan verin. Türkçe cevaplamanı istiyorum."
-    )
+    profile = profile if profile is not None else profile_dataframe(df)
+    pandas_agent = get_agent(df, llm, dataset_key, profile)
+    with get_default_recorder().track("ask_question", llm, dataset_key) as metrics:
+        ai_response, report = run_with_budget(
+            pandas_agent, _question_prompt(question, df, profile), question_type, callbacks=[metrics]
+        )
+        metrics.fields.update(_report_fields(report))
+
+    if use_cache and not ai_response.startswith(AGENT_STOPPED_PREFIX):
+        answer_cache.put(fingerprint, question, ai_response, model=model_key(llm))
+
+    return (ai_response, report) if return_report else ai_response
+
+
+@dataclass
+class StreamEvent:
+    """
+    One update of a streamed LLM run.
+
+    Attributes:
+        kind (str): "step" (the agent chose a tool), "observation" (a tool
+            returned), "token" (a piece of the final answer), "final" (the
+            complete answer) or "error".
+        content (str): The text of the update.
+        tool (str): The tool name of a step.
+        data (dict): The structured result of a final event: the summary of
+            stream_summary, or the BudgetReport of stream_question as a dict.
+    """
+    kind: str
+    content: str = ""
+    tool: str = None
+    data: dict = None
+
+
+class _QueueCallbackHandler(BaseCallbackHandler):
+    """
+    Forwards agent steps, tool results and final-answer tokens to a queue.
 
-    return ai_response
+    Tokens are buffered per LLM call until FINAL_ANSWER_MARKER appears, so the
+    reasoning of intermediate steps is not shown as answer text.
+    """
+
+    def __init__(self, events):
+        self.events = events
+        self._buffer = ""
+        self._answering = False
+
+    def _reset(self):
+        self._buffer = ""
+        self._answering = False
+
+    def on_llm_start(self, *args, **kwargs):
+        self._reset()
+
+    def on_chat_model_start(self, *args, **kwargs):
+        self._reset()
+
+    def on_llm_new_token(self, token, **kwargs):
+        if not self._answering:
+            self._buffer += token
+            marker = self._buffer.find(FINAL_ANSWER_MARKER)
+            if marker < 0:
+                return
+            self._answering = True
+            token, self._buffer = self._buffer[marker + len(FINAL_ANSWER_MARKER):], ""
+        if not self._buffer:
+            # Drop the whitespace between the marker and the answer.
+            token = token.lstrip()
+        if token:
+            self._buffer += token
+            self.events.put(StreamEvent("token", token))
+
+    def on_agent_action(self, action, **kwargs):
+        self.events.put(StreamEvent("step", str(action.tool_input), tool=action.tool))
+
+    def on_tool_end(self, output, **kwargs):
+        self.events.put(StreamEvent("observation", str(output)))
+
+
+def _drain(events, worker, timeout):
+    deadline = time.monotonic() + timeout
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            yield StreamEvent("error", TIMEOUT_MESSAGE.format(timeout=timeout))
+            return
+        try:
+            event = events.get(timeout=min(remaining, 0.1))
+        except queue.Empty:
+            if not worker.is_alive() and events.empty():
+                return
+            continue
+        if event is None:
+            return
+        yield event
+
+
+def stream_question(df, llm, question, dataset_key=None, use_cache=True, profile=None,
+                    timeout=SUMMARY_CALL_TIMEOUT):
+    """
+    Answers a question like ask_question, yielding the agent's progress as it happens.
+
+    The agent runs in a background thread whose callbacks feed a queue; this
+    generator yields "step" and "observation" events while the agent works,
+    "token" events while it writes the final answer and one "final" event with
+    the complete answer, whose data is the run's BudgetReport as a dict. Cached
+    answers are yielded as a single "final" event.
+
+    Args:
+        df (pd.DataFrame): The input DataFrame for answering questions.
+        llm: The language model. It must stream tokens (e.g. streaming=True)
+            for "token" events to appear.
+        question (str): The question to be answered.
+        dataset_key (str): Content hash of the dataset, used to reuse its agent.
+        use_cache (bool): Whether to read and write the persistent answer cache.
+        profile (DatasetProfile): The profile of df, used for the agent's context.
+        timeout (float): Seconds to wait for the agent before yielding an "error" event.
+
+    Yields:
+        StreamEvent: The progress events.
+    """
+    question_type = classify_question(question)
+    if use_cache:
+        answer_cache = get_default_answer_cache()
+        fingerprint = dataset_key or frame_fingerprint(df)
+        cached_answer = answer_cache.get(fingerprint, question, columns=df.columns, model=model_key(llm))
+        if cached_answer is not None:
+            yield StreamEvent("final", cached_answer, data=BudgetReport(question_type, stop_reason="cache").as_dict())
+            return
+
+    profile = profile if profile is not None else profile_dataframe(df)
+    pandas_agent = get_agent(df, llm, dataset_key, profile)
+    prompt = _question_prompt(question, df, profile)
+    events = queue.Queue()
+
+    def run():
+        try:
+            with get_default_recorder().track("stream_question", llm, dataset_key) as metrics:
+                try:
+                    answer, report = run_with_budget(
+                        pandas_agent, prompt, question_type, callbacks=[_QueueCallbackHandler(events), metrics]
+                    )
+                    metrics.fields.update(_report_fields(report))
+                    events.put(StreamEvent("final", answer, data=report.as_dict()))
+                except Exception as error:
+                    metrics.fields.update(stop_reason="error", error=f"{type(error).__name__}: {error}")
+                    events.put(StreamEvent("error", str(error)))
+        finally:
+            # Only after the metrics record is written, so it is complete when the stream ends.
+            events.put(None)
+
+    worker = threading.Thread(target=run, daemon=True)
+    worker.start()
+    for event in _drain(events, worker, timeout):
+        if event.kind == "final" and use_cache and not event.content.startswith(AGENT_STOPPED_PREFIX):
+            answer_cache.put(fingerprint, question, event.content, model=model_key(llm))
+        yield event
+
+
+def stream_summary(df, llm, profile=None, timeout=SUMMARY_CALL_TIMEOUT):
+    """
+    Produces the hybrid summary of summarize_hybrid, streaming the narrative.
+
+    The locally computed facts are available before the language model is
+    called, so a "step" event reporting them comes first; the narrative follows
+    as "token" events and a "final" event carries the summary dict in data.
+
+    Args:
+        df (pd.DataFrame): The input DataFrame to be summarized.
+        llm: The language model.
+        profile (DatasetProfile): The profile of df. Computed when not given.
+        timeout (float): Seconds to wait for the narrative.
+
+    Yields:
+        StreamEvent: The progress events.
+    """
+    df, profile = with_parsed_dates(df, profile)
+    facts, prompt = _narrative_request(df, profile)
+    yield StreamEvent("step", format_missing(facts) + " " + format_duplicates(facts), tool="summary_facts")
+
+    events = queue.Queue()
+
+    def run():
+        try:
+            with get_default_recorder().track("stream_summary", llm) as metrics:
+                try:
+                    messages = [system_message, HumanMessage(content=prompt)]
+                    for chunk in llm.stream(messages, config={"callbacks": [metrics]}):
+                        events.put(StreamEvent("token", getattr(chunk, "content", chunk)))
+                except Exception as error:
+                    metrics.fields.update(stop_reason="error", error=f"{type(error).__name__}: {error}")
+                    events.put(StreamEvent("error", str(error)))
+        finally:
+            events.put(None)
+
+    worker = threading.Thread(target=run, daemon=True)
+    worker.start()
+    narrative = []
+    for event in _drain(events, worker, timeout):
+        if event.kind == "token":
+            narrative.append(event.content)
+        yield event
+        if event.kind == "error":
+            return
+    answers = _hybrid_answers(facts, "".join(narrative))
+    yield StreamEvent("final", answers["column_descriptions"], data=answers)
+
+
+async def astream_question(*args, **kwargs):
+    """
+    Async iterator version of stream_question, for use inside an event loop.
+    Takes the same arguments.
+    """
+    events = stream_question(*args, **kwargs)
+    while True:
+        event = await asyncio.to_thread(next, events, None)
+        if event is None:
+            return
+        yield event
@@ -0,0 +1,304 @@
+"""
+dataset_cache.py: This module contains an in-memory, content-hash keyed cache for
+parsed datasets, so that Streamlit reruns reuse an already parsed upload instead of
+parsing and re-saving the file on every widget interaction. Parsed uploads are
+persisted in the columnar dataset store and reopened from there on a cache miss.
+"""
+
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+import pandas as pd
+
+import dataset_store
+from compaction import CompactionReport, compact_dataframe
+from ingest import read_csv_incremental
+from profiler import DatasetProfile, profile_dataframe
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BYTES = int(os.environ.get("INFAI_DATASET_CACHE_MB", "2048")) * 1024 * 1024
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+@dataclass
+class DatasetEntry:
+    """
+    A parsed dataset together with the artifacts derived from it.
+
+    Attributes:
+        key (str): Content hash of the raw upload.
+        name (str): Original file name of the upload.
+        df (pd.DataFrame): The parsed DataFrame.
+        nbytes (int): Deep memory usage of the DataFrame in bytes.
+        profile (DatasetProfile): Profile computed once when the upload is parsed.
+        compaction (CompactionReport): Memory report of the compaction stage, or
+            None when the dataset was not compacted.
+        last_access (float): Timestamp of the last cache hit.
+    """
+    key: str
+    name: str
+    df: pd.DataFrame
+    nbytes: int
+    profile: DatasetProfile = None
+    compaction: CompactionReport = None
+    last_access: float = field(default_factory=time.time)
+
+
+class DatasetCache:
+    """
+    A thread-safe LRU cache of parsed datasets bounded by a total byte budget.
+
+    The most recently inserted entry is always kept, even when it alone exceeds
+    the budget, so that the dataset currently on screen is never evicted. Pinned
+    entries, the datasets open in a session (see memory_governor.py), are kept too.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._pinned = frozenset()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Returns the entry stored under the given key and marks it as recently used.
+
+        Args:
+            key (str): Content hash of the dataset.
+
+        Returns:
+            DatasetEntry: The cached entry, or None when the key is not cached.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                entry.last_access = time.time()
+            return entry
+
+    def put(self, entry):
+        """
+        Stores an entry and evicts least recently used entries over the byte budget.
+
+        Args:
+            entry (DatasetEntry): The entry to be cached.
+        """
+        with self._lock:
+            self._entries[entry.key] = entry
+            self._entries.move_to_end(entry.key)
+            self._evict()
+
+    def _evict(self, max_bytes=None, keep=1):
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        total = self._total_bytes()
+        evicted = []
+        for key in list(self._entries)[:max(len(self._entries) - keep, 0)]:
+            if total <= max_bytes:
+                break
+            if key not in self._pinned:
+                total -= self._entries.pop(key).nbytes
+                evicted.append(key)
+        return evicted
+
+    def pin(self, keys):
+        """
+        Sets the datasets that eviction skips, e.g. the ones open in a session.
+
+        Args:
+            keys (set): Content hashes of the pinned datasets.
+        """
+        with self._lock:
+            self._pinned = frozenset(keys)
+
+    def shrink(self, max_bytes):
+        """
+        Evicts least recently used, unpinned entries until the cache holds at
+        most max_bytes.
+
+        Args:
+            max_bytes (int): The number of bytes to keep.
+
+        Returns:
+            list: The keys of the evicted entries.
+        """
+        with self._lock:
+            return self._evict(max_bytes, keep=0)
+
+    def entries(self):
+        """
+        Returns the cached entries, least recently used first.
+
+        Returns:
+            list: The DatasetEntry objects.
+        """
+        with self._lock:
+            return list(self._entries.values())
+
+    def _total_bytes(self):
+        return sum(entry.nbytes for entry in self._entries.values())
+
+    @property
+    def total_bytes(self):
+        with self._lock:
+            return self._total_bytes()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+
+_default_cache = DatasetCache()
+
+
+def get_default_cache():
+    """
+    Returns the process-wide dataset cache shared by all Streamlit reruns.
+
+    Returns:
+        DatasetCache: The shared cache instance.
+    """
+    return _default_cache
+
+
+def hash_file(file_obj):
+    """
+    Computes the SHA-256 content hash of a file-like object without consuming it.
+
+    Args:
+        file_obj: A binary file-like object, such as a Streamlit UploadedFile.
+
+    Returns:
+        str: The hexadecimal content hash.
+    """
+    digest = hashlib.sha256()
+    file_obj.seek(0)
+    for chunk in iter(lambda: file_obj.read(HASH_CHUNK_SIZE), b""):
+        digest.update(chunk)
+    file_obj.seek(0)
+    return digest.hexdigest()
+
+
+def frame_fingerprint(df):
+    """
+    Computes a content hash of an in-memory DataFrame whose upload hash is unknown.
+
+    Args:
+        df (pd.DataFrame): The DataFrame to be fingerprinted.
+
+    Returns:
+        str: The hexadecimal content hash.
+    """
+    digest = hashlib.sha256()
+    digest.update(repr([(str(name), str(dtype)) for name, dtype in df.dtypes.items()]).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def _entry_from_store(key, store_dir):
+    stored = dataset_store.load_dataset(key, store_dir)
+    if stored is None:
+        return None
+    record, df, metadata = stored
+    metadata = metadata or {}
+    profile = metadata.get("profile") or profile_dataframe(df)
+    return DatasetEntry(
+        key=key,
+        name=record["name"],
+        df=df,
+        nbytes=profile.memory,
+        profile=profile,
+        compaction=metadata.get("compaction")
+    )
+
+
+def open_stored_dataset(key, store_dir=dataset_store.DEFAULT_STORE_DIR, cache=None):
+    """
+    Opens a dataset saved in the dataset store, without any upload.
+
+    Args:
+        key (str): The dataset key, as listed by dataset_store.list_datasets.
+        store_dir (str): The store directory.
+        cache (DatasetCache): The cache to use. Defaults to the shared cache.
+
+    Returns:
+        DatasetEntry: The dataset entry, or None when the key is not stored.
+    """
+    cache = cache if cache is not None else get_default_cache()
+    entry = cache.get(key)
+    if entry is None:
+        entry = _entry_from_store(key, store_dir)
+        if entry is not None:
+            cache.put(entry)
+    return entry
+
+
+def load_uploaded_csv(uploaded_file, store_dir=dataset_store.DEFAULT_STORE_DIR, cache=None, on_progress=None,
+                      compact=True):
+    """
+    Parses an uploaded CSV file, reusing the cached DataFrame when the content is unchanged.
+
+    On a cache miss the dataset is reopened from the dataset store when this content
+    was stored before; otherwise the file is parsed in chunks, profiled and written
+    to the store. A rerun with the same content returns the cached entry without
+    touching the disk.
+
+    Args:
+        uploaded_file: The uploaded binary file-like object with a name attribute.
+        store_dir (str): Directory of the columnar dataset store.
+        cache (DatasetCache): The cache to use. Defaults to the shared cache.
+        on_progress (callable): Progress callback passed to read_csv_incremental.
+            Only called when the file is actually parsed.
+        compact (bool): Whether to downcast numerics, categorize low-cardinality
+            text and parse date columns after loading.
+
+    Returns:
+        DatasetEntry: The cached or newly parsed dataset entry.
+    """
+    cache = cache if cache is not None else get_default_cache()
+    content_hash = hash_file(uploaded_file)
+    key = content_hash + (":compact" if compact else "")
+
+    entry = open_stored_dataset(key, store_dir, cache)
+    if entry is not None:
+        return entry
+
+    df, profile, bytes_saved = read_csv_incremental(uploaded_file, on_progress=on_progress, downcast=compact)
+
+    report = None
+    if compact:
+        df, report, profile = compact_dataframe(df, profile, bytes_before=profile.memory + bytes_saved)
+
+    if dataset_store.is_available():
+        # The store only saves parsing on later visits, so failing to write it must not fail the upload.
+        try:
+            dataset_store.save_dataset(
+                df, key, uploaded_file.name, content_hash, store_dir,
+                metadata={"profile": profile, "compaction": report}
+            )
+        except dataset_store.WRITE_ERRORS:
+            logger.exception("Could not persist dataset %s to the store at %s", uploaded_file.name, store_dir)
+
+    entry = DatasetEntry(
+        key=key,
+        name=uploaded_file.name,
+        df=df,
+        nbytes=profile.memory,
+        profile=profile,
+        compaction=report
+    )
+    cache.put(entry)
+    return entry
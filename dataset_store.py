@@ -0,0 +1,226 @@
+"""
+dataset_store.py: This module contains a columnar on-disk store for parsed datasets.
+Datasets are written as Feather (Arrow IPC) or Parquet files next to a JSON manifest
+of their schema, content hash and row count, and are memory-mapped when reopened.
+"""
+
+import json
+import os
+import pickle
+import tempfile
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    feather = None
+    pq = None
+
+try:
+    import fcntl
+except ImportError:  # Windows; only threads of one process are serialized there.
+    fcntl = None
+
+DEFAULT_STORE_DIR = "data"
+DEFAULT_FORMAT = os.environ.get("INFAI_STORE_FORMAT", "feather")
+MANIFEST_NAME = "manifest.json"
+LOCK_NAME = "manifest.lock"
+FORMATS = {"feather": ".feather", "parquet": ".parquet"}
+
+# Errors of writing to the store, which callers may treat as the store being unavailable.
+WRITE_ERRORS = (OSError, pa.ArrowException) if pa is not None else (OSError,)
+
+_manifest_lock = threading.Lock()
+
+
+def is_available():
+    """
+    Checks whether the optional pyarrow dependency needed by the store is installed.
+    """
+    return feather is not None
+
+
+def _file_stem(key):
+    return key.replace(":", "_")
+
+
+def _manifest_path(store_dir):
+    return os.path.join(store_dir, MANIFEST_NAME)
+
+
+def read_manifest(store_dir=DEFAULT_STORE_DIR):
+    """
+    Reads the manifest of a store directory.
+
+    Args:
+        store_dir (str): The store directory.
+
+    Returns:
+        dict: Manifest records keyed by dataset key.
+    """
+    try:
+        with open(_manifest_path(store_dir), encoding="utf-8") as manifest_file:
+            return json.load(manifest_file)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+@contextmanager
+def _manifest_locked(store_dir):
+    """
+    Serializes read-modify-write cycles of the manifest across threads and, through
+    an advisory lock file, across processes such as the batch_cli workers.
+    """
+    with _manifest_lock, open(os.path.join(store_dir, LOCK_NAME), "a") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+@contextmanager
+def _replacing(path):
+    """
+    Yields a unique temporary path next to path and moves it into place once the
+    block succeeds, so a failed or interrupted write never leaves a truncated file
+    under the final name.
+    """
+    descriptor, temporary_path = tempfile.mkstemp(
+        dir=os.path.dirname(path) or ".", prefix=os.path.basename(path), suffix=".tmp"
+    )
+    os.close(descriptor)
+    try:
+        yield temporary_path
+        os.replace(temporary_path, path)
+    except BaseException:
+        try:
+            os.unlink(temporary_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+def _write_manifest(store_dir, manifest):
+    with _replacing(_manifest_path(store_dir)) as temporary_path:
+        with open(temporary_path, "w", encoding="utf-8") as manifest_file:
+            json.dump(manifest, manifest_file, ensure_ascii=False, indent=2)
+
+
+def list_datasets(store_dir=DEFAULT_STORE_DIR):
+    """
+    Lists the stored datasets whose files still exist, newest first.
+
+    Args:
+        store_dir (str): The store directory.
+
+    Returns:
+        list: Manifest records with key, name, hash, rows, schema, format and created.
+    """
+    records = [
+        record for record in read_manifest(store_dir).values()
+        if os.path.exists(os.path.join(store_dir, record["file"]))
+    ]
+    return sorted(records, key=lambda record: record["created"], reverse=True)
+
+
+def save_dataset(df, key, name, content_hash, store_dir=DEFAULT_STORE_DIR, file_format=DEFAULT_FORMAT,
+                 metadata=None):
+    """
+    Writes a DataFrame to the store and records it in the manifest.
+
+    Args:
+        df (pd.DataFrame): The dataset to be stored.
+        key (str): The dataset key, unique within the store.
+        name (str): The original file name shown to users.
+        content_hash (str): Content hash of the original upload.
+        store_dir (str): The store directory.
+        file_format (str): "feather" (uncompressed, memory-mappable) or "parquet".
+        metadata (dict): Derived artifacts, such as the profile, pickled next to the data.
+
+    Returns:
+        dict: The manifest record of the stored dataset.
+    """
+    if not is_available():
+        raise ImportError("The dataset store requires pyarrow. Install it with `pip install pyarrow`.")
+    if file_format not in FORMATS:
+        raise ValueError(f"Unsupported store format '{file_format}'. Must be one of {tuple(FORMATS)}.")
+
+    os.makedirs(store_dir, exist_ok=True)
+    file_name = _file_stem(key) + FORMATS[file_format]
+    path = os.path.join(store_dir, file_name)
+    frame = df.reset_index(drop=True)
+    with _replacing(path) as temporary_path:
+        if file_format == "feather":
+            feather.write_feather(frame, temporary_path, compression="uncompressed")
+        else:
+            frame.to_parquet(temporary_path, index=False)
+
+    if metadata is not None:
+        with _replacing(os.path.join(store_dir, _file_stem(key) + ".meta.pkl")) as temporary_path:
+            with open(temporary_path, "wb") as metadata_file:
+                pickle.dump(metadata, metadata_file)
+
+    record = {
+        "key": key,
+        "name": name,
+        "hash": content_hash,
+        "file": file_name,
+        "format": file_format,
+        "rows": int(len(df)),
+        "schema": {str(column): str(dtype) for column, dtype in df.dtypes.items()},
+        "bytes": os.path.getsize(path),
+        "created": datetime.now().isoformat(timespec="seconds"),
+    }
+    with _manifest_locked(store_dir):
+        manifest = read_manifest(store_dir)
+        manifest[key] = record
+        _write_manifest(store_dir, manifest)
+    return record
+
+
+def load_dataset(key, store_dir=DEFAULT_STORE_DIR):
+    """
+    Reopens a stored dataset, memory-mapping its file.
+
+    Args:
+        key (str): The dataset key.
+        store_dir (str): The store directory.
+
+    Returns:
+        tuple: The manifest record, the pd.DataFrame and the pickled metadata
+        (None when none was stored), or None when the key is not stored.
+    """
+    if not is_available():
+        return None
+    record = read_manifest(store_dir).get(key)
+    if record is None:
+        return None
+    path = os.path.join(store_dir, record["file"])
+    if not os.path.exists(path):
+        return None
+
+    if record["format"] == "feather":
+        table = feather.read_table(path, memory_map=True)
+    else:
+        table = pq.read_table(path, memory_map=True)
+    df = table.to_pandas(split_blocks=True, self_destruct=True)
+    del table
+
+    metadata = None
+    metadata_path = os.path.join(store_dir, _file_stem(key) + ".meta.pkl")
+    if os.path.exists(metadata_path):
+        try:
+            with open(metadata_path, "rb") as metadata_file:
+                metadata = pickle.load(metadata_file)
+        except Exception:
+            # Metadata written by an incompatible version is simply recomputed.
+            metadata = None
+    return record, df, metadata
@@ -0,0 +1,133 @@
+"""
+exporter.py: This module contains the on-demand export of datasets to CSV, gzip
+compressed CSV, JSON, Excel and Parquet. Files are serialized in memory only when
+they are requested, and the resulting bytes are cached per dataset and format.
+"""
+
+import io
+import os
+
+from byte_cache import ByteCache
+
+DEFAULT_MAX_BYTES = int(os.environ.get("INFAI_EXPORT_CACHE_MB", "256")) * 1024 * 1024
+EXCEL_MAX_ROWS = 1_048_575
+
+
+def _write_csv(df, buffer):
+    df.to_csv(buffer, index=False, encoding="utf-8")
+
+
+def _write_csv_gzip(df, buffer):
+    # A fixed mtime keeps the archive bytes identical for identical data.
+    df.to_csv(buffer, index=False, encoding="utf-8", compression={"method": "gzip", "mtime": 0})
+
+
+def _write_json(df, buffer):
+    df.to_json(buffer, orient="records", date_format="iso", force_ascii=False)
+
+
+def _write_excel(df, buffer):
+    if len(df) > EXCEL_MAX_ROWS:
+        raise ValueError(f"Excel sayfaları en fazla {EXCEL_MAX_ROWS:,} satır alabilir; veri {len(df):,} satır.")
+    import pandas as pd
+
+    with pd.ExcelWriter(buffer, engine="xlsxwriter") as writer:
+        df.to_excel(writer, index=False, sheet_name="Data")
+
+
+def _write_parquet(df, buffer):
+    df.to_parquet(buffer, index=False)
+
+
+FORMATS = {
+    "csv": {"label": "CSV", "extension": ".csv", "mime": "text/csv", "writer": _write_csv},
+    "csv.gz": {"label": "CSV (gzip)", "extension": ".csv.gz", "mime": "application/gzip",
+               "writer": _write_csv_gzip},
+    "json": {"label": "JSON", "extension": ".json", "mime": "application/json", "writer": _write_json},
+    "xlsx": {"label": "Excel", "extension": ".xlsx",
+             "mime": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+             "writer": _write_excel},
+    "parquet": {"label": "Parquet", "extension": ".parquet", "mime": "application/vnd.apache.parquet",
+                "writer": _write_parquet},
+}
+
+
+def export_file_name(name, file_format):
+    """
+    Builds the download name of an export, e.g. "sales.csv" -> "sales_processed.csv.gz".
+
+    Args:
+        name (str): The original file name.
+        file_format (str): A key of FORMATS.
+
+    Returns:
+        str: The file name.
+    """
+    return f"{os.path.splitext(name)[0]}_processed{FORMATS[file_format]['extension']}"
+
+
+def serialize(df, file_format):
+    """
+    Serializes a DataFrame to an in-memory file.
+
+    Args:
+        df (pd.DataFrame): The DataFrame to be exported.
+        file_format (str): A key of FORMATS.
+
+    Returns:
+        bytes: The file contents.
+
+    Raises:
+        ValueError: If the format is unknown or the data does not fit the format.
+        ImportError: If the writer of the format (xlsxwriter, pyarrow) is missing.
+    """
+    if file_format not in FORMATS:
+        raise ValueError(f"Unsupported export format '{file_format}'. Must be one of {tuple(FORMATS)}.")
+    buffer = io.BytesIO()
+    FORMATS[file_format]["writer"](df, buffer)
+    return buffer.getvalue()
+
+
+class ExportCache(ByteCache):
+    """
+    A thread-safe LRU cache of exported files keyed by (dataset key, format) and
+    bounded by a total byte budget.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        super().__init__(max_bytes)
+
+
+_default_cache = ExportCache()
+
+
+def get_default_export_cache():
+    """
+    Returns the process-wide export cache.
+
+    Returns:
+        ExportCache: The shared cache instance.
+    """
+    return _default_cache
+
+
+def export_dataset(df, dataset_key, file_format, cache=None):
+    """
+    Returns the dataset serialized to the given format, building it only on a cache miss.
+
+    Args:
+        df (pd.DataFrame): The dataset.
+        dataset_key (str): Content hash of the dataset.
+        file_format (str): A key of FORMATS.
+        cache (ExportCache): The cache to use. Defaults to the process-wide cache.
+
+    Returns:
+        bytes: The file contents.
+    """
+    cache = cache if cache is not None else get_default_export_cache()
+    key = (dataset_key, file_format)
+    data = cache.get(key)
+    if data is None:
+        data = serialize(df, file_format)
+        cache.put(key, data)
+    return data
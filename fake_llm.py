@@ -0,0 +1,322 @@
+"""
+fake_llm.py: This module contains an offline, deterministic stand-in for the chat
+model, for load-testing the agent paths without an API. The model either replays
+agent trajectories recorded from real runs or follows scripted tool-call patterns,
+with configurable latency and completion-token distributions. Its answers depend
+only on the prompt and the seed, so a model shared by concurrent sessions answers
+every session the same way regardless of scheduling.
+
+A recording is made by attaching a TrajectoryRecorder to a real model, or by
+setting INFAI_RECORD_TRAJECTORIES when the model is built with data_utils.build_llm.
+Setting INFAI_FAKE_LLM makes build_llm return the fake model instead.
+"""
+
+import hashlib
+import json
+import math
+import os
+import random
+import threading
+import time
+from dataclasses import dataclass
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from pydantic import Field
+
+from context_builder import count_tokens
+
+# "1" follows the scripts, any other value is the path of recorded trajectories.
+FAKE_LLM = os.environ.get("INFAI_FAKE_LLM")
+FAKE_LATENCY = os.environ.get("INFAI_FAKE_LATENCY", "lognormal:0.8,0.5")
+FAKE_TOKENS = os.environ.get("INFAI_FAKE_TOKENS", "lognormal:80,0.6")
+RECORD_TRAJECTORIES = os.environ.get("INFAI_RECORD_TRAJECTORIES")
+
+DISTRIBUTIONS = ("constant", "uniform", "normal", "lognormal")
+QUESTION_MARKER = "\nQuestion: "
+OBSERVATION_MARKER = "\nObservation:"
+# Replaced by filler text of the sampled completion length.
+FILLER = "<filler>"
+FILLER_WORDS = ("veri", "sütun", "değer", "satış", "ortalama", "toplam", "analiz", "sonuç", "artış", "dağılım")
+FINAL_STEP = f"Thought: I now know the final answer\nFinal Answer: {FILLER}"
+
+# Tool inputs of the scripted trajectories. They only use df, so they run on any dataset.
+SCRIPTS = {
+    "lookup": ("len(df)",),
+    "aggregate": ("df.shape", "df.describe()"),
+    "explore": ("df.shape", "df.dtypes", "df.isnull().sum()", "df.describe()"),
+    # Repeats a tool call, which agent_budget stops as a loop.
+    "loop": ("df.head()", "df.head()"),
+}
+DEFAULT_SCRIPTS = ("lookup", "aggregate", "explore")
+
+
+@dataclass(frozen=True)
+class Distribution:
+    """
+    A distribution of non-negative values.
+
+    Attributes:
+        kind (str): "constant" (a), "uniform" (between a and b), "normal" (mean a,
+            standard deviation b) or "lognormal" (median a, sigma b).
+        a (float): The first parameter.
+        b (float): The second parameter.
+    """
+    kind: str = "constant"
+    a: float = 0.0
+    b: float = 0.0
+
+    def __post_init__(self):
+        if self.kind not in DISTRIBUTIONS:
+            raise ValueError(f"Unknown distribution '{self.kind}', expected one of {', '.join(DISTRIBUTIONS)}.")
+
+    @classmethod
+    def parse(cls, text):
+        """
+        Parses "kind:a,b", e.g. "lognormal:0.8,0.5", or a plain number for a constant.
+
+        Args:
+            text (str): The distribution.
+
+        Returns:
+            Distribution: The parsed distribution.
+        """
+        kind, _, params = str(text).partition(":")
+        if not params:
+            return cls("constant", float(kind))
+        values = [float(value) for value in params.split(",")]
+        return cls(kind, *values)
+
+    def sample(self, rng):
+        if self.kind == "uniform":
+            value = rng.uniform(self.a, self.b)
+        elif self.kind == "normal":
+            value = rng.gauss(self.a, self.b)
+        elif self.kind == "lognormal":
+            value = self.a * math.exp(rng.gauss(0.0, self.b)) if self.a > 0 else 0.0
+        else:
+            value = self.a
+        return max(value, 0.0)
+
+
+@dataclass(frozen=True)
+class Trajectory:
+    """
+    The completions of one agent run, one per step.
+
+    Attributes:
+        steps (tuple): The completion texts. FILLER in a text is replaced by
+            filler words of the sampled completion length.
+        question (str): The question the trajectory answers, or None for a
+            trajectory that may answer any question.
+    """
+    steps: tuple
+    question: str = None
+
+
+def scripted_trajectory(tool_inputs, question=None):
+    """
+    Builds a trajectory that calls python_repl_ast with each input in turn and
+    then gives a final answer.
+
+    Args:
+        tool_inputs (tuple): The code of each tool call.
+        question (str): The question the trajectory answers.
+
+    Returns:
+        Trajectory: The trajectory.
+    """
+    steps = tuple(
+        f"Thought: {FILLER}\nAction: python_repl_ast\nAction Input: {tool_input}" for tool_input in tool_inputs
+    )
+    return Trajectory(steps + (FINAL_STEP,), question)
+
+
+def agent_position(prompt):
+    """
+    Finds where an agent run is from the text of its prompt.
+
+    Returns:
+        tuple: The question and the number of steps already taken, or (None, 0)
+        when the prompt is not a ReAct agent prompt.
+    """
+    head, marker, tail = prompt.rpartition(QUESTION_MARKER)
+    if not marker or "Action Input:" not in head:
+        return None, 0
+    question = tail.split("\nThought:", 1)[0].strip()
+    return question, tail.count(OBSERVATION_MARKER)
+
+
+def _prompt_text(messages):
+    return "\n".join(str(message.content) for message in messages)
+
+
+def _stable_hash(*parts):
+    digest = hashlib.sha1("\x00".join(str(part) for part in parts).encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big")
+
+
+def _filler(tokens, rng):
+    return " ".join(rng.choice(FILLER_WORDS) for _ in range(max(1, tokens))).capitalize() + "."
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    A chat model that answers from trajectories after a sampled delay.
+
+    Agent prompts are answered with the next step of a trajectory: the recorded
+    one for the same question, otherwise one picked by a hash of the question.
+    Other prompts (the hybrid summary, the trend analysis) get filler text.
+    """
+
+    trajectories: list = Field(default_factory=list)
+    scripts: tuple = DEFAULT_SCRIPTS
+    latency: Distribution = Field(default_factory=lambda: Distribution.parse(FAKE_LATENCY))
+    completion_tokens: Distribution = Field(default_factory=lambda: Distribution.parse(FAKE_TOKENS))
+    seed: int = 0
+    model_name: str = "infai-fake"
+
+    @property
+    def _llm_type(self):
+        return "infai-fake"
+
+    @property
+    def _identifying_params(self):
+        # The agent registry caches agents per model identity, so models with
+        # different behaviour must not look alike.
+        return {
+            "model_name": self.model_name,
+            "seed": self.seed,
+            "scripts": self.scripts,
+            "trajectories": _stable_hash(*(trajectory for trajectory in self.trajectories)),
+            "latency": self.latency,
+            "completion_tokens": self.completion_tokens,
+        }
+
+    def _trajectory(self, question):
+        for trajectory in self.trajectories:
+            if trajectory.question == question:
+                return trajectory
+        if self.trajectories:
+            return self.trajectories[_stable_hash(self.seed, question) % len(self.trajectories)]
+        name = self.scripts[_stable_hash(self.seed, question) % len(self.scripts)]
+        return scripted_trajectory(SCRIPTS[name])
+
+    def respond(self, messages):
+        """
+        Picks the answer to a prompt without waiting.
+
+        Returns:
+            tuple: The answer text and the seconds the call should take.
+        """
+        prompt = _prompt_text(messages)
+        rng = random.Random(_stable_hash(self.seed, prompt))
+        latency = self.latency.sample(rng)
+        tokens = round(self.completion_tokens.sample(rng))
+        question, step = agent_position(prompt)
+        if question is None:
+            return _filler(tokens, rng), latency
+        steps = self._trajectory(question).steps
+        if step < len(steps):
+            text = steps[step]
+        else:
+            # The agent went past the trajectory, e.g. after a tool error.
+            text = steps[-1] if "Final Answer:" in steps[-1] else FINAL_STEP
+        return text.replace(FILLER, _filler(tokens, rng)), latency
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        text, latency = self.respond(messages)
+        time.sleep(latency)
+        usage = {"prompt_tokens": count_tokens(_prompt_text(messages)), "completion_tokens": count_tokens(text)}
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        return ChatResult(
+            generations=[ChatGeneration(message=AIMessage(content=text))],
+            llm_output={"token_usage": usage, "model_name": self.model_name},
+        )
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        text, latency = self.respond(messages)
+        words = text.split(" ")
+        pieces = [word + " " for word in words[:-1]] + [words[-1]]
+        for piece in pieces:
+            # The delay is spread over the pieces, like tokens arriving from an API.
+            time.sleep(latency / len(pieces))
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=piece))
+            if run_manager is not None:
+                run_manager.on_llm_new_token(piece, chunk=chunk)
+            yield chunk
+
+
+class TrajectoryRecorder(BaseCallbackHandler):
+    """
+    Appends every agent step a model completes to a JSONL file, as lines of
+    question, step and text that load_trajectories turns back into trajectories.
+    Attach it to a real model with llm.callbacks = [TrajectoryRecorder(path)].
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._positions = {}
+        self._lock = threading.Lock()
+
+    def on_llm_start(self, serialized, prompts, *, run_id=None, **kwargs):
+        self._positions[run_id] = agent_position("\n".join(prompts))
+
+    def on_chat_model_start(self, serialized, messages, *, run_id=None, **kwargs):
+        self._positions[run_id] = agent_position(_prompt_text(messages[0]))
+
+    def on_llm_end(self, response, *, run_id=None, **kwargs):
+        question, step = self._positions.pop(run_id, (None, 0))
+        if question is None or not response.generations or not response.generations[0]:
+            return
+        line = json.dumps(
+            {"question": question, "step": step, "text": response.generations[0][0].text}, ensure_ascii=False
+        )
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._lock, open(self.path, "a", encoding="utf-8") as trajectory_file:
+            trajectory_file.write(line + "\n")
+
+
+def load_trajectories(path):
+    """
+    Reads the trajectories a TrajectoryRecorder wrote. When a question was
+    recorded more than once, its latest run is kept.
+
+    Args:
+        path (str): The JSONL file.
+
+    Returns:
+        list: The trajectories.
+    """
+    runs = {}
+    with open(path, encoding="utf-8") as trajectory_file:
+        for line in trajectory_file:
+            try:
+                step = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if step["step"] == 0 or step["question"] not in runs:
+                runs[step["question"]] = {}
+            runs[step["question"]][step["step"]] = step["text"]
+    return [
+        Trajectory(tuple(steps[index] for index in sorted(steps)), question) for question, steps in runs.items()
+    ]
+
+
+def build_fake_llm(source=FAKE_LLM, seed=0):
+    """
+    Builds the fake model from INFAI_FAKE_LLM and the INFAI_FAKE_* distributions.
+
+    Args:
+        source (str): "1" to follow the scripts, or the path of recorded trajectories.
+        seed (int): The seed of the sampled latencies and completion lengths.
+
+    Returns:
+        FakeChatModel: The model.
+    """
+    trajectories = load_trajectories(source) if source and source != "1" else []
+    return FakeChatModel(trajectories=trajectories, seed=seed)
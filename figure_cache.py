@@ -0,0 +1,73 @@
+"""
+figure_cache.py: This module contains an LRU cache of rendered figures stored as PNG
+bytes. A cache hit returns the image without touching matplotlib; on a miss the
+figure is drawn, rendered once and closed explicitly so that memory does not grow
+over the session.
+"""
+
+import io
+import os
+import threading
+
+from byte_cache import ByteCache
+
+DEFAULT_MAX_BYTES = int(os.environ.get("INFAI_FIGURE_CACHE_MB", "64")) * 1024 * 1024
+DPI = 100
+
+# pyplot keeps one global registry of open figures, so figures are drawn one at a
+# time; that way the figures opened during a draw are known to belong to it.
+_pyplot_lock = threading.Lock()
+
+
+class FigureCache(ByteCache):
+    """
+    A thread-safe LRU cache of PNG images bounded by a total byte budget.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        super().__init__(max_bytes)
+
+    def render(self, key, draw):
+        """
+        Returns the PNG image cached under key, drawing it on a miss.
+
+        Args:
+            key (tuple): Hashable description of everything the figure depends on,
+                e.g. (dataset hash, plot kind, column, plot type, color).
+            draw (callable): Builds and returns a matplotlib figure.
+
+        Returns:
+            bytes: The PNG image.
+        """
+        image = self.get(key)
+        if image is not None:
+            return image
+
+        import matplotlib.pyplot as plt
+
+        with _pyplot_lock:
+            opened = set(plt.get_fignums())
+            try:
+                fig = draw()
+                buffer = io.BytesIO()
+                fig.savefig(buffer, format="png", dpi=DPI)
+            finally:
+                # Also closes the figure of a draw that failed after creating it.
+                for number in set(plt.get_fignums()) - opened:
+                    plt.close(number)
+        image = buffer.getvalue()
+        self.put(key, image)
+        return image
+
+
+_default_cache = FigureCache()
+
+
+def get_default_figure_cache():
+    """
+    Returns the process-wide figure cache.
+
+    Returns:
+        FigureCache: The shared cache instance.
+    """
+    return _default_cache
@@ -0,0 +1,93 @@
+"""
+ingest.py: This module contains chunked CSV ingestion. Large uploads are parsed in
+fixed-size row chunks whose numeric columns are downcast as they arrive, while the
+dataset profile is built incrementally and progress is reported after each chunk.
+"""
+
+import os
+
+import pandas as pd
+
+from compaction import downcast_frame
+from profiler import ProfileBuilder, is_categorical_column
+
+CHUNK_ROWS = int(os.environ.get("INFAI_CHUNK_ROWS", "250000"))
+
+
+def _file_size(file_obj):
+    size = getattr(file_obj, "size", None)
+    if size is None:
+        position = file_obj.tell()
+        size = file_obj.seek(0, os.SEEK_END)
+        file_obj.seek(position)
+    return size
+
+
+def _mixed_columns(chunk_dtypes):
+    """
+    Returns the columns parsed as text in some chunks and as numbers or booleans
+    in others. pd.concat keeps such columns as objects mixing numbers and strings,
+    which neither pd.read_csv produces nor Arrow can store. Chunks where a column
+    has no values are ignored, since they are parsed as float whatever the column.
+    """
+    kinds = {}
+    for dtypes in chunk_dtypes:
+        for name, dtype in dtypes.items():
+            kinds.setdefault(name, set()).add(is_categorical_column(dtype))
+    return [name for name, seen in kinds.items() if len(seen) > 1]
+
+
+def read_csv_incremental(file_obj, chunksize=CHUNK_ROWS, on_progress=None, downcast=True, dtype=None):
+    """
+    Reads a CSV file chunk by chunk, building its profile along the way.
+
+    Each chunk infers its own dtypes, so a numeric column with a non-numeric
+    value in a later chunk would come out mixed. Such columns are detected and
+    the file is parsed once more with them read as text, which gives the same
+    values as pd.read_csv.
+
+    Args:
+        file_obj: A binary file-like object positioned at the start of the CSV.
+        chunksize (int): Number of rows parsed per chunk.
+        on_progress (callable): Called after every chunk as
+            on_progress(fraction, partial_profile), where fraction is the share of
+            the file's bytes consumed so far.
+        downcast (bool): Whether to narrow numeric dtypes chunk by chunk.
+        dtype (dict): Dtypes of columns that are not inferred, as in pd.read_csv.
+
+    Returns:
+        tuple: The parsed pd.DataFrame, its DatasetProfile and the number of bytes
+        saved by downcasting.
+    """
+    start = file_obj.tell()
+    total_bytes = _file_size(file_obj) or 1
+    builder = ProfileBuilder()
+    chunks = []
+    chunk_dtypes = []
+    bytes_saved = 0
+
+    with pd.read_csv(file_obj, chunksize=chunksize, dtype=dtype) as reader:
+        for chunk in reader:
+            present = chunk.notna().any()
+            chunk_dtypes.append(chunk.dtypes[present])
+            if downcast:
+                chunk, saved = downcast_frame(chunk)
+                bytes_saved += saved
+            chunks.append(chunk)
+            builder.update(chunk)
+            if on_progress is not None:
+                on_progress(min(file_obj.tell() / total_bytes, 1.0), builder.build())
+
+    mixed = _mixed_columns(chunk_dtypes)
+    if mixed:
+        del chunks
+        file_obj.seek(start)
+        text_columns = {**(dtype or {}), **{name: str for name in mixed}}
+        return read_csv_incremental(file_obj, chunksize, on_progress, downcast, dtype=text_columns)
+
+    df = pd.concat(chunks, ignore_index=True) if len(chunks) > 1 else chunks[0]
+    del chunks
+
+    if on_progress is not None:
+        on_progress(1.0, builder.build())
+    return df, builder.build(dtypes=df.dtypes), bytes_saved
@@ -0,0 +1,344 @@
+"""
+llm_metrics.py: This module contains the instrumentation of LLM calls. A LangChain
+callback handler records the latency and prompt/completion tokens of every model
+call, every tool invocation and the number of agent iterations of one entry-point
+call (a question, a summary, a trend analysis). The resulting records are
+appended to a local JSONL file or SQLite database and summarized as p50/p95
+percentiles for the diagnostics panel.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from contextlib import closing, contextmanager
+from datetime import datetime
+
+import pandas as pd
+
+from agent_budget import TokenUsageHandler
+
+METRICS_ENABLED = os.environ.get("INFAI_METRICS", "1") != "0"
+DEFAULT_METRICS_PATH = os.environ.get("INFAI_METRICS_PATH", os.path.join("data", "llm_metrics.jsonl"))
+DEFAULT_READ_LIMIT = 5000
+# The JSONL file is rotated to <path>.1 once it reaches this size.
+MAX_METRICS_BYTES = int(os.environ.get("INFAI_METRICS_MAX_MB", "64")) * 1024 * 1024
+SUMMARY_METRICS = ("latency", "tokens", "iterations", "tool_calls")
+RECORD_COLUMNS = {
+    "timestamp": "TEXT",
+    "entry_point": "TEXT",
+    "model": "TEXT",
+    "dataset_key": "TEXT",
+    "latency": "REAL",
+    "iterations": "INTEGER",
+    "llm_calls": "INTEGER",
+    "tool_calls": "INTEGER",
+    "prompt_tokens": "INTEGER",
+    "completion_tokens": "INTEGER",
+    "tokens": "INTEGER",
+    "question_type": "TEXT",
+    "stop_reason": "TEXT",
+    "error": "TEXT",
+}
+
+
+class LLMMetricsHandler(TokenUsageHandler):
+    """
+    Collects the trace of one entry-point call: each LLM call with its latency
+    and tokens, and each tool invocation with its latency and outcome.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.llm_calls = []
+        self.tool_calls = []
+        self.errors = []
+        # Record fields only the caller knows, e.g. the agent's iterations or stop reason.
+        self.fields = {}
+        self._started = {}
+        self._tools = {}
+        self._lock = threading.Lock()
+
+    def _start(self, run_id):
+        with self._lock:
+            self._started[run_id] = time.perf_counter()
+
+    def _elapsed(self, run_id):
+        with self._lock:
+            started = self._started.pop(run_id, None)
+        return None if started is None else time.perf_counter() - started
+
+    def on_llm_start(self, serialized, prompts, *, run_id=None, **kwargs):
+        super().on_llm_start(serialized, prompts, run_id=run_id, **kwargs)
+        self._start(run_id)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id=None, **kwargs):
+        super().on_chat_model_start(serialized, messages, run_id=run_id, **kwargs)
+        self._start(run_id)
+
+    def on_usage(self, run_id, prompt_tokens, completion_tokens):
+        self.llm_calls.append({
+            "latency": self._elapsed(run_id),
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+        })
+
+    def on_llm_error(self, error, *, run_id=None, **kwargs):
+        self._elapsed(run_id)
+        self.errors.append(f"{type(error).__name__}: {error}")
+
+    def on_tool_start(self, serialized, input_str, *, run_id=None, **kwargs):
+        self._start(run_id)
+        with self._lock:
+            self._tools[run_id] = (serialized or {}).get("name", "tool")
+
+    def on_tool_end(self, output, *, run_id=None, **kwargs):
+        self._finish_tool(run_id, None)
+
+    def on_tool_error(self, error, *, run_id=None, **kwargs):
+        self._finish_tool(run_id, f"{type(error).__name__}: {error}")
+
+    def _finish_tool(self, run_id, error):
+        latency = self._elapsed(run_id)
+        with self._lock:
+            tool = self._tools.pop(run_id, "tool")
+        self.tool_calls.append({"tool": tool, "latency": latency, "error": error})
+
+
+class JSONLSink:
+    """
+    Appends records as JSON lines to a local file. Once the file reaches
+    max_bytes it is renamed to <path>.1, replacing the previous one, so at most
+    twice max_bytes are kept.
+    """
+
+    def __init__(self, path, max_bytes=MAX_METRICS_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    @property
+    def rotated_path(self):
+        return f"{self.path}.1"
+
+    def write(self, record):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        line = json.dumps(record, ensure_ascii=False, default=str)
+        with self._lock:
+            try:
+                if os.path.getsize(self.path) >= self.max_bytes:
+                    os.replace(self.path, self.rotated_path)
+            except FileNotFoundError:
+                pass
+            with open(self.path, "a", encoding="utf-8") as metrics_file:
+                metrics_file.write(line + "\n")
+
+    @staticmethod
+    def _tail(path, limit):
+        try:
+            with open(path, encoding="utf-8") as metrics_file:
+                return deque(metrics_file, maxlen=limit)
+        except FileNotFoundError:
+            return deque()
+
+    def read(self, limit=DEFAULT_READ_LIMIT):
+        with self._lock:
+            lines = self._tail(self.path, limit)
+            if len(lines) < limit:
+                lines.extendleft(reversed(self._tail(self.rotated_path, limit - len(lines))))
+        records = []
+        for line in lines:
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue  # a line cut short by a crash
+        return records
+
+
+class SQLiteSink:
+    """
+    Stores records in a local SQLite database, one row per entry-point call with
+    the per-call trace kept as JSON.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with closing(self._connect()) as connection, connection:
+            columns = ", ".join(f"{column} {sql_type}" for column, sql_type in RECORD_COLUMNS.items())
+            connection.execute(
+                f"CREATE TABLE IF NOT EXISTS llm_calls (id INTEGER PRIMARY KEY AUTOINCREMENT, {columns}, trace TEXT)"
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=10)
+
+    def write(self, record):
+        values = [record.get(column) for column in RECORD_COLUMNS]
+        trace = json.dumps({"llm": record.get("llm"), "tools": record.get("tools")}, default=str)
+        with closing(self._connect()) as connection, connection:
+            connection.execute(
+                f"INSERT INTO llm_calls ({', '.join(RECORD_COLUMNS)}, trace) "
+                f"VALUES ({', '.join('?' * (len(RECORD_COLUMNS) + 1))})",
+                [*values, trace],
+            )
+
+    def read(self, limit=DEFAULT_READ_LIMIT):
+        with closing(self._connect()) as connection, connection:
+            connection.row_factory = sqlite3.Row
+            rows = connection.execute(
+                f"SELECT {', '.join(RECORD_COLUMNS)}, trace FROM llm_calls ORDER BY id DESC LIMIT ?", (limit,)
+            ).fetchall()
+        records = []
+        for row in reversed(rows):
+            record = {column: row[column] for column in RECORD_COLUMNS}
+            trace = json.loads(row["trace"] or "{}")
+            record["llm"], record["tools"] = trace.get("llm"), trace.get("tools")
+            records.append(record)
+        return records
+
+
+def open_sink(path):
+    """
+    Opens the sink matching the file extension: SQLite for .db/.sqlite, JSONL otherwise.
+
+    Args:
+        path (str): Path of the metrics file.
+
+    Returns:
+        JSONLSink | SQLiteSink: The sink.
+    """
+    if os.path.splitext(path)[1].lower() in (".db", ".sqlite", ".sqlite3"):
+        return SQLiteSink(path)
+    return JSONLSink(path)
+
+
+class MetricsRecorder:
+    """
+    Writes the record of every tracked call to a sink. A recorder without a sink
+    still builds handlers, so callers do not need to check whether it is enabled.
+    """
+
+    def __init__(self, sink=None):
+        self.sink = sink
+
+    @contextmanager
+    def track(self, entry_point, llm=None, dataset_key=None):
+        """
+        Instruments one entry-point call.
+
+        Pass the yielded handler in the callbacks of every LLM and agent call
+        made for the entry point. Fields of the record that only the caller
+        knows, such as iterations or stop_reason, can be set in handler.fields.
+
+        Args:
+            entry_point (str): Name of the data_utils function, e.g. "ask_question".
+            llm: The language model, for the model name.
+            dataset_key (str): Content hash of the dataset.
+
+        Yields:
+            LLMMetricsHandler: The handler of the call.
+        """
+        handler = LLMMetricsHandler()
+        started = time.perf_counter()
+        error = None
+        try:
+            yield handler
+        except BaseException as exception:
+            error = f"{type(exception).__name__}: {exception}"
+            raise
+        finally:
+            if self.sink is not None:
+                self.sink.write(build_record(
+                    handler, entry_point, time.perf_counter() - started, model_name(llm), dataset_key, error
+                ))
+
+    def read(self, limit=DEFAULT_READ_LIMIT):
+        return [] if self.sink is None else self.sink.read(limit)
+
+
+def model_name(llm):
+    if llm is None:
+        return None
+    return getattr(llm, "model_name", None) or getattr(llm, "model", None) or type(llm).__name__
+
+
+def build_record(handler, entry_point, latency, model=None, dataset_key=None, error=None):
+    """
+    Turns a handler's trace into a flat record.
+
+    Returns:
+        dict: The record, with the per-call "llm" and "tools" traces.
+    """
+    error = error or (handler.errors[-1] if handler.errors else None)
+    record = {
+        "timestamp": datetime.now().isoformat(timespec="milliseconds"),
+        "entry_point": entry_point,
+        "model": model,
+        "dataset_key": dataset_key,
+        "latency": latency,
+        # An agent makes one LLM call per iteration; callers that know better set fields.
+        "iterations": len(handler.llm_calls),
+        "llm_calls": len(handler.llm_calls),
+        "tool_calls": len(handler.tool_calls),
+        "prompt_tokens": handler.prompt_tokens,
+        "completion_tokens": handler.completion_tokens,
+        "tokens": handler.prompt_tokens + handler.completion_tokens,
+        "stop_reason": "error" if error else "finished",
+        "error": error,
+        "llm": handler.llm_calls,
+        "tools": handler.tool_calls,
+    }
+    record.update(handler.fields)
+    return record
+
+
+def summarize_metrics(records):
+    """
+    Summarizes records per entry point with p50/p95 percentiles.
+
+    Args:
+        records (list): Records read from a sink.
+
+    Returns:
+        pd.DataFrame: One row per entry point with the number of calls, errors,
+        and the p50 and p95 of latency, tokens, iterations and tool calls.
+    """
+    if not records:
+        return pd.DataFrame()
+    frame = pd.DataFrame(records, columns=list(RECORD_COLUMNS))
+    grouped = frame.groupby("entry_point")
+    summary = pd.DataFrame({
+        "calls": grouped.size(),
+        "errors": grouped["error"].count(),
+    })
+    for metric in SUMMARY_METRICS:
+        values = pd.to_numeric(frame[metric], errors="coerce").groupby(frame["entry_point"])
+        summary[f"{metric}_p50"] = values.quantile(0.5)
+        summary[f"{metric}_p95"] = values.quantile(0.95)
+    return summary
+
+
+_default_recorder = None
+_default_recorder_lock = threading.Lock()
+
+
+def get_default_recorder():
+    """
+    Returns the process-wide recorder, writing to INFAI_METRICS_PATH unless
+    INFAI_METRICS is "0".
+
+    Returns:
+        MetricsRecorder: The shared recorder instance.
+    """
+    global _default_recorder
+    with _default_recorder_lock:
+        if _default_recorder is None:
+            _default_recorder = MetricsRecorder(open_sink(DEFAULT_METRICS_PATH) if METRICS_ENABLED else None)
+        return _default_recorder
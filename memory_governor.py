@@ -0,0 +1,270 @@
+"""
+memory_governor.py: This module contains the process-wide memory governor of the
+Streamlit server. Sessions that open the same upload already share one parsed,
+read-only DataFrame through the dataset cache; the governor records which dataset
+every session has open, pins those datasets in the cache, attributes memory to
+sessions, and keeps all caches together within one byte budget. Over the budget,
+derived artifacts (exports, figures, plot summaries, correlation results and the
+sandbox's shared-memory copies) are evicted before any base dataset, and datasets
+still open in a session are never evicted.
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+
+import pandas as pd
+
+from dataset_cache import get_default_cache
+from exporter import get_default_export_cache
+from figure_cache import get_default_figure_cache
+
+DEFAULT_BUDGET_BYTES = int(os.environ.get("INFAI_MEMORY_BUDGET_MB", "4096")) * 1024 * 1024
+DEFAULT_SESSION_TTL = float(os.environ.get("INFAI_SESSION_TTL", "1800"))
+DATASET_POOL = "datasets"
+EVICTION_LOG_SIZE = 20
+
+
+@dataclass
+class SessionRecord:
+    """
+    The dataset a session has open.
+
+    Attributes:
+        session_id (str): The Streamlit session id.
+        dataset_key (str): Content hash of the dataset.
+        name (str): File name of the dataset.
+        last_seen (float): Timestamp of the session's last rerun.
+    """
+    session_id: str
+    dataset_key: str
+    name: str
+    last_seen: float
+
+
+class _Pool:
+    """
+    A cache the governor can measure and shrink.
+    """
+
+    def __init__(self, name, usage, shrink):
+        self.name = name
+        self.usage = usage
+        self.shrink = shrink
+
+
+def _loaded(module_name, attribute):
+    # plots and sandbox are imported lazily by the app, so until then they hold
+    # nothing; a module another thread is still importing may lack the attribute yet.
+    return getattr(sys.modules.get(module_name), attribute, None)
+
+
+def _default_sandbox_pool():
+    get_pool = _loaded("sandbox", "get_default_sandbox_pool")
+    return get_pool(start=False) if get_pool is not None else None
+
+
+def _derived_pools(pinned):
+    """
+    Returns the caches of derived artifacts, in eviction order.
+    """
+    export_cache = get_default_export_cache()
+    figure_cache = get_default_figure_cache()
+    pools = [
+        _Pool("exports", export_cache.usage, export_cache.shrink),
+        _Pool("figures", figure_cache.usage, figure_cache.shrink),
+    ]
+    for name, module_name, usage, shrink in (
+        ("plot_summaries", "plots", "summary_cache_usage", "shrink_summary_cache"),
+        ("correlations", "correlation", "cache_usage", "shrink_cache"),
+    ):
+        usage, shrink = _loaded(module_name, usage), _loaded(module_name, shrink)
+        if usage is not None and shrink is not None:
+            pools.append(_Pool(name, usage, shrink))
+    pool = _default_sandbox_pool()
+    if pool is not None:
+        pools.append(_Pool("sandbox", pool.usage, lambda max_bytes: pool.shrink(max_bytes, pinned)))
+    return pools
+
+
+class MemoryGovernor:
+    """
+    Tracks the dataset of every session and keeps the process's caches within a
+    byte budget.
+
+    Attributes:
+        budget_bytes (int): The budget of all governed caches together.
+        session_ttl (float): Seconds after its last rerun that a session counts
+            as closed; Streamlit does not report closed sessions.
+        evictions (deque): The latest evictions as (timestamp, pool, bytes) tuples.
+    """
+
+    def __init__(self, budget_bytes=DEFAULT_BUDGET_BYTES, session_ttl=DEFAULT_SESSION_TTL, dataset_cache=None):
+        self.budget_bytes = budget_bytes
+        self.session_ttl = session_ttl
+        self.dataset_cache = dataset_cache if dataset_cache is not None else get_default_cache()
+        self.evictions = deque(maxlen=EVICTION_LOG_SIZE)
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def track(self, session_id, entry):
+        """
+        Records that a session has a dataset open and enforces the budget.
+
+        Args:
+            session_id (str): The Streamlit session id.
+            entry (DatasetEntry): The dataset entry the session uses.
+        """
+        now = time.time()
+        with self._lock:
+            self._sessions[session_id] = SessionRecord(session_id, entry.key, entry.name, now)
+            self._expire(now)
+        self.enforce()
+
+    def end_session(self, session_id):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+        self.dataset_cache.pin(self.open_datasets())
+
+    def _expire(self, now):
+        expired = [key for key, record in self._sessions.items() if now - record.last_seen > self.session_ttl]
+        for key in expired:
+            del self._sessions[key]
+
+    def sessions(self):
+        with self._lock:
+            self._expire(time.time())
+            return list(self._sessions.values())
+
+    def open_datasets(self):
+        """
+        Returns the keys of the datasets open in at least one session.
+
+        Returns:
+            set: The dataset keys.
+        """
+        return {record.dataset_key for record in self.sessions()}
+
+    def usage(self):
+        """
+        Returns the bytes held by every governed cache.
+
+        Returns:
+            dict: Pool name to a dict of bytes per dataset key.
+        """
+        usage = {DATASET_POOL: {entry.key: entry.nbytes for entry in self.dataset_cache.entries()}}
+        for pool in _derived_pools(frozenset()):
+            usage[pool.name] = pool.usage()
+        return usage
+
+    def enforce(self):
+        """
+        Evicts cached data until the governed caches fit the budget: derived
+        artifacts first, in the order of _derived_pools, then datasets that no
+        session has open, least recently used first.
+
+        Returns:
+            int: The number of bytes freed.
+        """
+        pinned = self.open_datasets()
+        self.dataset_cache.pin(pinned)
+        dataset_bytes = sum(entry.nbytes for entry in self.dataset_cache.entries())
+        pools = _derived_pools(pinned)
+        sizes = [sum(pool.usage().values()) for pool in pools]
+        excess = dataset_bytes + sum(sizes) - self.budget_bytes
+        freed = 0
+        for pool, size in zip(pools, sizes):
+            if excess <= 0:
+                break
+            released = pool.shrink(max(size - excess, 0))
+            self._record(pool.name, released)
+            excess -= released
+            freed += released
+        if excess > 0:
+            before = dataset_bytes
+            for key in self.dataset_cache.shrink(max(dataset_bytes - excess, 0)):
+                _drop_dataset(key)
+            released = before - sum(entry.nbytes for entry in self.dataset_cache.entries())
+            self._record(DATASET_POOL, released)
+            freed += released
+        return freed
+
+    def _record(self, pool, released):
+        if released > 0:
+            with self._lock:
+                self.evictions.append((time.time(), pool, released))
+
+    def session_usage(self):
+        """
+        Attributes memory to sessions. A dataset and its derived artifacts are
+        counted once and split evenly between the sessions that have it open.
+
+        Returns:
+            pd.DataFrame: One row per session with its dataset, the number of
+            sessions sharing it and the megabytes attributed to it.
+        """
+        usage = self.usage()
+        per_dataset = {}
+        for pool in usage.values():
+            for key, nbytes in pool.items():
+                per_dataset[key] = per_dataset.get(key, 0) + nbytes
+        sessions = self.sessions()
+        sharers = {}
+        for record in sessions:
+            sharers[record.dataset_key] = sharers.get(record.dataset_key, 0) + 1
+        now = time.time()
+        return pd.DataFrame([{
+            "session": record.session_id[:8],
+            "dataset": record.name,
+            "shared_by": sharers[record.dataset_key],
+            "dataset_mb": usage[DATASET_POOL].get(record.dataset_key, 0) / 1024 ** 2,
+            "attributed_mb": per_dataset.get(record.dataset_key, 0) / sharers[record.dataset_key] / 1024 ** 2,
+            "idle_seconds": round(now - record.last_seen),
+        } for record in sessions])
+
+    def report(self):
+        """
+        Summarizes the current memory use for the diagnostics panel.
+
+        Returns:
+            dict: The budget and total in bytes, megabytes per pool, the number of
+            sessions and open datasets, and the latest evictions.
+        """
+        usage = self.usage()
+        pools = {name: sum(values.values()) for name, values in usage.items()}
+        return {
+            "budget_bytes": self.budget_bytes,
+            "total_bytes": sum(pools.values()),
+            "pools_mb": {name: nbytes / 1024 ** 2 for name, nbytes in pools.items()},
+            "sessions": len(self.sessions()),
+            "open_datasets": len(self.open_datasets()),
+            "evictions": list(self.evictions),
+        }
+
+
+def _drop_dataset(key):
+    # Artifacts of an evicted dataset are useless, and agents would keep its DataFrame alive.
+    get_default_export_cache().evict_dataset(key)
+    get_default_figure_cache().evict_dataset(key)
+    get_registry = _loaded("agent_registry", "get_default_registry")
+    if get_registry is not None:
+        get_registry().evict_dataset(key)
+    pool = _default_sandbox_pool()
+    if pool is not None:
+        pool.release(key)
+
+
+_default_governor = MemoryGovernor()
+
+
+def get_default_governor():
+    """
+    Returns the process-wide memory governor shared by all sessions.
+
+    Returns:
+        MemoryGovernor: The shared governor instance.
+    """
+    return _default_governor
@@ -0,0 +1,380 @@
+"""
+plots.py: This module contains the matplotlib/seaborn figure builders used by the
+"Dağılım", "Korelasyon" and "Kategorik Analiz" tabs. Every builder returns a new
+figure and leaves closing it to the caller. Columns with more than
+LARGE_DATA_THRESHOLD values are drawn in a large-data mode: the histogram comes
+from a single NumPy binning pass over all values, while the KDE and the box and
+violin statistics come from a stratified sample, so render time stays flat as
+the row count grows.
+"""
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import matplotlib.pyplot as plt
+import numpy as np
+import seaborn as sns
+
+LARGE_DATA_THRESHOLD = 200_000
+SAMPLE_SIZE = 10_000
+STRATA = 20
+MAX_BINS = 200
+KDE_GRID_SIZE = 256
+SUMMARY_CACHE_SIZE = 32
+
+_summary_cache = OrderedDict()
+_summary_cache_lock = threading.Lock()
+
+
+@dataclass
+class ColumnSummary:
+    """
+    Precomputed plotting statistics of a large numeric column.
+
+    Attributes:
+        n (int): Number of non-null values.
+        edges (np.ndarray): Histogram bin edges over the whole value range.
+        counts (np.ndarray): Histogram counts of all values.
+        sample (np.ndarray): Stratified sample of the values.
+        q1 (float): First quartile.
+        median (float): Median.
+        q3 (float): Third quartile.
+    """
+    n: int
+    edges: np.ndarray
+    counts: np.ndarray
+    sample: np.ndarray
+    q1: float
+    median: float
+    q3: float
+
+
+def stratified_sample(values, low, high, size=SAMPLE_SIZE, strata=STRATA, seed=0):
+    """
+    Samples values with proportional allocation over equal-width value strata,
+    keeping at least one value from every non-empty stratum so the tails survive.
+
+    Args:
+        values (np.ndarray): Non-null values.
+        low (float): Minimum of values.
+        high (float): Maximum of values.
+        size (int): Approximate sample size.
+        strata (int): Number of strata, at most 255.
+        seed (int): Seed of the random generator.
+
+    Returns:
+        np.ndarray: The sample.
+    """
+    if values.size <= size:
+        return values.copy()
+    rng = np.random.default_rng(seed)
+    if high > low:
+        stratum = np.minimum((values - low) * (strata / (high - low)), strata - 1).astype(np.uint8)
+    else:
+        stratum = np.zeros(values.size, dtype=np.uint8)
+    counts = np.bincount(stratum, minlength=strata)
+    quotas = np.minimum(np.where(counts > 0, np.maximum(1, np.round(counts * size / values.size)), 0), counts)
+    order = np.argsort(stratum, kind="stable")
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    picks = [
+        order[start + rng.choice(count, int(quota), replace=False)]
+        for start, count, quota in zip(starts, counts, quotas) if quota
+    ]
+    return values[np.concatenate(picks)]
+
+
+def summarize_column(series, column_profile=None, dataset_key=None):
+    """
+    Computes the histogram over all values and a stratified sample of a column.
+
+    Results are cached per (dataset_key, column) when dataset_key is given, so
+    switching plot type or color does not rescan the column.
+
+    Args:
+        series (pd.Series): The numeric column.
+        column_profile (ColumnProfile): Profile of the column, used for the value
+            range and quartiles instead of extra passes over the data.
+        dataset_key (str): Content hash of the dataset.
+
+    Returns:
+        ColumnSummary: The column summary.
+    """
+    key = (dataset_key, series.name)
+    if dataset_key is not None:
+        with _summary_cache_lock:
+            if key in _summary_cache:
+                _summary_cache.move_to_end(key)
+                return _summary_cache[key]
+
+    values = series.to_numpy(dtype="float64", na_value=np.nan)
+    values = values[~np.isnan(values)]
+    if column_profile is not None and column_profile.min is not None:
+        low, high = column_profile.min, column_profile.max
+        q1, median, q3 = column_profile.q25, column_profile.median, column_profile.q75
+    else:
+        low, high = values.min(), values.max()
+        q1, median, q3 = np.quantile(values, (0.25, 0.5, 0.75))
+
+    # Freedman-Diaconis bin width, clamped to a readable number of bins
+    width = 2 * (q3 - q1) / np.cbrt(values.size)
+    bins = int(np.clip(np.ceil((high - low) / width) if width > 0 else 1, 10, MAX_BINS))
+    counts, edges = np.histogram(values, bins=bins, range=(low, high) if high > low else None)
+
+    summary = ColumnSummary(
+        n=int(values.size),
+        edges=edges,
+        counts=counts,
+        sample=stratified_sample(values, low, high),
+        q1=float(q1),
+        median=float(median),
+        q3=float(q3),
+    )
+    if dataset_key is not None:
+        with _summary_cache_lock:
+            _summary_cache[key] = summary
+            while len(_summary_cache) > SUMMARY_CACHE_SIZE:
+                _summary_cache.popitem(last=False)
+    return summary
+
+
+def _summary_bytes(summary):
+    return summary.edges.nbytes + summary.counts.nbytes + summary.sample.nbytes
+
+
+def summary_cache_usage():
+    """
+    Returns the bytes held by cached column summaries per dataset key.
+
+    Returns:
+        dict: Bytes keyed by dataset key.
+    """
+    usage = {}
+    with _summary_cache_lock:
+        for (dataset_key, _), summary in _summary_cache.items():
+            usage[dataset_key] = usage.get(dataset_key, 0) + _summary_bytes(summary)
+    return usage
+
+
+def shrink_summary_cache(max_bytes):
+    """
+    Evicts least recently used column summaries until the cache holds at most max_bytes.
+
+    Args:
+        max_bytes (int): The number of bytes to keep.
+
+    Returns:
+        int: The number of bytes freed.
+    """
+    with _summary_cache_lock:
+        total = sum(_summary_bytes(summary) for summary in _summary_cache.values())
+        freed = 0
+        while _summary_cache and total - freed > max_bytes:
+            freed += _summary_bytes(_summary_cache.popitem(last=False)[1])
+    return freed
+
+
+def gaussian_kde(sample, grid):
+    """
+    Evaluates a Gaussian kernel density estimate with Scott's bandwidth on a grid.
+
+    Args:
+        sample (np.ndarray): The sample the density is estimated from.
+        grid (np.ndarray): Points where the density is evaluated.
+
+    Returns:
+        np.ndarray: Density values on the grid.
+    """
+    std = sample.std(ddof=1) if sample.size > 1 else 0.0
+    bandwidth = std * sample.size ** (-1 / 5) if std > 0 else 1.0
+    density = np.zeros_like(grid)
+    for start in range(0, sample.size, 2048):
+        offsets = (grid[:, None] - sample[None, start:start + 2048]) / bandwidth
+        density += np.exp(-0.5 * offsets * offsets).sum(axis=1)
+    return density / (sample.size * bandwidth * np.sqrt(2 * np.pi))
+
+
+def _sampling_note(ax, summary, text):
+    ax.text(
+        0.99, 0.98, f"{text}: {summary.sample.size:,} / {summary.n:,} değer",
+        transform=ax.transAxes, ha="right", va="top", fontsize=9, alpha=0.75,
+        bbox={"boxstyle": "round", "facecolor": "white", "alpha": 0.6, "edgecolor": "none"}
+    )
+
+
+def _large_histogram(ax, summary, color):
+    widths = np.diff(summary.edges)
+    ax.bar(summary.edges[:-1], summary.counts, width=widths, align="edge", color=color, alpha=0.6,
+           edgecolor="white", linewidth=0.3)
+    grid = np.linspace(summary.edges[0], summary.edges[-1], KDE_GRID_SIZE)
+    ax.plot(grid, gaussian_kde(summary.sample, grid) * summary.n * widths.mean(), color=color, linewidth=2)
+    _sampling_note(ax, summary, "Histogram tüm veriden, KDE örneklemden")
+
+
+def _whiskers(summary):
+    iqr = summary.q3 - summary.q1
+    inside = summary.sample[(summary.sample >= summary.q1 - 1.5 * iqr) & (summary.sample <= summary.q3 + 1.5 * iqr)]
+    low = min(inside.min(), summary.q1) if inside.size else summary.q1
+    high = max(inside.max(), summary.q3) if inside.size else summary.q3
+    return low, high
+
+
+def _large_box(ax, summary, color):
+    low, high = _whiskers(summary)
+    fliers = summary.sample[(summary.sample < low) | (summary.sample > high)]
+    stats = {"med": summary.median, "q1": summary.q1, "q3": summary.q3, "whislo": low, "whishi": high,
+             "fliers": fliers}
+    ax.bxp([stats], positions=[0], widths=0.6, patch_artist=True, showfliers=True,
+           boxprops={"facecolor": color}, medianprops={"color": "white"},
+           flierprops={"markersize": 3, "alpha": 0.4}, **_horizontal())
+    ax.set_yticks([])
+    _sampling_note(ax, summary, "Çeyrekler tüm veriden, bıyık/aykırılar örneklemden")
+
+
+def _large_violin(ax, summary, color):
+    low, high = _whiskers(summary)
+    grid = np.linspace(summary.sample.min(), summary.sample.max(), KDE_GRID_SIZE)
+    density = gaussian_kde(summary.sample, grid)
+    density = density / density.max() * 0.4 if density.max() > 0 else density
+    ax.fill_between(grid, -density, density, color=color, alpha=0.7, linewidth=1, edgecolor="black")
+    ax.plot([low, high], [0, 0], color="black", linewidth=1)
+    ax.plot([summary.q1, summary.q3], [0, 0], color="black", linewidth=5)
+    ax.plot([summary.median], [0], marker="o", color="white", markersize=5)
+    ax.set_ylim(-0.5, 0.5)
+    ax.set_yticks([])
+    _sampling_note(ax, summary, "Yoğunluk örneklemden")
+
+
+def _horizontal():
+    # Axes.bxp gained 'orientation' in matplotlib 3.10 and deprecated 'vert'
+    major, minor = (int(part) for part in plt.matplotlib.__version__.split(".")[:2])
+    return {"orientation": "horizontal"} if (major, minor) >= (3, 10) else {"vert": False}
+
+
+def distribution_figure(series, column, plot_type, color, column_profile=None, dataset_key=None,
+                        large_threshold=LARGE_DATA_THRESHOLD):
+    """
+    Draws a histogram with KDE, a box plot or a violin plot of a numeric column.
+
+    Columns with more than large_threshold non-null values are drawn from a
+    ColumnSummary instead of the raw values, and the chart notes the sample size.
+
+    Args:
+        series (pd.Series): The column values.
+        column (str): The column name used in titles and labels.
+        plot_type (str): "Histogram", "Box Plot" or "Violin Plot".
+        color (str): The plot color.
+        column_profile (ColumnProfile): Profile of the column, when available.
+        dataset_key (str): Content hash of the dataset, for caching the summary.
+        large_threshold (int): Number of values above which large-data mode is used.
+
+    Returns:
+        matplotlib.figure.Figure: The figure.
+    """
+    fig, ax = plt.subplots(figsize=(10, 6))
+    count = column_profile.count if column_profile is not None else int(series.count())
+    summary = summarize_column(series, column_profile, dataset_key) if count > large_threshold else None
+
+    if count == 0:
+        # An all-null column has nothing to draw, and seaborn's box plot fails on it.
+        ax.text(0.5, 0.5, "Sütunda gösterilecek değer yok", ha="center", va="center", transform=ax.transAxes)
+        ax.set_title(f"{column} Dağılımı", fontsize=16)
+    elif plot_type == "Histogram":
+        if summary is not None:
+            _large_histogram(ax, summary, color)
+        else:
+            sns.histplot(series, kde=True, ax=ax, color=color)
+        ax.set_title(f"{column} Dağılımı", fontsize=16)
+        ax.set_ylabel("Frekans", fontsize=12)
+    elif plot_type == "Box Plot":
+        if summary is not None:
+            _large_box(ax, summary, color)
+        else:
+            sns.boxplot(x=series, ax=ax, color=color)
+        ax.set_title(f"{column} Box Plot", fontsize=16)
+    else:
+        if summary is not None:
+            _large_violin(ax, summary, color)
+        else:
+            sns.violinplot(x=series, ax=ax, color=color)
+        ax.set_title(f"{column} Violin Plot", fontsize=16)
+
+    ax.set_xlabel(column, fontsize=12)
+    fig.tight_layout()
+    return fig
+
+
+def correlation_figure(corr_matrix, method, cmap_option):
+    """
+    Draws the lower triangle of a correlation matrix as an annotated heatmap.
+
+    Args:
+        corr_matrix (pd.DataFrame): The correlation matrix.
+        method (str): The correlation method shown in the title.
+        cmap_option (str): Name of the seaborn color palette.
+
+    Returns:
+        matplotlib.figure.Figure: The figure.
+    """
+    fig, ax = plt.subplots(figsize=(10, 8))
+    mask = np.triu(np.ones_like(corr_matrix, dtype=bool))
+    cmap = sns.color_palette(cmap_option, as_cmap=True)
+
+    sns.heatmap(
+        corr_matrix,
+        mask=mask,
+        cmap=cmap,
+        annot=True,
+        center=0,
+        square=True,
+        linewidths=.5,
+        fmt=".2f",
+        ax=ax
+    )
+
+    ax.set_title(f"Korelasyon Matrisi ({method.capitalize()})", fontsize=16)
+    fig.tight_layout()
+    return fig
+
+
+def categorical_figure(value_counts, column, plot_type, count_limit):
+    """
+    Draws the most frequent categories of a column as a bar or pie chart.
+
+    Args:
+        value_counts (pd.Series): Category frequencies, most frequent first.
+        column (str): The column name used in titles and labels.
+        plot_type (str): "Bar" or "Pie".
+        count_limit (int): Number of categories shown in the title.
+
+    Returns:
+        matplotlib.figure.Figure: The figure.
+    """
+    if plot_type == "Bar":
+        fig, ax = plt.subplots(figsize=(10, 6))
+        labels = value_counts.index.astype(str)
+        sns.barplot(x=value_counts.values, y=labels, hue=labels, palette="viridis", legend=False, ax=ax)
+        ax.set_title(f"{column} Değer Dağılımı (Top {count_limit})", fontsize=16)
+        ax.set_xlabel("Frekans", fontsize=12)
+        ax.set_ylabel(column, fontsize=12)
+    else:
+        colors = plt.cm.viridis(np.linspace(0, 1, len(value_counts)))
+        fig, ax = plt.subplots(figsize=(10, 8))
+        wedges, texts, autotexts = ax.pie(
+            value_counts.values,
+            labels=value_counts.index,
+            autopct='%1.1f%%',
+            startangle=90,
+            colors=colors,
+            wedgeprops={'edgecolor': 'white', 'linewidth': 1}
+        )
+        # Yazıları özelleştirme
+        for autotext in autotexts:
+            autotext.set_color('white')
+            autotext.set_fontsize(10)
+            autotext.set_fontweight('bold')
+        ax.set_title(f"{column} Dağılımı (Top {count_limit})", fontsize=16)
+        ax.axis('equal')
+
+    fig.tight_layout()
+    return fig
@@ -0,0 +1,443 @@
+"""
+profiler.py: This module contains a single-pass, vectorized dataset profiler that
+collects per-column null counts, moments, quantiles, cardinality and memory usage
+into a typed profile object shared by every summary panel. Categorical columns
+also carry a CategorySketch of their distinct count and most frequent values.
+"""
+
+from dataclasses import dataclass, field, replace
+
+import numpy as np
+import pandas as pd
+
+from sketches import CategorySketch, HyperLogLog, hash_numbers
+
+QUANTILES = (0.25, 0.5, 0.75)
+SAMPLE_SIZE = 200_000
+# Distinct numeric values are counted exactly up to this many, then estimated.
+EXACT_DISTINCT_LIMIT = 100_000
+
+
+@dataclass
+class ColumnProfile:
+    """
+    Summary statistics of a single DataFrame column.
+
+    Moment and quantile fields are None for non-numeric columns or columns
+    without any non-null value; sketch is None for non-categorical columns.
+    """
+    name: str
+    dtype: str
+    count: int
+    null_count: int
+    unique: int
+    memory: int
+    is_numeric: bool = False
+    is_categorical: bool = False
+    mean: float = None
+    std: float = None
+    min: float = None
+    q25: float = None
+    median: float = None
+    q75: float = None
+    max: float = None
+    sketch: CategorySketch = None
+
+    @property
+    def null_pct(self):
+        total = self.count + self.null_count
+        return self.null_count / total * 100 if total else 0.0
+
+
+@dataclass
+class DatasetProfile:
+    """
+    Summary statistics of a whole DataFrame, computed once per dataset.
+    """
+    n_rows: int
+    n_cols: int
+    memory: int
+    columns: list = field(default_factory=list)
+    head: pd.DataFrame = None
+
+    def __post_init__(self):
+        self._by_name = {column.name: column for column in self.columns}
+
+    def column(self, name):
+        """
+        Returns the profile of the given column.
+
+        Args:
+            name (str): The column name.
+
+        Returns:
+            ColumnProfile: The column's profile.
+        """
+        return self._by_name[name]
+
+    @property
+    def numeric_columns(self):
+        return [column.name for column in self.columns if column.is_numeric]
+
+    @property
+    def categorical_columns(self):
+        return [column.name for column in self.columns if column.is_categorical]
+
+    @property
+    def total_nulls(self):
+        return sum(column.null_count for column in self.columns)
+
+    def describe(self):
+        """
+        Builds a table equivalent to DataFrame.describe() for the numeric columns.
+
+        Returns:
+            pd.DataFrame: Statistics as rows and numeric columns as columns.
+        """
+        index = ["count", "mean", "std", "min", "25%", "50%", "75%", "max"]
+        data = {
+            column.name: [
+                column.count, column.mean, column.std, column.min,
+                column.q25, column.median, column.q75, column.max
+            ]
+            for column in self.columns if column.is_numeric
+        }
+        if not data:
+            index = ["count", "unique"]
+            data = {column.name: [column.count, column.unique] for column in self.columns}
+        return pd.DataFrame(data, index=index, dtype=float)
+
+    def to_frame(self):
+        """
+        Returns one row per column with every collected statistic.
+
+        Returns:
+            pd.DataFrame: The per-column profile table.
+        """
+        rows = []
+        for column in self.columns:
+            rows.append({
+                "column": column.name,
+                "dtype": column.dtype,
+                "count": column.count,
+                "null_count": column.null_count,
+                "null_pct": column.null_pct,
+                "unique": column.unique,
+                "memory": column.memory,
+                "mean": column.mean,
+                "std": column.std,
+                "min": column.min,
+                "25%": column.q25,
+                "50%": column.median,
+                "75%": column.q75,
+                "max": column.max,
+            })
+        return pd.DataFrame(rows)
+
+
+def is_numeric_column(dtype):
+    """
+    Checks whether a dtype should be treated as a numeric measure (booleans excluded).
+    """
+    return pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype)
+
+
+def is_categorical_column(dtype):
+    """
+    Checks whether a dtype holds categorical labels (object, string or category).
+    """
+    return (
+        isinstance(dtype, pd.CategoricalDtype)
+        or pd.api.types.is_object_dtype(dtype)
+        or pd.api.types.is_string_dtype(dtype)
+    )
+
+
+def _numeric_stats(values):
+    valid = values[~np.isnan(values)]
+    if valid.size == 0:
+        return {}
+    q25, median, q75 = np.quantile(valid, QUANTILES)
+    return {
+        "mean": float(valid.mean()),
+        "std": float(valid.std(ddof=1)) if valid.size > 1 else float("nan"),
+        "min": float(valid.min()),
+        "q25": float(q25),
+        "median": float(median),
+        "q75": float(q75),
+        "max": float(valid.max()),
+    }
+
+
+def profile_column(series, memory):
+    """
+    Profiles a single column with one extraction of its values.
+
+    Args:
+        series (pd.Series): The column to be profiled.
+        memory (int): Deep memory usage of the column in bytes.
+
+    Returns:
+        ColumnProfile: The column's profile.
+    """
+    null_count = int(series.isna().sum())
+    is_categorical = is_categorical_column(series.dtype)
+    sketch = None
+    if is_categorical:
+        # One value_counts pass gives both the exact distinct count and the sketch.
+        counts = series.value_counts(sort=False)
+        counts = counts[counts > 0]
+        sketch = CategorySketch()
+        sketch.update_counts(counts)
+        unique = len(counts)
+    else:
+        unique = int(series.nunique())
+    column = ColumnProfile(
+        name=series.name,
+        dtype=str(series.dtype),
+        count=len(series) - null_count,
+        null_count=null_count,
+        unique=unique,
+        memory=int(memory),
+        is_numeric=is_numeric_column(series.dtype),
+        is_categorical=is_categorical,
+        sketch=sketch,
+    )
+    if column.is_numeric:
+        values = series.to_numpy(dtype="float64", na_value=np.nan)
+        for name, value in _numeric_stats(values).items():
+            setattr(column, name, value)
+    return column
+
+
+def profile_dataframe(df, head_rows=5):
+    """
+    Profiles every column of a DataFrame in a single columnar pass.
+
+    Args:
+        df (pd.DataFrame): The DataFrame to be profiled.
+        head_rows (int): Number of leading rows kept as a preview.
+
+    Returns:
+        DatasetProfile: The dataset profile.
+    """
+    memory = df.memory_usage(deep=True)
+    columns = [profile_column(df[name], memory[name]) for name in df.columns]
+    return DatasetProfile(
+        n_rows=len(df),
+        n_cols=df.shape[1],
+        memory=int(memory.sum()),
+        columns=columns,
+        head=df.head(head_rows),
+    )
+
+
+def _merge_dtypes(current, new):
+    if current is None or current == new:
+        return new
+    if is_numeric_column(current) and is_numeric_column(new):
+        try:
+            return np.result_type(current, new)
+        except TypeError:
+            return np.dtype("float64")
+    return new if is_categorical_column(new) and not is_categorical_column(current) else current
+
+
+def refresh_columns(profile, df, names, reprofile=()):
+    """
+    Returns a copy of a profile updated for columns whose dtype changed.
+
+    Columns whose values are unchanged (e.g. downcast or categorized) only get
+    their dtype, flags and memory updated; columns listed in reprofile (e.g.
+    parsed dates) are profiled again from scratch.
+
+    Args:
+        profile (DatasetProfile): The profile to be updated.
+        df (pd.DataFrame): The DataFrame after the dtype changes.
+        names (list): Columns whose dtype changed.
+        reprofile (list): Columns whose values changed as well.
+
+    Returns:
+        DatasetProfile: The updated profile.
+    """
+    columns = []
+    for column in profile.columns:
+        if column.name in reprofile:
+            series = df[column.name]
+            column = profile_column(series, series.memory_usage(deep=True, index=False))
+        elif column.name in names:
+            series = df[column.name]
+            column = replace(
+                column,
+                dtype=str(series.dtype),
+                memory=int(series.memory_usage(deep=True, index=False)),
+                is_numeric=is_numeric_column(series.dtype),
+                is_categorical=is_categorical_column(series.dtype),
+            )
+        columns.append(column)
+    return DatasetProfile(
+        n_rows=profile.n_rows,
+        n_cols=profile.n_cols,
+        memory=sum(column.memory for column in columns),
+        columns=columns,
+        head=df.head(len(profile.head)) if profile.head is not None else None,
+    )
+
+
+class _ColumnAccumulator:
+    """
+    Mergeable per-column statistics: counts, moments (Chan's parallel update),
+    extremes, distinct numeric values (exact up to EXACT_DISTINCT_LIMIT, then a
+    HyperLogLog), a bottom-k random sample for quantiles and a CategorySketch of
+    the non-numeric values.
+    """
+
+    def __init__(self, name, sample_size, rng):
+        self.name = name
+        self.sample_size = sample_size
+        self.rng = rng
+        self.dtype = None
+        self.count = 0
+        self.null_count = 0
+        self.memory = 0
+        self.sketch = CategorySketch()
+        self.numeric_uniques = np.empty(0)
+        self.numeric_hll = None
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+        self.sample = np.empty(0)
+        self.sample_keys = np.empty(0)
+
+    def update(self, series, memory):
+        self.dtype = _merge_dtypes(self.dtype, series.dtype)
+        null_count = int(series.isna().sum())
+        self.null_count += null_count
+        self.count += len(series) - null_count
+        self.memory += int(memory)
+        if is_numeric_column(series.dtype):
+            values = series.to_numpy(dtype="float64", na_value=np.nan)
+            valid = values[~np.isnan(values)]
+            self._update_distinct(np.unique(valid))
+            self._update_moments(valid)
+        else:
+            self.sketch.update(series)
+
+    def _update_distinct(self, distinct):
+        if self.numeric_hll is not None:
+            self.numeric_hll.update(hash_numbers(distinct))
+            return
+        uniques = np.union1d(self.numeric_uniques, distinct)
+        if uniques.size > EXACT_DISTINCT_LIMIT:
+            self.numeric_hll = HyperLogLog()
+            self.numeric_hll.update(hash_numbers(uniques))
+            uniques = np.empty(0)
+        self.numeric_uniques = uniques
+
+    @property
+    def numeric_distinct(self):
+        if self.numeric_hll is None:
+            return self.numeric_uniques.size
+        # The estimate may overshoot, but never beyond the number of values seen.
+        return min(max(int(round(self.numeric_hll.estimate())), EXACT_DISTINCT_LIMIT + 1), self.n)
+
+    def _update_moments(self, valid):
+        if valid.size == 0:
+            return
+        n, mean = valid.size, valid.mean()
+        m2 = ((valid - mean) ** 2).sum()
+        total = self.n + n
+        delta = mean - self.mean
+        self.mean += delta * n / total
+        self.m2 += m2 + delta * delta * self.n * n / total
+        self.n = total
+        self.min = min(self.min, valid.min())
+        self.max = max(self.max, valid.max())
+
+        keys = np.concatenate([self.sample_keys, self.rng.random(valid.size)])
+        sample = np.concatenate([self.sample, valid])
+        if keys.size > self.sample_size:
+            keep = np.argpartition(keys, self.sample_size)[:self.sample_size]
+            keys, sample = keys[keep], sample[keep]
+        self.sample_keys, self.sample = keys, sample
+
+    def to_profile(self):
+        column = ColumnProfile(
+            name=self.name,
+            dtype=str(self.dtype),
+            count=self.count,
+            null_count=self.null_count,
+            unique=self.sketch.distinct + self.numeric_distinct,
+            memory=self.memory,
+            is_numeric=is_numeric_column(self.dtype),
+            is_categorical=is_categorical_column(self.dtype),
+            sketch=self.sketch if is_categorical_column(self.dtype) else None,
+        )
+        if column.is_numeric and self.n:
+            q25, median, q75 = np.quantile(self.sample, QUANTILES)
+            column.mean = float(self.mean)
+            column.std = float(np.sqrt(self.m2 / (self.n - 1))) if self.n > 1 else float("nan")
+            column.min, column.max = float(self.min), float(self.max)
+            column.q25, column.median, column.q75 = float(q25), float(median), float(q75)
+        return column
+
+
+class ProfileBuilder:
+    """
+    Builds a DatasetProfile incrementally from consecutive chunks of a dataset.
+
+    Counts, moments, extremes and memory are exact; quartiles are exact up to
+    sample_size non-null values per column and estimated from a uniform random
+    sample beyond that. Distinct counts are exact up to the sketch capacity for
+    non-numeric columns and up to EXACT_DISTINCT_LIMIT for numeric ones, and
+    HyperLogLog estimates beyond that.
+    """
+
+    def __init__(self, head_rows=5, sample_size=SAMPLE_SIZE, seed=0):
+        self.head_rows = head_rows
+        self.sample_size = sample_size
+        self.n_rows = 0
+        self.head = None
+        self._rng = np.random.default_rng(seed)
+        self._columns = {}
+
+    def update(self, chunk):
+        """
+        Adds the statistics of one chunk to the profile.
+
+        Args:
+            chunk (pd.DataFrame): The next chunk of rows.
+        """
+        if self.head is None:
+            self.head = chunk.head(self.head_rows)
+        memory = chunk.memory_usage(deep=True, index=False)
+        for name in chunk.columns:
+            if name not in self._columns:
+                self._columns[name] = _ColumnAccumulator(name, self.sample_size, self._rng)
+            self._columns[name].update(chunk[name], memory[name])
+        self.n_rows += len(chunk)
+
+    def build(self, dtypes=None):
+        """
+        Returns the profile of every chunk seen so far.
+
+        Args:
+            dtypes (pd.Series): Final column dtypes, e.g. of the concatenated frame.
+                Overrides the dtypes merged from the chunks when given.
+
+        Returns:
+            DatasetProfile: The (possibly partial) dataset profile.
+        """
+        if dtypes is not None:
+            for name, dtype in dtypes.items():
+                self._columns[name].dtype = dtype
+        columns = [accumulator.to_profile() for accumulator in self._columns.values()]
+        return DatasetProfile(
+            n_rows=self.n_rows,
+            n_cols=len(columns),
+            memory=sum(column.memory for column in columns),
+            columns=columns,
+            head=self.head,
+        )
@@ -0,0 +1,504 @@
+"""
+sandbox.py: This module contains the execution backend of the pandas agent's
+Python tool. Agent-generated code runs in a pool of pre-warmed worker processes
+instead of the Streamlit server process. Datasets are published once to shared
+memory as Arrow IPC streams and mapped by the workers. Every call runs under
+CPU-time, memory and wall-clock limits, and a worker that hangs, crashes or runs
+out of memory is replaced by a fresh one.
+"""
+
+import ast
+import atexit
+import gc
+import io
+import multiprocessing
+import os
+import queue
+import signal
+import threading
+from collections import OrderedDict
+from contextlib import redirect_stdout
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from typing import Any
+
+from langchain_core.tools import BaseTool
+from langchain_experimental.tools.python.tool import PythonInputs, sanitize_input
+
+try:
+    import resource
+except ImportError:  # Windows: the pool still isolates the server, without limits.
+    resource = None
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+SANDBOX_ENABLED = os.environ.get("INFAI_SANDBOX", "1") != "0"
+DEFAULT_WORKERS = int(os.environ.get("INFAI_SANDBOX_WORKERS", "2"))
+CPU_TIME_LIMIT = int(os.environ.get("INFAI_SANDBOX_CPU_SECONDS", "30"))
+MEMORY_LIMIT = int(os.environ.get("INFAI_SANDBOX_MEMORY_MB", "2048")) * 1024 * 1024
+WALL_TIME_LIMIT = float(os.environ.get("INFAI_SANDBOX_WALL_SECONDS", "60"))
+MAX_SHARED_DATASETS = 4
+WORKER_DATASETS = 2
+MAX_OUTPUT_LENGTH = 10_000
+PYTHON_TOOL_NAME = "python_repl_ast"
+
+TIMEOUT_TEXT = "TimeoutError: Kod {seconds:.0f} saniyede tamamlanmadı ve durduruldu."
+BUSY_TEXT = "TimeoutError: Tüm çalışma süreçleri meşgul, kod çalıştırılamadı."
+CRASH_TEXT = "RuntimeError: Kodu çalıştıran süreç beklenmedik şekilde sonlandı."
+CPU_TEXT = "CPUTimeExceeded: Kod {seconds} saniyelik işlemci süresi sınırını aştı."
+MEMORY_TEXT = "MemoryError: Kod bellek sınırını ({megabytes:,} MB) aştı."
+
+
+def is_available():
+    """
+    Returns whether agent code can run in the sandbox pool.
+
+    Returns:
+        bool: True if the sandbox is enabled and pyarrow is installed.
+    """
+    return SANDBOX_ENABLED and pa is not None
+
+
+@dataclass(frozen=True)
+class SharedDataset:
+    """
+    A dataset published to shared memory.
+
+    Attributes:
+        key (str): The dataset key it was published under.
+        name (str): Name of the shared memory block.
+        size (int): Size of the Arrow IPC stream in bytes.
+    """
+    key: str
+    name: str
+    size: int
+
+
+class CPUTimeExceeded(Exception):
+    pass
+
+
+# --- Worker process -------------------------------------------------------------
+
+def _raise_cpu_time(signum, frame):
+    raise CPUTimeExceeded()
+
+
+def _limit_memory(limit):
+    # The address-space limit counts the interpreter and its imports, so it is
+    # set relative to the size of the warmed-up worker.
+    page_size = os.sysconf("SC_PAGE_SIZE")
+    with open("/proc/self/statm") as statm:
+        current = int(statm.read().split()[0]) * page_size
+    _, hard = resource.getrlimit(resource.RLIMIT_AS)
+    resource.setrlimit(resource.RLIMIT_AS, (current + limit, hard))
+
+
+def _set_cpu_limit(seconds):
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    soft = hard
+    if seconds is not None:
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        soft = int(usage.ru_utime + usage.ru_stime) + seconds
+        if hard != resource.RLIM_INFINITY:
+            soft = min(soft, hard)
+    resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+
+
+class _AttachedMemory(shared_memory.SharedMemory):
+    """
+    A shared memory block mapped by a worker. Before Python 3.13, SharedMemory
+    unlinks a block it fails to map, e.g. on ENOMEM under RLIMIT_AS, which would
+    delete the server's copy; only the pool that created a block may unlink it.
+    """
+
+    def unlink(self):
+        pass
+
+
+def _raise_memory_limit(delta):
+    # The mapping of a shared block counts against RLIMIT_AS, so the budget of
+    # the agent code is widened by the size of every block the worker maps.
+    if resource is None:
+        return
+    soft, hard = resource.getrlimit(resource.RLIMIT_AS)
+    if soft != resource.RLIM_INFINITY:
+        soft = soft + delta if hard == resource.RLIM_INFINITY else min(soft + delta, hard)
+        resource.setrlimit(resource.RLIMIT_AS, (soft, hard))
+
+
+def _mapped_size(size):
+    page_size = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+    return -(-max(size, 1) // page_size) * page_size
+
+
+def _attach(frames, dataset):
+    if dataset.name in frames:
+        frames.move_to_end(dataset.name)
+        return frames[dataset.name][1]
+    while len(frames) >= WORKER_DATASETS:
+        _detach(frames, next(iter(frames)))
+    _raise_memory_limit(_mapped_size(dataset.size))
+    block = None
+    try:
+        block = _AttachedMemory(name=dataset.name)
+        table = pa.ipc.open_stream(pa.py_buffer(block.buf[:dataset.size])).read_all()
+        # split_blocks lets columns without nulls stay views of the shared buffer.
+        df = table.to_pandas(split_blocks=True)
+    except BaseException:
+        if block is not None:
+            try:
+                block.close()
+            except BufferError:
+                pass
+        _raise_memory_limit(-_mapped_size(dataset.size))
+        raise
+    frames[dataset.name] = (block, df)
+    return df
+
+
+def _detach(frames, name):
+    block = frames.pop(name)[0]
+    gc.collect()  # results of earlier calls may keep views alive in reference cycles
+    try:
+        block.close()
+    except BufferError:
+        return  # a result still holds a view of the block; unmapped when it is collected
+    _raise_memory_limit(-_mapped_size(block.size))
+
+
+def _evaluate(code, namespace):
+    """
+    Runs code like langchain's PythonAstREPLTool: the value of a trailing
+    expression is returned, otherwise whatever the code printed.
+    """
+    tree = ast.parse(sanitize_input(code))
+    output = io.StringIO()
+    with redirect_stdout(output):
+        exec(compile(ast.Module(tree.body[:-1], type_ignores=[]), "<agent>", "exec"), namespace)
+        last = tree.body[-1:]
+        if last and isinstance(last[0], ast.Expr):
+            value = eval(compile(ast.Expression(last[0].value), "<agent>", "eval"), namespace)
+        else:
+            exec(compile(ast.Module(last, type_ignores=[]), "<agent>", "exec"), namespace)
+            value = None
+    return output.getvalue() if value is None else str(value)
+
+
+def _execute(code, df, cpu_limit, memory_limit):
+    # pandas copy-on-write keeps the shallow copy's edits away from the shared frame.
+    namespace = {"df": df.copy(deep=False)}
+    if resource is not None:
+        _set_cpu_limit(cpu_limit)
+    try:
+        return _evaluate(code, namespace)[:MAX_OUTPUT_LENGTH], True
+    except CPUTimeExceeded:
+        return CPU_TEXT.format(seconds=cpu_limit), True
+    except MemoryError:
+        # The worker may be left fragmented after hitting its limit, so it is replaced.
+        return MEMORY_TEXT.format(megabytes=memory_limit // 1024 ** 2), False
+    except Exception as error:
+        return f"{type(error).__name__}: {error}", True
+    finally:
+        if resource is not None:
+            _set_cpu_limit(None)
+
+
+def _worker_main(connection, cpu_limit, memory_limit):
+    import numpy  # noqa: F401 -- warm up before the first call
+    import pandas  # noqa: F401
+
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if resource is not None:
+        signal.signal(signal.SIGXCPU, _raise_cpu_time)
+        if memory_limit:
+            _limit_memory(memory_limit)
+    frames = OrderedDict()
+    while True:
+        try:
+            message = connection.recv()
+        except EOFError:
+            return
+        if message is None:
+            for name in list(frames):
+                _detach(frames, name)
+            return
+        dataset, code = message
+        try:
+            df = _attach(frames, dataset)
+        except Exception as error:
+            connection.send((f"{type(error).__name__}: {error}", True))
+            continue
+        result = _execute(code, df, cpu_limit, memory_limit)
+        del df  # only frames may reference the shared block between calls
+        connection.send(result)
+
+
+# --- Server side ----------------------------------------------------------------
+
+class _Worker:
+    def __init__(self, context, cpu_limit, memory_limit):
+        self.connection, child = context.Pipe()
+        self.process = context.Process(
+            target=_worker_main, args=(child, cpu_limit, memory_limit), daemon=True
+        )
+        self.process.start()
+        child.close()
+
+    def stop(self):
+        try:
+            self.connection.send(None)
+        except OSError:
+            pass
+        self.process.join(1)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.connection.close()
+
+
+class SandboxPool:
+    """
+    A thread-safe pool of pre-warmed worker processes running agent code
+    against datasets in shared memory.
+    """
+
+    def __init__(self, workers=DEFAULT_WORKERS, cpu_limit=CPU_TIME_LIMIT, memory_limit=MEMORY_LIMIT,
+                 wall_limit=WALL_TIME_LIMIT, max_datasets=MAX_SHARED_DATASETS):
+        self.cpu_limit = cpu_limit
+        self.memory_limit = memory_limit
+        self.wall_limit = wall_limit
+        self.max_datasets = max_datasets
+        # spawn keeps the Streamlit server's threads and locks out of the workers.
+        self._context = multiprocessing.get_context("spawn")
+        self._datasets = OrderedDict()
+        self._lock = threading.Lock()
+        self._idle = queue.Queue()
+        self._workers = set()
+        for _ in range(max(1, workers)):
+            self._release(self._spawn())
+
+    def _spawn(self):
+        worker = _Worker(self._context, self.cpu_limit, self.memory_limit)
+        with self._lock:
+            self._workers.add(worker)
+        return worker
+
+    def _release(self, worker):
+        self._idle.put(worker)
+
+    def _replace(self, worker):
+        with self._lock:
+            self._workers.discard(worker)
+        worker.process.kill()
+        worker.stop()
+        return self._spawn()
+
+    def publish(self, df, key):
+        """
+        Writes a dataset to shared memory once; later calls return the same block.
+
+        Args:
+            df (pd.DataFrame): The dataset.
+            key (str): The dataset key.
+
+        Returns:
+            SharedDataset: The handle passed to the workers.
+        """
+        with self._lock:
+            if key in self._datasets:
+                self._datasets.move_to_end(key)
+                return self._datasets[key][1]
+            table = pa.Table.from_pandas(df, preserve_index=True)
+            # Measure the stream first so it is written straight into the block.
+            sizer = pa.MockOutputStream()
+            with pa.ipc.new_stream(sizer, table.schema) as writer:
+                writer.write_table(table)
+            size = sizer.size()
+            block = shared_memory.SharedMemory(create=True, size=max(size, 1))
+            with pa.ipc.new_stream(pa.FixedSizeBufferWriter(pa.py_buffer(block.buf)), table.schema) as writer:
+                writer.write_table(table)
+            dataset = SharedDataset(key, block.name, size)
+            self._datasets[key] = (block, dataset)
+            while len(self._datasets) > self.max_datasets:
+                _, (old_block, _) = self._datasets.popitem(last=False)
+                self._unlink(old_block)
+            return dataset
+
+    @staticmethod
+    def _unlink(block):
+        # Workers that mapped the block keep their mapping until they drop it.
+        block.close()
+        try:
+            block.unlink()
+        except FileNotFoundError:
+            pass  # already removed, e.g. by the resource tracker
+
+    def release(self, key):
+        """
+        Removes a dataset from shared memory.
+
+        Args:
+            key (str): The dataset key.
+        """
+        with self._lock:
+            entry = self._datasets.pop(key, None)
+        if entry is not None:
+            self._unlink(entry[0])
+
+    def run(self, dataset, code):
+        """
+        Runs agent code in a worker and returns what the Python tool would return.
+
+        Args:
+            dataset (SharedDataset): The dataset bound to df.
+            code (str): The code.
+
+        Returns:
+            str: The value of the last expression or the printed output, or an
+            error description.
+        """
+        try:
+            worker = self._idle.get(timeout=self.wall_limit)
+        except queue.Empty:
+            return BUSY_TEXT
+        healthy = False
+        try:
+            worker.connection.send((dataset, code))
+            if worker.connection.poll(self.wall_limit):
+                output, healthy = worker.connection.recv()
+            else:
+                output = TIMEOUT_TEXT.format(seconds=self.wall_limit)
+        except (EOFError, OSError):
+            output = CRASH_TEXT
+        finally:
+            self._release(worker if healthy else self._replace(worker))
+        return output
+
+    @property
+    def size(self):
+        with self._lock:
+            return len(self._workers)
+
+    @property
+    def shared_bytes(self):
+        with self._lock:
+            return sum(dataset.size for _, dataset in self._datasets.values())
+
+    def usage(self):
+        """
+        Returns the shared-memory bytes per dataset key.
+
+        Returns:
+            dict: Bytes keyed by dataset key.
+        """
+        with self._lock:
+            return {key: dataset.size for key, (_, dataset) in self._datasets.items()}
+
+    def shrink(self, max_bytes, pinned=()):
+        """
+        Removes least recently used datasets, other than the pinned ones, until
+        shared memory holds at most max_bytes. Removed datasets are published
+        again by the next tool call that needs them.
+
+        Args:
+            max_bytes (int): The number of bytes to keep.
+            pinned (set): Keys of datasets that must stay.
+
+        Returns:
+            int: The number of bytes freed.
+        """
+        with self._lock:
+            total = sum(dataset.size for _, dataset in self._datasets.values())
+            removed = []
+            for key in list(self._datasets):
+                if total <= max_bytes:
+                    break
+                if key not in pinned:
+                    block, dataset = self._datasets.pop(key)
+                    removed.append((block, dataset.size))
+                    total -= dataset.size
+        for block, _ in removed:
+            self._unlink(block)
+        return sum(size for _, size in removed)
+
+    def close(self):
+        with self._lock:
+            workers, self._workers = list(self._workers), set()
+            blocks = [block for block, _ in self._datasets.values()]
+            self._datasets.clear()
+        for worker in workers:
+            worker.stop()
+        for block in blocks:
+            self._unlink(block)
+
+
+_default_pool = None
+_default_pool_lock = threading.Lock()
+
+
+def get_default_sandbox_pool(start=True):
+    """
+    Returns the process-wide sandbox pool, starting its workers on first use.
+
+    Args:
+        start (bool): Whether to start the pool when it is not running yet.
+
+    Returns:
+        SandboxPool: The shared pool instance, or None when it is not running
+        and start is False.
+    """
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None and start:
+            _default_pool = SandboxPool()
+            atexit.register(_default_pool.close)
+        return _default_pool
+
+
+class SandboxedPythonTool(BaseTool):
+    """
+    Drop-in replacement of PythonAstREPLTool that runs code in a SandboxPool.
+
+    Unlike the in-process tool, variables do not persist between calls: every
+    call starts from a fresh namespace holding df.
+    """
+
+    name: str = PYTHON_TOOL_NAME
+    description: str = ""
+    args_schema: Any = PythonInputs
+    pool: Any = None
+    df: Any = None
+    dataset_key: str = ""
+
+    def _run(self, query, run_manager=None):
+        # Publishing is a lookup once the dataset is in shared memory, and
+        # republishes it if the pool evicted it meanwhile.
+        return self.pool.run(self.pool.publish(self.df, self.dataset_key), query)
+
+
+def sandbox_agent_tools(executor, df, dataset_key, pool=None):
+    """
+    Replaces the agent's in-process Python tool with the sandboxed one.
+
+    Args:
+        executor (AgentExecutor): The pandas agent.
+        df (pd.DataFrame): The DataFrame the agent works on.
+        dataset_key (str): The dataset key it is shared under.
+        pool (SandboxPool): The pool to use. Defaults to the process-wide pool.
+
+    Returns:
+        AgentExecutor: The same executor.
+    """
+    if not is_available():
+        return executor
+    pool = pool if pool is not None else get_default_sandbox_pool()
+    for index, tool in enumerate(executor.tools):
+        if tool.name == PYTHON_TOOL_NAME:
+            executor.tools[index] = SandboxedPythonTool(
+                name=tool.name, description=tool.description, pool=pool, df=df, dataset_key=dataset_key
+            )
+    return executor
@@ -0,0 +1,145 @@
+"""
+summary_facts.py: This module contains vectorized, deterministic computations of the
+dataset facts used in summaries (missing values, duplicate rows and IQR/z-score
+anomalies), so that the language model only has to put them into words.
+"""
+
+import numpy as np
+
+from context_builder import DEFAULT_TOKEN_BUDGET, build_context
+from profiler import profile_dataframe
+
+IQR_FACTOR = 1.5
+Z_THRESHOLD = 3.0
+
+
+def count_duplicates(df):
+    """
+    Counts fully duplicated rows.
+
+    Args:
+        df (pd.DataFrame): The DataFrame to be checked.
+
+    Returns:
+        int: Number of rows that repeat an earlier row.
+    """
+    return int(df.duplicated().sum())
+
+
+def scan_anomalies(df, profile, iqr_factor=IQR_FACTOR, z_threshold=Z_THRESHOLD):
+    """
+    Flags outliers in every numeric column with the IQR rule and the z-score rule.
+
+    Quartiles, mean and standard deviation are taken from the profile, so each
+    column is only compared once against precomputed bounds.
+
+    Args:
+        df (pd.DataFrame): The DataFrame to be scanned.
+        profile (DatasetProfile): The profile of df.
+        iqr_factor (float): Multiplier of the interquartile range for the IQR fences.
+        z_threshold (float): Absolute z-score above which a value is an outlier.
+
+    Returns:
+        list: One dict per numeric column with at least one outlier, sorted by the
+        number of IQR outliers.
+    """
+    anomalies = []
+    for name in profile.numeric_columns:
+        column = profile.column(name)
+        if column.count == 0:
+            continue
+        values = df[name].to_numpy(dtype="float64", na_value=np.nan)
+        iqr = column.q75 - column.q25
+        lower, upper = column.q25 - iqr_factor * iqr, column.q75 + iqr_factor * iqr
+        with np.errstate(invalid="ignore"):
+            iqr_outliers = int(np.count_nonzero((values < lower) | (values > upper)))
+            if column.std and np.isfinite(column.std):
+                z_outliers = int(np.count_nonzero(np.abs(values - column.mean) > z_threshold * column.std))
+            else:
+                z_outliers = 0
+        if iqr_outliers or z_outliers:
+            anomalies.append({
+                "column": name,
+                "iqr_outliers": iqr_outliers,
+                "z_outliers": z_outliers,
+                "lower": lower,
+                "upper": upper,
+                "min": column.min,
+                "max": column.max,
+            })
+    return sorted(anomalies, key=lambda item: item["iqr_outliers"], reverse=True)
+
+
+def compute_summary_facts(df, profile=None):
+    """
+    Computes every deterministic fact that a dataset summary reports.
+
+    Args:
+        df (pd.DataFrame): The DataFrame to be summarized.
+        profile (DatasetProfile): The profile of df. Computed when not given.
+
+    Returns:
+        dict: Shape, missing value and duplicate totals, per-column missing counts
+        and the anomaly scan.
+    """
+    profile = profile if profile is not None else profile_dataframe(df)
+    return {
+        "n_rows": profile.n_rows,
+        "n_cols": profile.n_cols,
+        "missing_total": profile.total_nulls,
+        "missing_by_column": {
+            column.name: column.null_count for column in profile.columns if column.null_count
+        },
+        "duplicate_rows": count_duplicates(df),
+        "anomalies": scan_anomalies(df, profile),
+    }
+
+
+def format_missing(facts):
+    return f"Bu veri setinde {facts['missing_total']} eksik değer var."
+
+
+def format_duplicates(facts):
+    return f"Bu veri setinde {facts['duplicate_rows']} yinelenen satır var."
+
+
+def format_anomalies(facts):
+    """
+    Describes the anomaly scan in Turkish without the help of a language model.
+
+    Args:
+        facts (dict): The output of compute_summary_facts.
+
+    Returns:
+        str: One line per column with outliers.
+    """
+    if not facts["anomalies"]:
+        return "IQR ve z-skoru yöntemlerine göre sayısal sütunlarda anormal değer bulunmadı."
+    lines = [
+        f"- {item['column']}: IQR sınırları dışında {item['iqr_outliers']} değer "
+        f"({item['lower']:.2f} – {item['upper']:.2f}), |z| > {Z_THRESHOLD:g} olan {item['z_outliers']} değer"
+        for item in facts["anomalies"]
+    ]
+    return "\n".join(lines)
+
+
+def format_facts_context(facts, profile, token_budget=DEFAULT_TOKEN_BUDGET):
+    """
+    Renders the facts and a token-budgeted column digest as a plain-text context block.
+
+    Args:
+        facts (dict): The output of compute_summary_facts.
+        profile (DatasetProfile): The profile the facts were computed from.
+        token_budget (int): Token budget of the column digest.
+
+    Returns:
+        str: The context block for a language model prompt.
+    """
+    lines = [
+        f"Toplam eksik değer: {facts['missing_total']}",
+        f"Yinelenen satır: {facts['duplicate_rows']}",
+        build_context(profile, token_budget),
+        "Anomali taraması:",
+        format_anomalies(facts),
+    ]
+    return "\n".join(lines)
@@ -0,0 +1,60 @@
+"""
+Tests of answer_cache.AnswerCache.
+"""
+
+import os
+import sqlite3
+import sys
+from contextlib import closing
+
+os.environ.setdefault("INFAI_SANDBOX", "0")
+os.environ.setdefault("INFAI_METRICS", "0")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from answer_cache import AnswerCache, model_key  # noqa: E402
+from fake_llm import FakeChatModel  # noqa: E402
+
+
+def test_answers_are_kept_per_model(tmp_path):
+    cache = AnswerCache(str(tmp_path / "answers.sqlite3"))
+    cache.put("dataset", "Toplam satış nedir?", "100", model="gpt-4o-mini@0.0")
+
+    assert cache.get("dataset", "toplam satış nedir", model="gpt-4o-mini@0.0") == "100"
+    assert cache.get("dataset", "Toplam satış nedir?", model="gpt-4o@0.0") is None
+    assert cache.get("dataset", "Toplam satış nedir?", model="gpt-4o-mini@0.7") is None
+
+
+def test_fuzzy_matches_stay_within_the_model(tmp_path):
+    cache = AnswerCache(str(tmp_path / "answers.sqlite3"), fuzzy_threshold=0.5)
+    cache.put("dataset", "Toplam satış nedir?", "100", model="first")
+
+    assert cache.get("dataset", "Acaba toplam satış nedir?", model="first") == "100"
+    assert cache.get("dataset", "Acaba toplam satış nedir?", model="second") is None
+
+
+def test_cache_without_model_column_is_rebuilt(tmp_path):
+    path = str(tmp_path / "answers.sqlite3")
+    with closing(sqlite3.connect(path)) as connection, connection:
+        connection.execute(
+            "CREATE TABLE answers (dataset TEXT NOT NULL, question TEXT NOT NULL, answer TEXT NOT NULL, "
+            "created REAL NOT NULL, last_access REAL NOT NULL, PRIMARY KEY (dataset, question))"
+        )
+        connection.execute("INSERT INTO answers VALUES ('dataset', 'toplam satış nedir', '100', 0, 0)")
+
+    cache = AnswerCache(path)
+
+    assert cache.stats()["entries"] == 0
+    cache.put("dataset", "Toplam satış nedir?", "200", model="first")
+    assert cache.get("dataset", "Toplam satış nedir?", model="first") == "200"
+
+
+class ChatModel:
+    def __init__(self, model_name, temperature):
+        self.model_name = model_name
+        self.temperature = temperature
+
+
+def test_model_key_includes_name_and_temperature():
+    assert model_key(ChatModel("gpt-4o-mini", 0)) == "gpt-4o-mini@0"
+    assert model_key(ChatModel("gpt-4o-mini", 0)) != model_key(ChatModel("gpt-4o-mini", 0.7))
+    assert model_key(FakeChatModel(model_name="fake-a")) == "fake-a"
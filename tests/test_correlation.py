@@ -0,0 +1,149 @@
+"""
+Tests of the correlation engine against pandas' DataFrame.corr.
+"""
+
+import os
+import sys
+import warnings
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+import pytest  # noqa: E402
+
+import correlation  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    correlation.clear_cache()
+    yield
+    correlation.clear_cache()
+
+
+def sample_frame(rows=400, shared_missing=False, seed=0):
+    """
+    Correlated numeric columns with missing values, ties, a constant column and
+    a column without any values.
+    """
+    rng = np.random.default_rng(seed)
+    base = rng.normal(size=rows)
+    df = pd.DataFrame({
+        "a": base,
+        "b": base * 0.7 + rng.normal(size=rows) * 0.5,
+        "c": -base + rng.normal(size=rows) * 0.2,
+        "d": np.round(rng.normal(size=rows)),
+        "constant": np.ones(rows),
+        "empty": np.full(rows, np.nan),
+    })
+    if shared_missing:
+        df.loc[rng.choice(rows, rows // 10, replace=False), ["a", "b", "c", "d"]] = np.nan
+    else:
+        for name in ("a", "b", "d"):
+            df.loc[rng.choice(rows, rows // 10, replace=False), name] = np.nan
+    return df
+
+
+def off_diagonal(matrix):
+    # pandas reports 1.0 as the Kendall self-correlation of a constant column, where
+    # the engine, like Pearson, reports NaN; the diagonal is not compared.
+    values = matrix.to_numpy(copy=True)
+    np.fill_diagonal(values, 0.0)
+    return pd.DataFrame(values, index=matrix.index, columns=matrix.columns)
+
+
+def no_warnings(function, *args, **kwargs):
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        return function(*args, **kwargs)
+
+
+@pytest.mark.parametrize("method", ["pearson", "kendall"])
+def test_matrix_matches_pandas(method):
+    df = sample_frame()
+
+    result = no_warnings(correlation.compute_correlation, df, df.columns, method)
+
+    pd.testing.assert_frame_equal(off_diagonal(result), off_diagonal(df.corr(method=method)), atol=1e-6)
+
+
+def test_spearman_matches_pandas_when_rows_are_missing_together():
+    df = sample_frame(shared_missing=True)
+
+    result = no_warnings(correlation.compute_correlation, df, df.columns, "spearman")
+
+    pd.testing.assert_frame_equal(result, df.corr(method="spearman"), atol=1e-6)
+
+
+def test_spearman_ranks_each_column_once():
+    df = sample_frame()
+
+    result = no_warnings(correlation.compute_correlation, df, df.columns, "spearman")
+
+    pd.testing.assert_frame_equal(result, df.rank(method="average").corr(), atol=1e-6)
+
+
+@pytest.mark.parametrize("method", correlation.METHODS)
+def test_correlations_with_matches_the_matrix_row(method):
+    df = sample_frame()
+    expected = correlation.compute_correlation(df, df.columns, method)["a"].drop("a").dropna()
+
+    result = no_warnings(correlation.correlations_with, df, "a", method)
+
+    pd.testing.assert_series_equal(result.sort_index(), expected.sort_index(), check_names=False, atol=1e-9)
+    assert list(result.index) == list(result.abs().sort_values(ascending=False).index)
+
+
+def wide_frame(rows=300, groups=6, per_group=4, scattered_missing=True, seed=1):
+    """
+    Groups of correlated columns, with missing values and an all-NaN column, wide
+    enough to span several column blocks.
+    """
+    rng = np.random.default_rng(seed)
+    columns = {}
+    for group in range(groups):
+        base = rng.normal(size=rows)
+        for member in range(per_group):
+            columns[f"g{group}_{member}"] = base * rng.uniform(0.3, 1.0) + rng.normal(size=rows) * 0.6
+    columns["empty"] = np.full(rows, np.nan)
+    df = pd.DataFrame(columns)
+    numeric = [name for name in df.columns if name != "empty"]
+    if scattered_missing:
+        for name in numeric[::3]:
+            df.loc[rng.choice(rows, rows // 8, replace=False), name] = np.nan
+    else:
+        df.loc[rng.choice(rows, rows // 8, replace=False), numeric] = np.nan
+    return df
+
+
+def pair_set(pairs):
+    return {frozenset((first, second)): value for first, second, value in pairs.itertuples(index=False)}
+
+
+@pytest.mark.parametrize("method,scattered_missing", [
+    ("pearson", True), ("kendall", True), ("spearman", False),
+])
+def test_high_correlation_pairs_match_pandas(method, scattered_missing):
+    df = wide_frame(scattered_missing=scattered_missing)
+    expected = pair_set(correlation.strong_pairs(df.corr(method=method), threshold=0.3))
+
+    pairs = no_warnings(correlation.high_correlation_pairs, df, method=method, threshold=0.3, block_size=5)
+    found = pair_set(pairs)
+
+    assert expected
+    assert found.keys() == expected.keys()
+    assert all(abs(found[key] - expected[key]) < 1e-6 for key in expected)
+    assert len(pairs) == len(found)
+    assert list(pairs["correlation"].abs()) == sorted(pairs["correlation"].abs(), reverse=True)
+
+
+@pytest.mark.parametrize("method", correlation.METHODS)
+def test_high_correlation_pairs_do_not_depend_on_the_block_size(method):
+    df = wide_frame()
+
+    narrow = correlation.high_correlation_pairs(df, method=method, threshold=0.3, block_size=3)
+    wide = correlation.high_correlation_pairs(df, method=method, threshold=0.3, block_size=64)
+
+    pd.testing.assert_frame_equal(narrow.sort_values(["column_1", "column_2"]).reset_index(drop=True),
+                                  wide.sort_values(["column_1", "column_2"]).reset_index(drop=True), atol=1e-9)
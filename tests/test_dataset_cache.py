@@ -0,0 +1,36 @@
+"""
+Tests of dataset_cache.load_uploaded_csv when the dataset store cannot be written.
+"""
+
+import io
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest  # noqa: E402
+
+import dataset_store  # noqa: E402
+from dataset_cache import DatasetCache, load_uploaded_csv  # noqa: E402
+
+pytestmark = pytest.mark.skipif(not dataset_store.is_available(), reason="pyarrow is not installed")
+
+
+class Upload(io.BytesIO):
+    name = "sales.csv"
+
+
+def test_failed_store_write_keeps_the_upload(tmp_path, monkeypatch):
+    def write_partially(frame, path, **kwargs):
+        with open(path, "wb") as partial:
+            partial.write(b"ARROW1")
+        raise dataset_store.pa.ArrowInvalid("disk full")
+
+    monkeypatch.setattr(dataset_store.feather, "write_feather", write_partially)
+    cache = DatasetCache()
+    entry = load_uploaded_csv(Upload(b"a,b\n1,x\n2,y\n"), str(tmp_path), cache=cache, compact=False)
+
+    assert entry.df["a"].tolist() == [1, 2]
+    assert cache.get(entry.key) is entry
+    assert os.listdir(tmp_path) == []
+    assert dataset_store.list_datasets(str(tmp_path)) == []
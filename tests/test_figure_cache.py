@@ -0,0 +1,44 @@
+"""
+Tests of figure_cache.FigureCache.
+"""
+
+import os
+import sys
+
+os.environ.setdefault("MPLBACKEND", "Agg")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import matplotlib.pyplot as plt  # noqa: E402
+import pytest  # noqa: E402
+
+from figure_cache import FigureCache  # noqa: E402
+
+
+def test_render_caches_and_closes_the_figure():
+    cache = FigureCache()
+
+    def draw():
+        fig, ax = plt.subplots()
+        ax.plot([1, 2, 3])
+        return fig
+
+    image = cache.render(("dataset", "line"), draw)
+
+    assert image.startswith(b"\x89PNG")
+    assert cache.render(("dataset", "line"), draw) is image
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert plt.get_fignums() == []
+
+
+def test_failed_draw_does_not_leak_its_figure():
+    cache = FigureCache()
+
+    def draw():
+        fig, ax = plt.subplots()
+        raise ValueError("no data")
+
+    with pytest.raises(ValueError):
+        cache.render(("dataset", "broken"), draw)
+
+    assert plt.get_fignums() == []
+    assert cache.total_bytes == 0
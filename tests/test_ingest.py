@@ -0,0 +1,55 @@
+"""
+Tests of ingest.read_csv_incremental, the chunked CSV parser of large uploads.
+"""
+
+import io
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd  # noqa: E402
+import pytest  # noqa: E402
+
+import dataset_store  # noqa: E402
+from ingest import read_csv_incremental  # noqa: E402
+
+
+def late_dirty_csv(rows=1000):
+    # Column "a" is numeric in every chunk but the last, which holds "abc".
+    lines = ["a,b"] + [f"{index % 10},{index * 0.5}" for index in range(rows)]
+    lines.insert(rows - 5, "abc,1.0")
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+@pytest.mark.parametrize("downcast", [True, False])
+def test_late_text_value_matches_read_csv(downcast):
+    data = late_dirty_csv()
+    df, profile, _ = read_csv_incremental(io.BytesIO(data), chunksize=100, downcast=downcast)
+    expected = pd.read_csv(io.BytesIO(data))
+
+    assert df["a"].tolist() == expected["a"].tolist()
+    assert {type(value) for value in df["a"]} == {str}
+    assert df["b"].astype("float64").tolist() == expected["b"].tolist()
+    column = profile.column("a")
+    assert not column.is_numeric
+    assert column.count == len(expected)
+    assert column.unique == expected["a"].nunique()
+
+
+def test_numeric_columns_with_empty_chunks_are_not_reparsed():
+    lines = ["a,b"] + [f"{index}," for index in range(200)] + [f"{index},x" for index in range(200)]
+    df, _, _ = read_csv_incremental(io.BytesIO(("\n".join(lines) + "\n").encode("utf-8")), chunksize=100)
+
+    assert pd.api.types.is_integer_dtype(df["a"].dtype)
+    assert df["b"].isna().sum() == 200
+
+
+@pytest.mark.skipif(not dataset_store.is_available(), reason="pyarrow is not installed")
+def test_late_text_value_survives_feather_round_trip(tmp_path):
+    df, profile, _ = read_csv_incremental(io.BytesIO(late_dirty_csv()), chunksize=100)
+
+    dataset_store.save_dataset(df, "dirty", "dirty.csv", "hash", store_dir=str(tmp_path))
+    _, loaded, _ = dataset_store.load_dataset("dirty", store_dir=str(tmp_path))
+
+    assert loaded["a"].tolist() == df["a"].tolist()
@@ -0,0 +1,28 @@
+"""
+Tests of the figures drawn for the dashboard.
+"""
+
+import os
+import sys
+import warnings
+
+os.environ.setdefault("MPLBACKEND", "Agg")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import matplotlib.pyplot as plt  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from plots import categorical_figure  # noqa: E402
+
+
+def test_categorical_bar_figure_draws_without_warnings():
+    value_counts = pd.Series([5, 3, 1], index=[10, 20, 30])
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        fig = categorical_figure(value_counts, "store", "Bar", 3)
+
+    ax = fig.axes[0]
+    assert [patch.get_width() for patch in ax.patches] == [5, 3, 1]
+    assert ax.get_legend() is None
+    plt.close(fig)
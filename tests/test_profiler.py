@@ -0,0 +1,75 @@
+"""
+Tests of the incremental profiler against a profile of the whole DataFrame.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+import pytest  # noqa: E402
+
+import profiler  # noqa: E402
+from profiler import ProfileBuilder, profile_dataframe  # noqa: E402
+
+
+def build_in_chunks(df, size):
+    builder = ProfileBuilder()
+    for start in range(0, len(df), size):
+        builder.update(df.iloc[start:start + size])
+    return builder.build()
+
+
+def sample_frame(rows=10_000, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "sales": rng.normal(100, 15, rows),
+        "store": rng.integers(0, 45, rows),
+        "type": rng.choice(["A", "B", "C"], rows),
+    })
+    df.loc[rng.choice(rows, 500, replace=False), "sales"] = np.nan
+    return df
+
+
+def test_chunked_profile_matches_whole_profile():
+    df = sample_frame()
+
+    chunked = build_in_chunks(df, 1_500)
+    whole = profile_dataframe(df)
+
+    assert chunked.n_rows == whole.n_rows
+    for name in df.columns:
+        first, second = chunked.column(name), whole.column(name)
+        assert (first.count, first.null_count, first.unique) == (second.count, second.null_count, second.unique)
+        for statistic in ("mean", "std", "min", "max"):
+            assert getattr(first, statistic) == pytest.approx(getattr(second, statistic), rel=1e-9, nan_ok=True)
+
+
+def test_numeric_distinct_counts_switch_to_the_estimate_at_the_limit(monkeypatch):
+    monkeypatch.setattr(profiler, "EXACT_DISTINCT_LIMIT", 1_000)
+    df = pd.DataFrame({
+        "at_limit": np.arange(20_000) % 1_000,
+        "above_limit": np.arange(20_000, dtype=np.float64) % 5_000,
+    })
+
+    builder = ProfileBuilder()
+    for start in range(0, len(df), 2_000):
+        builder.update(df.iloc[start:start + 2_000])
+    profile = builder.build()
+
+    assert builder._columns["at_limit"].numeric_hll is None
+    assert profile.column("at_limit").unique == 1_000
+    assert builder._columns["above_limit"].numeric_hll is not None
+    assert builder._columns["above_limit"].numeric_uniques.size == 0
+    assert abs(profile.column("above_limit").unique - 5_000) <= 5_000 * 3 * 1.04 / np.sqrt(2 ** 14)
+
+
+def test_estimated_distinct_count_never_exceeds_the_values_seen(monkeypatch):
+    monkeypatch.setattr(profiler, "EXACT_DISTINCT_LIMIT", 100)
+    df = pd.DataFrame({"unique": np.random.default_rng(1).random(3_000)})
+
+    profile = build_in_chunks(df, 500)
+
+    assert 100 < profile.column("unique").unique <= 3_000
@@ -0,0 +1,77 @@
+"""
+Tests of data_utils.run_prompts, the concurrent summary path, with the offline
+model of fake_llm.
+"""
+
+import os
+import sys
+import time
+
+os.environ.setdefault("INFAI_SANDBOX", "0")
+os.environ.setdefault("INFAI_METRICS", "0")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+import pytest  # noqa: E402
+
+import data_utils  # noqa: E402
+from fake_llm import Distribution, FakeChatModel  # noqa: E402
+
+CALL_SECONDS = 0.5
+
+
+class SlowScriptModel(FakeChatModel):
+    """
+    Answers like FakeChatModel in CALL_SECONDS, except for prompts that ask for
+    "yavaş" (slow) or "hata" (an error).
+    """
+
+    def respond(self, messages):
+        text, _ = super().respond(messages)
+        prompt = messages[-1].content
+        if "hata" in prompt:
+            raise RuntimeError("model hatası")
+        return text, 5.0 if "yavaş" in prompt else CALL_SECONDS
+
+
+@pytest.fixture
+def agent():
+    df = pd.DataFrame({"Weekly_Sales": np.arange(100.0), "Store": np.arange(100) % 5})
+    llm = SlowScriptModel(scripts=("lookup",), latency=Distribution(), completion_tokens=Distribution("constant", 5))
+    data_utils.get_default_registry().clear()
+    return data_utils.create_agent(df, llm)
+
+
+def test_prompts_run_concurrently(agent):
+    prompts = {f"p{index}": f"Toplam kaç satır var? ({index})" for index in range(4)}
+
+    started = time.perf_counter()
+    answers = data_utils.run_prompts(agent, prompts, max_concurrency=4, timeout=30)
+    elapsed = time.perf_counter() - started
+
+    assert set(answers) == set(prompts)
+    assert all(answer and "zaman aşımı" not in answer for answer in answers.values())
+    # Each prompt makes two model calls; run one after another they would take 4 * 2 * CALL_SECONDS.
+    assert elapsed < 2 * 2 * CALL_SECONDS
+
+
+def test_slow_prompt_times_out_within_timeout(agent):
+    prompts = {"fast": "Toplam kaç satır var?", "slow": "yavaş: Toplam kaç satır var?"}
+
+    started = time.perf_counter()
+    answers = data_utils.run_prompts(agent, prompts, max_concurrency=2, timeout=1.5)
+    elapsed = time.perf_counter() - started
+
+    assert answers["slow"] == data_utils.TIMEOUT_MESSAGE.format(timeout=1.5)
+    assert "zaman aşımı" not in answers["fast"]
+    assert elapsed < 2.5
+
+
+def test_failing_prompt_does_not_drop_the_others(agent):
+    prompts = {"ok": "Toplam kaç satır var?", "broken": "hata: Toplam kaç satır var?"}
+
+    answers = data_utils.run_prompts(agent, prompts, max_concurrency=2, timeout=30)
+
+    assert answers["broken"] == data_utils.ERROR_MESSAGE.format(error="model hatası")
+    assert answers["ok"] and not answers["ok"].startswith("Yanıt")
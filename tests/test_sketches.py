@@ -0,0 +1,120 @@
+"""
+Tests of the streaming sketches of categorical columns.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+import pytest  # noqa: E402
+
+from sketches import CategorySketch, HyperLogLog, SpaceSaving, hash_numbers, hash_values  # noqa: E402
+
+
+def labels(count, prefix="v"):
+    return pd.Index([f"{prefix}{index}" for index in range(count)])
+
+
+@pytest.mark.parametrize("cardinality", [50, 1_000, 100_000, 500_000])
+def test_hyperloglog_error_on_known_cardinality(cardinality):
+    sketch = HyperLogLog()
+    sketch.update(hash_values(labels(cardinality)))
+
+    # Three standard errors of the default precision.
+    assert abs(sketch.estimate() - cardinality) <= max(1, 3 * 1.04 / np.sqrt(2 ** 14) * cardinality)
+
+
+def test_hyperloglog_ignores_duplicates():
+    sketch = HyperLogLog()
+    hashes = hash_numbers(np.arange(10_000, dtype=np.float64))
+    sketch.update(hashes)
+    registers = sketch.registers.copy()
+
+    sketch.update(hashes[::-1])
+
+    np.testing.assert_array_equal(sketch.registers, registers)
+
+
+def test_hyperloglog_merge_equals_single_pass():
+    values = hash_values(labels(50_000))
+    whole = HyperLogLog()
+    whole.update(values)
+    first, second = HyperLogLog(), HyperLogLog()
+    first.update(values[:30_000])
+    second.update(values[20_000:])
+
+    np.testing.assert_array_equal(first.merge(second).registers, whole.registers)
+    with pytest.raises(ValueError):
+        first.merge(HyperLogLog(precision=10))
+
+
+def chunks_of(series, size):
+    return [series.iloc[start:start + size] for start in range(0, len(series), size)]
+
+
+def skewed_column(rows=20_000, values=300, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.Series(rng.zipf(1.3, rows) % values).astype(str)
+
+
+def test_space_saving_is_exact_while_floor_is_zero():
+    column = skewed_column()
+    summary = SpaceSaving(capacity=1024)
+    for chunk in chunks_of(column, 1000):
+        summary.update(chunk.value_counts())
+
+    assert summary.floor == 0 and summary.exact
+    expected = column.value_counts()
+    pd.testing.assert_series_equal(summary.counts.sort_index(), expected.sort_index(), check_names=False)
+    assert summary.errors.eq(0).all()
+    assert summary.total == len(column)
+
+
+def test_space_saving_bounds_counts_beyond_capacity():
+    column = skewed_column(values=5_000)
+    summary = SpaceSaving(capacity=64)
+    for chunk in chunks_of(column, 1000):
+        summary.update(chunk.value_counts())
+    expected = column.value_counts()
+
+    assert not summary.exact
+    assert len(summary.counts) == 64
+    true_counts = expected.reindex(summary.counts.index, fill_value=0)
+    assert (summary.counts >= true_counts).all()
+    assert (summary.counts - summary.errors <= true_counts).all()
+    # Values more frequent than the floor are always monitored.
+    assert set(expected[expected > summary.floor].index) <= set(summary.counts.index)
+    assert list(summary.top(5).index) == list(expected.head(5).index)
+
+
+def test_space_saving_merge_equals_single_pass():
+    column = skewed_column()
+    whole = SpaceSaving()
+    whole.update(column.value_counts())
+    merged = SpaceSaving()
+    for chunk in chunks_of(column, 3000):
+        part = SpaceSaving()
+        part.update(chunk.value_counts())
+        merged.merge(part)
+
+    pd.testing.assert_series_equal(merged.counts.sort_index(), whole.counts.sort_index())
+    assert (merged.floor, merged.total) == (whole.floor, whole.total)
+
+
+def test_category_sketch_merge_equals_single_pass():
+    column = skewed_column()
+    whole = CategorySketch()
+    whole.update(column)
+    merged = CategorySketch()
+    for chunk in chunks_of(column, 2500):
+        part = CategorySketch()
+        part.update(chunk)
+        merged.merge(part)
+
+    assert merged.exact and merged.distinct == whole.distinct == column.nunique()
+    assert merged.total == len(column)
+    pd.testing.assert_series_equal(merged.top(10), whole.top(10))
+    np.testing.assert_array_equal(merged.hll.registers, whole.hll.registers)
@@ -0,0 +1,56 @@
+"""
+Tests of the date parsing done before a summary, which must neither change the
+shared DataFrame nor leave the profile behind the parsed columns.
+"""
+
+import os
+import sys
+
+os.environ.setdefault("INFAI_SANDBOX", "0")
+os.environ.setdefault("INFAI_METRICS", "0")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd  # noqa: E402
+
+from compaction import with_parsed_dates  # noqa: E402
+from profiler import profile_dataframe  # noqa: E402
+from summary_facts import compute_summary_facts  # noqa: E402
+
+
+def sales_frame():
+    return pd.DataFrame({
+        "Date": ["2024-01-05", "2024-01-12", "bilinmiyor", None, "2024-02-02"],
+        "Weekly_Sales": [10.0, 12.5, 9.0, 11.0, 14.0],
+    })
+
+
+def test_unparseable_dates_are_counted_as_missing():
+    df = sales_frame()
+    parsed, profile = with_parsed_dates(df, profile_dataframe(df))
+
+    assert pd.api.types.is_datetime64_any_dtype(parsed["Date"].dtype)
+    assert profile.column("Date").null_count == int(parsed["Date"].isna().sum()) == 2
+    facts = compute_summary_facts(parsed, profile)
+    assert facts["missing_by_column"] == {"Date": 2}
+    assert facts["missing_total"] == 2
+
+
+def test_shared_frame_is_not_modified():
+    df = sales_frame()
+    profile = profile_dataframe(df)
+
+    parsed, _ = with_parsed_dates(df, profile)
+
+    assert parsed is not df
+    assert not pd.api.types.is_datetime64_any_dtype(df["Date"].dtype)
+    assert profile.column("Date").null_count == 1
+
+
+def test_parsed_frame_is_returned_as_is():
+    df, _ = with_parsed_dates(sales_frame())
+    profile = profile_dataframe(df)
+
+    again, same_profile = with_parsed_dates(df, profile)
+
+    assert again is df
+    assert same_profile is profile